@@ -0,0 +1,132 @@
+"""
+HAMCODZ Analysis Process Pool
+=============================
+Runs SignalEngine.analyze in worker processes so the event loop stays
+responsive and analysis of many pairs uses every core.
+
+Candle columns are written once into a shared-memory block and the worker
+maps them directly; only the block name and shape cross the process
+boundary (no pickled DataFrames). Workers come from a forkserver that
+preloads numpy/pandas/signal_engine, and each one builds its SignalEngine
+at start-up, so the first real task doesn't pay the import cost.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from candles import CandleArrays, FIELDS
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES = ['numpy', 'pandas', 'candles', 'signal_engine']
+
+# Per-worker engines, created by _init_worker; instruments with their own
+# parameters get an engine each, keyed by those parameters
+_engine = None
+_engines: dict = {}
+
+
+def _init_worker(engine_kwargs: dict):
+    global _engine
+    from signal_engine import SignalEngine
+
+    _engine = SignalEngine(**engine_kwargs)
+
+
+def _engine_for(engine_kwargs: Optional[dict]):
+    if not engine_kwargs:
+        return _engine
+    key = tuple(sorted(engine_kwargs.items()))
+    engine = _engines.get(key)
+    if engine is None:
+        from signal_engine import SignalEngine
+
+        engine = _engines[key] = SignalEngine(**engine_kwargs)
+    return engine
+
+
+def _ping() -> int:
+    # Hold the worker briefly so concurrent pings land on distinct processes
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _analyze_shared(pair: str, name: str, length: int, engine_kwargs: Optional[dict] = None):
+    """Worker entry point: analyze candles stored in shared memory"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        block = np.ndarray((len(FIELDS), length), dtype=np.float64, buffer=shm.buf)
+        candles = CandleArrays(block[0].astype(np.int64), *(block[i].copy() for i in range(1, 6)))
+        del block
+        return _engine_for(engine_kwargs).analyze(pair, candles.to_frame())
+    finally:
+        shm.close()
+
+
+class AnalysisPool:
+    """
+    Process pool for CPU-bound signal analysis.
+
+    Args:
+        workers: Number of worker processes (default: CPU count)
+        engine_kwargs: SignalEngine constructor arguments for the workers
+    """
+
+    def __init__(self, workers: Optional[int] = None, engine_kwargs: Optional[dict] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.engine_kwargs = engine_kwargs or {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def start(self):
+        """Create the pool and wait until every worker is up and warm"""
+        if self._executor is not None:
+            return
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.engine_kwargs,)
+        )
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ping)
+                                      for _ in range(self.workers)))
+        logger.info(f"Analysis pool ready with {len(set(pids))} worker processes")
+
+    async def analyze(self, pair: str, candles: CandleArrays, engine_kwargs: Optional[dict] = None):
+        """Analyze `candles` for `pair` in a worker process (optionally with per-pair engine settings)"""
+        if self._executor is None:
+            await self.start()
+
+        length = len(candles)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(FIELDS) * length * 8))
+        try:
+            block = np.ndarray((len(FIELDS), length), dtype=np.float64, buffer=shm.buf)
+            for i, field in enumerate(FIELDS):
+                block[i] = getattr(candles, field)
+            del block
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _analyze_shared,
+                                              pair, shm.name, length, engine_kwargs)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def close(self):
+        """Shut the worker processes down"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
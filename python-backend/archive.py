@@ -0,0 +1,294 @@
+"""
+HAMCODZ Columnar Archive
+========================
+Parquet archive of closed candles and every generated signal, for research.
+
+Layout (hive partitioning, readable by pyarrow, pandas, DuckDB or Spark):
+
+    <root>/candles/pair=EURUSD/date=2026-01-31/part-....parquet
+    <root>/signals/pair=EURUSD/date=2026-01-31/part-....parquet
+
+Features:
+- Rows are buffered and written as one file per partition per flush
+- Each candle is archived once, when its bar has closed
+- A day's part files are merged into one once the day is over
+- read() prunes partitions by pair and date, pushes row filters into the
+  Parquet scan and loads only the requested columns
+
+Requires pyarrow (optional dependency); see HAVE_PYARROW.
+"""
+
+import os
+import glob
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from timeframes import timeframe_seconds
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAVE_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+CANDLES = "candles"
+SIGNALS = "signals"
+
+# Partition key: (dataset, pair partition value, date)
+PartitionKey = Tuple[str, str, str]
+
+if HAVE_PYARROW:
+    CANDLE_SCHEMA = pa.schema([
+        ('timeframe', pa.string()),
+        ('timestamp', pa.int64()),
+        ('open', pa.float64()),
+        ('high', pa.float64()),
+        ('low', pa.float64()),
+        ('close', pa.float64()),
+        ('volume', pa.float64()),
+    ])
+    SIGNAL_SCHEMA = pa.schema([
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('bar_time', pa.int64()),
+        ('timeframe', pa.string()),
+        ('type', pa.string()),
+        ('strength', pa.string()),
+        ('entry', pa.float64()),
+        ('tp1', pa.float64()),
+        ('tp2', pa.float64()),
+        ('sl', pa.float64()),
+        ('ema_crossover', pa.bool_()),
+        ('rsi_signal', pa.bool_()),
+        ('order_block', pa.bool_()),
+        ('fvg', pa.bool_()),
+        ('liquidity_sweep', pa.bool_()),
+        ('analysis', pa.string()),
+    ])
+
+
+def pair_partition(pair: str) -> str:
+    """Partition value for a pair ('EUR/USD' -> 'EURUSD')"""
+    return pair.replace('/', '')
+
+
+def _date(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+
+
+class ColumnarArchive:
+    """
+    Partitioned Parquet writer and reader.
+
+    Args:
+        root: Archive directory
+        compression: Parquet codec
+        flush_rows: Buffered rows that trigger a flush
+        flush_interval: Longest time rows stay buffered (checked on add)
+    """
+
+    def __init__(self,
+                 root: str = "archive",
+                 compression: str = "zstd",
+                 flush_rows: int = 50000,
+                 flush_interval: float = 300.0):
+        if not HAVE_PYARROW:
+            raise RuntimeError("The columnar archive requires pyarrow (pip install pyarrow)")
+        self.root = root
+        self.compression = compression
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+
+        self._buffers: Dict[PartitionKey, Dict[str, list]] = {}
+        self._buffered = 0
+        self._last_flush = time.time()
+        self._archived: Dict[Tuple[str, str], int] = {}  # (pair, timeframe) -> last archived bar open
+        self._touched: Set[PartitionKey] = set()  # partitions this writer added parts to
+
+        self.rows_written = 0
+        self.files_written = 0
+
+    # Writing
+
+    def _append(self, key: PartitionKey, row: dict):
+        buffer = self._buffers.setdefault(key, {})
+        for column, value in row.items():
+            buffer.setdefault(column, []).append(value)
+        self._buffered += 1
+
+    def _maybe_flush(self):
+        if self._buffered >= self.flush_rows or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def add_candles(self, pair: str, timeframe: str, bars, now: Optional[float] = None):
+        """Archive the closed bars of `bars` (CandleArrays) not archived yet"""
+        if not len(bars):
+            return
+        now = time.time() if now is None else now
+        last = self._archived.get((pair, timeframe), -1)
+        period = timeframe_seconds(timeframe)
+        mask = (bars.timestamp > last) & (bars.timestamp + period <= now)
+        if not mask.any():
+            return
+        new = bars[mask]
+        self._archived[(pair, timeframe)] = int(new.timestamp[-1])
+
+        # Group by UTC day with one vectorized split
+        days = new.timestamp // 86400
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for chunk in np.split(np.arange(len(new)), bounds):
+            key = (CANDLES, pair_partition(pair), _date(int(new.timestamp[chunk[0]])))
+            buffer = self._buffers.setdefault(key, {})
+            buffer.setdefault('timeframe', []).extend([timeframe] * len(chunk))
+            for field in ('timestamp', 'open', 'high', 'low', 'close', 'volume'):
+                buffer.setdefault(field, []).extend(getattr(new, field)[chunk].tolist())
+            self._buffered += len(chunk)
+        self._maybe_flush()
+
+    def add_signal(self, signal):
+        """Archive a generated signal with its confluence flags"""
+        timestamp = signal.timestamp
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        self._append((SIGNALS, pair_partition(signal.pair), timestamp.strftime('%Y-%m-%d')), {
+            'timestamp': timestamp,
+            'bar_time': signal.bar_time,
+            'timeframe': signal.timeframe,
+            'type': signal.signal_type.value,
+            'strength': signal.strength.value,
+            'entry': signal.entry_price,
+            'tp1': signal.take_profit_1,
+            'tp2': signal.take_profit_2,
+            'sl': signal.stop_loss,
+            'ema_crossover': signal.ema_crossover,
+            'rsi_signal': signal.rsi_signal,
+            'order_block': signal.order_block,
+            'fvg': signal.fvg,
+            'liquidity_sweep': signal.liquidity_sweep,
+            'analysis': signal.analysis,
+        })
+        self._maybe_flush()
+
+    def _partition_dir(self, key: PartitionKey) -> str:
+        dataset, pair, date = key
+        return os.path.join(self.root, dataset, f"pair={pair}", f"date={date}")
+
+    def flush(self):
+        """Write buffered rows, one Parquet file per partition"""
+        for key, columns in self._buffers.items():
+            schema = CANDLE_SCHEMA if key[0] == CANDLES else SIGNAL_SCHEMA
+            table = pa.Table.from_pydict(columns, schema=schema)
+            directory = self._partition_dir(key)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{time.time_ns()}-{os.getpid()}.parquet")
+            pq.write_table(table, f"{path}.tmp", compression=self.compression)
+            os.replace(f"{path}.tmp", path)
+            self._touched.add(key)
+            self.rows_written += table.num_rows
+            self.files_written += 1
+        self._buffers.clear()
+        self._buffered = 0
+        self._last_flush = time.time()
+        self.compact()
+
+    def compact(self, today: Optional[str] = None):
+        """Merge the part files of this writer's partitions from past days"""
+        today = today or _date(time.time())
+        for key in [k for k in self._touched if k[2] < today]:
+            parts = sorted(glob.glob(os.path.join(self._partition_dir(key), "part-*.parquet")))
+            if len(parts) > 1:
+                table = pa.concat_tables([pq.read_table(p) for p in parts])
+                if key[0] == CANDLES:
+                    table = table.sort_by([('timeframe', 'ascending'), ('timestamp', 'ascending')])
+                merged = os.path.join(self._partition_dir(key), f"part-{time.time_ns()}-{os.getpid()}.parquet")
+                pq.write_table(table, f"{merged}.tmp", compression=self.compression)
+                os.replace(f"{merged}.tmp", merged)
+                for path in parts:
+                    os.unlink(path)
+                logger.info(f"Compacted {len(parts)} archive files for {key[0]} {key[1]} {key[2]}")
+            self._touched.discard(key)
+
+    def close(self):
+        """Write anything still buffered"""
+        if self._buffered:
+            self.flush()
+
+    # Reading
+
+    def read(self,
+             dataset: str,
+             columns: Optional[List[str]] = None,
+             pairs: Optional[List[str]] = None,
+             start: Optional[datetime] = None,
+             end: Optional[datetime] = None,
+             filter=None):
+        """
+        Load archived rows as a pandas DataFrame.
+
+        Args:
+            dataset: 'candles' or 'signals'
+            columns: Columns to load (None = all; 'pair' and 'date' are partition columns)
+            pairs: Only these pairs
+            start: Rows from this time (inclusive)
+            end: Rows before this time
+            filter: Extra pyarrow.dataset expression, e.g. ds.field('fvg') == True
+        """
+        directory = os.path.join(self.root, dataset)
+        if not os.path.isdir(directory):
+            return pa.table({}).to_pandas()
+        dataset_ = ds.dataset(directory, format="parquet", partitioning="hive")
+
+        def bound(value: datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            timestamp = int(value.timestamp()) if dataset == CANDLES else pa.scalar(value, SIGNAL_SCHEMA.field('timestamp').type)
+            return value.strftime('%Y-%m-%d'), timestamp
+
+        # Conditions on the partition columns (pair, date) skip whole directories
+        expressions = []
+        if pairs:
+            expressions.append(ds.field('pair').isin([pair_partition(p) for p in pairs]))
+        if start is not None:
+            date, timestamp = bound(start)
+            expressions += [ds.field('date') >= date, ds.field('timestamp') >= timestamp]
+        if end is not None:
+            date, timestamp = bound(end)
+            expressions += [ds.field('date') <= date, ds.field('timestamp') < timestamp]
+        if filter is not None:
+            expressions.append(filter)
+
+        expression = None
+        for e in expressions:
+            expression = e if expression is None else expression & e
+        return dataset_.to_table(columns=columns, filter=expression).to_pandas()
+
+    def candles(self, pair: str, timeframe: str,
+                start: Optional[datetime] = None, end: Optional[datetime] = None):
+        """Archived OHLCV for one pair/timeframe, oldest first"""
+        df = self.read(CANDLES, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'],
+                       pairs=[pair], start=start, end=end, filter=ds.field('timeframe') == timeframe)
+        if df.empty:
+            return df
+        # A restart without a checkpoint may archive the same bar twice
+        return df.drop_duplicates('timestamp').sort_values('timestamp').reset_index(drop=True)
+
+    def state(self) -> dict:
+        """Last archived bar per pair/timeframe (for checkpoints)"""
+        return dict(self._archived)
+
+    def load_state(self, state: dict):
+        for key, ts in state.items():
+            if ts > self._archived.get(key, -1):
+                self._archived[key] = ts
+
+    def stats(self) -> dict:
+        """Return archive counters"""
+        return {'rows_written': self.rows_written, 'files_written': self.files_written,
+                'buffered': self._buffered}
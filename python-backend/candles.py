@@ -0,0 +1,71 @@
+"""
+HAMCODZ Candle Container
+========================
+Columnar OHLCV storage shared by the data provider, resampler and
+streaming components.
+
+CandleArrays keeps one NumPy array per field, so slicing and aggregation
+stay vectorized. to_frame() produces the pandas DataFrame SignalEngine expects.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+@dataclass
+class CandleArrays:
+    """OHLCV candles as parallel arrays (timestamp = bar open, unix seconds)"""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index) -> "CandleArrays":
+        """Slice or boolean-mask all columns at once"""
+        return CandleArrays(*(getattr(self, field)[index] for field in FIELDS))
+
+    @classmethod
+    def empty(cls) -> "CandleArrays":
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(5)))
+
+    @classmethod
+    def concat(cls, parts: List["CandleArrays"]) -> "CandleArrays":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, field) for p in parts]) for field in FIELDS))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CandleArrays":
+        """Build from a DataFrame with OHLC columns and a 'timestamp' column"""
+        ts = df['timestamp']
+        if pd.api.types.is_datetime64_any_dtype(ts):
+            timestamp = ts.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        else:
+            timestamp = pd.to_numeric(ts).to_numpy(dtype=np.int64)
+        if 'volume' in df:
+            volume = pd.to_numeric(df['volume']).to_numpy(dtype=np.float64)
+        else:
+            volume = np.zeros(len(df))
+        return cls(
+            timestamp,
+            df['open'].to_numpy(dtype=np.float64),
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+            volume,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame view in the column layout SignalEngine expects"""
+        return pd.DataFrame({field: getattr(self, field) for field in FIELDS})
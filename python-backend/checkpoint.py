@@ -0,0 +1,186 @@
+"""
+HAMCODZ Runner Checkpoints
+==========================
+Periodically saves runner state to a local file so a restart resumes warm
+instead of rebuilding everything from fresh API fetches.
+
+Components (resampler aggregates, tick-built bars, recent signals, the
+dedup index, ...) register a dump/load pair under a name. A checkpoint is
+one versioned pickle of every component's state. It is written to a
+per-process temporary file, fsynced and moved into place with os.replace,
+so a crash mid-write never leaves a torn checkpoint.
+
+Only long-running modes save; one-off runs open the checkpoint read-only
+so they never overwrite the live runner's state. Shard workers checkpoint
+to `<path>.<worker id>`; worker_states() reads one component back from
+all of them (e.g. for a cluster-wide report).
+
+Checkpoints are pickles: only load files this process wrote.
+"""
+
+import os
+import glob
+import time
+import pickle
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def _read(path: str) -> Optional[dict]:
+    """The checkpoint in `path`, or None (logged) if unreadable or incompatible"""
+    try:
+        with open(path, 'rb') as f:
+            checkpoint = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        logger.warning(f"Ignoring checkpoint {path} with unsupported version")
+        return None
+    return checkpoint
+
+
+def worker_states(path: str, name: str) -> Dict[str, Any]:
+    """
+    State of component `name` from every shard worker's checkpoint.
+
+    Returns worker id -> state for the `<path>.<worker id>` files that
+    hold it.
+    """
+    states = {}
+    for worker_path in sorted(glob.glob(f"{glob.escape(path)}.*")):
+        if worker_path.endswith(".tmp"):
+            continue
+        checkpoint = _read(worker_path)
+        if checkpoint and name in checkpoint.get('components', {}):
+            states[worker_path[len(path) + 1:]] = checkpoint['components'][name]
+    return states
+
+
+class Checkpointer:
+    """
+    Saves and restores registered component state.
+
+    Args:
+        path: Checkpoint file
+        interval: Minimum seconds between periodic saves
+        read_only: Restore only; save() does nothing
+    """
+
+    def __init__(self, path: str = "runner_state.ckpt", interval: float = 300.0, read_only: bool = False):
+        self.path = path
+        self.interval = interval
+        self.read_only = read_only
+        self._components: Dict[str, Tuple[Callable[[], Any], Callable[[Any], None]]] = {}
+        # State read by restore() for components that have not registered yet
+        self._pending: Dict[str, Any] = {}
+        self.last_save: Optional[float] = None
+        self.saves = 0
+        self.restored: List[str] = []
+
+    def register(self, name: str, dump: Callable[[], Any], load: Callable[[Any], None]):
+        """
+        Add a component. If a restored checkpoint holds state for it, the
+        state is loaded straight away, so late registration still resumes.
+        """
+        self._components[name] = (dump, load)
+        if name in self._pending:
+            self._load(name, self._pending.pop(name))
+
+    def _load(self, name: str, state: Any):
+        try:
+            self._components[name][1](state)
+            self.restored.append(name)
+        except Exception as e:
+            logger.error(f"Could not restore checkpoint component '{name}': {e}")
+
+    def save(self) -> bool:
+        """Write every component's state atomically"""
+        if self.read_only:
+            return False
+        started = time.perf_counter()
+        components = {}
+        for name, (dump, _) in self._components.items():
+            try:
+                components[name] = dump()
+            except Exception as e:
+                logger.error(f"Could not checkpoint component '{name}': {e}")
+        # Keep state for components not registered in this run
+        for name, state in self._pending.items():
+            components.setdefault(name, state)
+
+        payload = pickle.dumps({
+            'version': CHECKPOINT_VERSION,
+            'saved_at': time.time(),
+            'components': components,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Unique per process: two runners never share a half-written file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Checkpoint write to {self.path} failed: {e}")
+            return False
+
+        self.last_save = time.time()
+        self.saves += 1
+        logger.debug(f"Checkpoint saved ({len(payload)} bytes, "
+                     f"{(time.perf_counter() - started) * 1000:.1f} ms)")
+        return True
+
+    def maybe_save(self) -> bool:
+        """Save if at least `interval` seconds passed since the last save"""
+        if self.last_save is not None and time.time() - self.last_save < self.interval:
+            return False
+        return self.save()
+
+    def restore(self) -> List[str]:
+        """
+        Load the checkpoint file, if any.
+
+        Returns the names of the components restored. A missing, unreadable
+        or incompatible checkpoint is logged and ignored (cold start).
+        """
+        if not os.path.exists(self.path):
+            return []
+        started = time.perf_counter()
+        checkpoint = _read(self.path)
+        if checkpoint is None:
+            return []
+
+        restored_before = len(self.restored)
+        for name, state in checkpoint.get('components', {}).items():
+            if name in self._components:
+                self._load(name, state)
+            else:
+                self._pending[name] = state
+
+        age = time.time() - checkpoint.get('saved_at', time.time())
+        restored = self.restored[restored_before:]
+        logger.info(f"Restored checkpoint from {age:.0f}s ago in "
+                    f"{(time.perf_counter() - started) * 1000:.1f} ms ({', '.join(restored) or 'nothing yet'})")
+        return restored
+
+    async def run(self):
+        """Save every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.save()
+
+    def stats(self) -> dict:
+        """Return checkpoint counters"""
+        return {
+            'saves': self.saves,
+            'last_save': self.last_save,
+            'restored': list(self.restored),
+        }
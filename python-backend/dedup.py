@@ -0,0 +1,204 @@
+"""
+HAMCODZ Signal Deduplication
+============================
+Idempotency index that stops the same signal from being sent again.
+
+Features:
+- Exact key per signal: (pair, direction, bar open time, entry rounded to
+  whole pips), so retries, restarts or a shard rebalance never re-send it
+- Cool-down per pair/direction: a BUY on EUR/USD is not repeated every
+  cycle while the conditions hold
+- Dict lookups in memory, mirrored to an append-only JSON-lines file that
+  is reloaded on start and compacted once mostly stale
+- admit() only reserves a key; commit() makes it durable once the signal
+  was delivered, and release() frees it again if delivery failed, so a
+  failed send neither blocks the pair for its cool-down nor is lost
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (pair, direction, bar open time, entry in pips)
+SignalKey = Tuple[str, str, int, int]
+
+# Seconds between retention sweeps from admit()
+PRUNE_INTERVAL = 3600
+
+
+class DedupIndex:
+    """
+    Tracks delivered signals and rejects duplicates.
+
+    Args:
+        path: JSON-lines mirror file (None keeps the index in memory only)
+        cooldown: Default seconds before the same pair/direction may fire again
+        cooldown_for: Optional (pair, direction) -> seconds override
+        pip_multiplier: pair -> pips per price unit, used to round entries
+        retention: Seconds exact keys are remembered
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 cooldown: float = 4 * 3600,
+                 cooldown_for: Optional[Callable[[str, str], Optional[float]]] = None,
+                 pip_multiplier: Optional[Callable[[str], int]] = None,
+                 retention: float = 7 * 86400):
+        self.path = path
+        self.cooldown = cooldown
+        self.cooldown_for = cooldown_for
+        self.pip_multiplier = pip_multiplier or (lambda pair: 10000)
+        self.retention = retention
+
+        self._keys: Dict[SignalKey, float] = {}
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._mirror_lines = 0
+        self._next_prune = 0.0
+        # Admitted but not yet delivered: key -> pair/direction's previous last-sent time
+        self._reserved: Dict[SignalKey, Optional[float]] = {}
+
+        self.accepted = 0
+        self.suppressed = 0
+        self.suppressed_cooldown = 0
+
+        if path:
+            self._load_mirror()
+
+    def key(self, signal) -> SignalKey:
+        """Idempotency key for a Signal"""
+        bar_time = signal.bar_time if signal.bar_time is not None else int(signal.timestamp.timestamp())
+        entry = int(round(signal.entry_price * self.pip_multiplier(signal.pair)))
+        return (signal.pair, signal.signal_type.value, int(bar_time), entry)
+
+    def _cooldown(self, pair: str, direction: str) -> float:
+        if self.cooldown_for is not None:
+            override = self.cooldown_for(pair, direction)
+            if override is not None:
+                return override
+        return self.cooldown
+
+    def admit(self, signal, now: Optional[float] = None) -> bool:
+        """
+        Reserve `signal` and return True, or return False (and count it) if
+        it duplicates one already admitted. Follow with commit() or release().
+        """
+        now = time.time() if now is None else now
+        if now >= self._next_prune:
+            # Keeps a memory-only index bounded too
+            self.prune(now)
+        key = self.key(signal)
+        if key in self._keys:
+            self.suppressed += 1
+            logger.info(f"Suppressed duplicate {key[1]} signal for {key[0]}")
+            return False
+
+        last = self._last.get(key[:2])
+        if last is not None and now - last < self._cooldown(key[0], key[1]):
+            self.suppressed += 1
+            self.suppressed_cooldown += 1
+            logger.info(f"Suppressed {key[1]} signal for {key[0]} "
+                        f"(cool-down, last sent {(now - last) / 60:.0f} min ago)")
+            return False
+
+        self._reserved[key] = last
+        self._add(key, now)
+        self.accepted += 1
+        return True
+
+    def commit(self, signal):
+        """The admitted signal was delivered: keep its key for good"""
+        key = self.key(signal)
+        if self._reserved.pop(key, False) is not False and self.path:
+            self._append_mirror(key, self._keys[key])
+
+    def release(self, signal):
+        """The admitted signal was not delivered: let it (or its pair/direction) fire again"""
+        key = self.key(signal)
+        previous = self._reserved.pop(key, False)
+        if previous is False:
+            return
+        self._keys.pop(key, None)
+        if previous is None:
+            self._last.pop(key[:2], None)
+        else:
+            self._last[key[:2]] = previous
+        self.accepted -= 1
+        logger.info(f"Released {key[1]} signal for {key[0]} after a failed delivery")
+
+    def _add(self, key: SignalKey, sent_at: float):
+        if sent_at > self._keys.get(key, 0):
+            self._keys[key] = sent_at
+        if sent_at > self._last.get(key[:2], 0):
+            self._last[key[:2]] = sent_at
+
+    def prune(self, now: Optional[float] = None):
+        """Forget keys older than the retention window"""
+        now = time.time() if now is None else now
+        cutoff = now - self.retention
+        self._next_prune = now + PRUNE_INTERVAL
+        self._keys = {k: t for k, t in self._keys.items() if t >= cutoff}
+        self._last = {k: t for k, t in self._last.items() if t >= cutoff}
+
+    def _load_mirror(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                self._mirror_lines += 1
+                try:
+                    entry = json.loads(line)
+                    self._add(tuple(entry['k']), entry['t'])
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn last line after a crash
+        self.prune()
+        logger.info(f"Loaded {len(self._keys)} delivered-signal keys from {self.path}")
+        if self._mirror_lines > 2 * len(self._keys) + 100:
+            self.compact()
+
+    def _append_mirror(self, key: SignalKey, sent_at: float):
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'k': list(key), 't': sent_at}) + "\n")
+            self._mirror_lines += 1
+        except OSError as e:
+            logger.error(f"Could not write dedup index {self.path}: {e}")
+            return
+        if self._mirror_lines > 2 * len(self._keys) + 100:
+            self.prune()
+            self.compact()
+
+    def compact(self):
+        """Rewrite the mirror with only live keys"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for key, sent_at in self._keys.items():
+                f.write(json.dumps({'k': list(key), 't': sent_at}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._mirror_lines = len(self._keys)
+
+    def state(self) -> dict:
+        """Index contents (for checkpoints)"""
+        return {'keys': dict(self._keys), 'last': dict(self._last)}
+
+    def load_state(self, state: dict):
+        """Merge keys saved by state() (newest timestamp wins)"""
+        for key, sent_at in state['keys'].items():
+            self._add(key, sent_at)
+        for pair_direction, sent_at in state['last'].items():
+            if sent_at > self._last.get(pair_direction, 0):
+                self._last[pair_direction] = sent_at
+
+    def stats(self) -> dict:
+        """Return dedup counters"""
+        return {
+            'accepted': self.accepted,
+            'suppressed': self.suppressed,
+            'suppressed_cooldown': self.suppressed_cooldown,
+            'keys': len(self._keys),
+        }
@@ -0,0 +1,238 @@
+"""
+HAMCODZ Telegram Delivery Queue
+===============================
+Outbound message queue that stays within Telegram's flood limits.
+
+Features:
+- Token bucket for the whole bot (about 30 messages/s) and one per chat
+  (20/min for groups and channels, 1/s for private chats)
+- One lane per chat: a throttled chat never holds up the others
+- Priority within a chat: signals go out before reports
+- 429 responses pause the chat for the `retry_after` Telegram asks for;
+  transport and 5xx errors back off exponentially; both are retried a
+  bounded number of times. Other 4xx errors fail at once.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import aiohttp
+
+from fcs_client import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_SIGNAL = 0
+PRIORITY_UPDATE = 5
+PRIORITY_REPORT = 10
+
+
+@dataclass(order=True)
+class OutboundMessage:
+    """A queued message (ordered by priority, then submission order)"""
+    priority: int
+    seq: int
+    chat_id: str = field(compare=False)
+    text: str = field(compare=False)
+    parse_mode: str = field(compare=False, default="HTML")
+    attempts: int = field(compare=False, default=0)
+    future: Optional[asyncio.Future] = field(compare=False, default=None, repr=False)
+
+
+class _ChatLane:
+    """Pending messages and limits for one chat"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.queue: "asyncio.PriorityQueue[OutboundMessage]" = asyncio.PriorityQueue()
+        self.bucket = bucket
+        self.current: Optional[OutboundMessage] = None  # being sent
+        self.task: Optional[asyncio.Task] = None
+
+
+def is_private_chat(chat_id: str) -> bool:
+    """Numeric positive ids are users; '@name' and negative ids are groups/channels"""
+    return str(chat_id).lstrip().isdigit()
+
+
+class DeliveryQueue:
+    """
+    Rate-limited Telegram sender.
+
+    Args:
+        bot: TelegramBot used for sending
+        global_rate: Messages per second across all chats
+        group_rate_per_minute: Messages per minute to one group or channel
+        group_burst: Messages a group/channel may receive back to back
+        private_rate: Messages per second to one private chat
+        max_retries: Retries per message before it is given up
+        backoff_base: First backoff for transport/5xx errors (seconds)
+        backoff_max: Longest backoff
+    """
+
+    def __init__(self,
+                 bot,
+                 global_rate: float = 30.0,
+                 group_rate_per_minute: float = 20.0,
+                 group_burst: int = 3,
+                 private_rate: float = 1.0,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.group_rate_per_minute = group_rate_per_minute
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lanes: Dict[str, _ChatLane] = {}
+        # Kept apart from the lanes: a flood pause outlives an emptied lane
+        self._paused_until: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0
+
+    def _lane(self, chat_id: str) -> _ChatLane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            if is_private_chat(chat_id):
+                bucket = TokenBucket(self.private_rate, 1)
+            else:
+                bucket = TokenBucket(self.group_rate_per_minute / 60.0, self.group_burst)
+            lane = self._lanes[chat_id] = _ChatLane(bucket)
+        return lane
+
+    def submit(self,
+               text: str,
+               chat_id: Optional[str] = None,
+               priority: int = PRIORITY_SIGNAL,
+               parse_mode: str = "HTML") -> asyncio.Future:
+        """Queue a message; the future resolves to True once sent, False if given up"""
+        chat_id = chat_id or self.bot.config.channel_id
+        message = OutboundMessage(priority, next(self._seq), chat_id, text, parse_mode,
+                                  future=asyncio.get_running_loop().create_future())
+        lane = self._lane(chat_id)
+        lane.queue.put_nowait(message)
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._drain(chat_id, lane))
+        return message.future
+
+    async def send(self, text: str, chat_id: Optional[str] = None,
+                   priority: int = PRIORITY_SIGNAL, parse_mode: str = "HTML") -> bool:
+        """Queue a message and wait for the outcome"""
+        return await self.submit(text, chat_id, priority, parse_mode)
+
+    async def _drain(self, chat_id: str, lane: _ChatLane):
+        # Runs while the chat has messages; a new task starts on the next submit
+        try:
+            while not lane.queue.empty():
+                message = lane.current = lane.queue.get_nowait()
+                pause = self._paused_until.get(chat_id, 0.0) - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                else:
+                    self._paused_until.pop(chat_id, None)
+                await lane.bucket.acquire()
+                await self.global_bucket.acquire()
+                delay = await self._attempt(chat_id, message)
+                lane.current = None
+                if delay is None:
+                    continue
+                # Retry: the message goes back to the front of its priority level
+                self._paused_until[chat_id] = time.monotonic() + delay
+                lane.queue.put_nowait(message)
+        except asyncio.CancelledError:
+            if lane.current is not None:
+                self._settle(lane.current, False)
+            raise
+        if self._lanes.get(chat_id) is lane and lane.queue.empty():
+            del self._lanes[chat_id]
+
+    async def _attempt(self, chat_id: str, message: OutboundMessage) -> Optional[float]:
+        """Send once; returns a delay to retry after, or None when settled"""
+        message.attempts += 1
+        try:
+            result = await self.bot.send_raw(message.text, chat_id=chat_id, parse_mode=message.parse_mode)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return self._retry(message, f"{e.__class__.__name__}: {e}", self._backoff(message.attempts))
+
+        if result.get("ok"):
+            self.sent += 1
+            self._settle(message, True)
+            return None
+
+        code = result.get("error_code")
+        description = result.get("description", "")
+        if code == 429:
+            self.throttled += 1
+            retry_after = float((result.get("parameters") or {}).get("retry_after", 1))
+            # Honoured by later messages even if this one is given up
+            self._paused_until[chat_id] = time.monotonic() + retry_after
+            return self._retry(message, f"flood limit, retry after {retry_after:.0f}s", retry_after)
+        if code is not None and code >= 500:
+            return self._retry(message, f"HTTP {code} {description}", self._backoff(message.attempts))
+
+        logger.error(f"Telegram rejected message to {chat_id}: {code} {description}")
+        self.failed += 1
+        self._settle(message, False)
+        return None
+
+    def _retry(self, message: OutboundMessage, reason: str, delay: float) -> Optional[float]:
+        if message.attempts > self.max_retries:
+            logger.error(f"Giving up on message to {message.chat_id} after {message.attempts} attempts ({reason})")
+            self.failed += 1
+            self._settle(message, False)
+            return None
+        self.retried += 1
+        logger.warning(f"Telegram send to {message.chat_id} failed ({reason}), retrying in {delay:.1f}s")
+        return delay
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter"""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(cap / 2, cap)
+
+    @staticmethod
+    def _settle(message: OutboundMessage, ok: bool):
+        if message.future is not None and not message.future.done():
+            message.future.set_result(ok)
+
+    def pending(self) -> int:
+        return sum(lane.queue.qsize() for lane in self._lanes.values())
+
+    async def close(self, timeout: float = 30.0):
+        """Wait (up to `timeout`) for queued messages, then drop the rest"""
+        tasks = [lane.task for lane in self._lanes.values() if lane.task and not lane.task.done()]
+        if tasks:
+            done, still_running = await asyncio.wait(tasks, timeout=timeout)
+            if still_running:
+                in_flight = sum(lane.current is not None for lane in self._lanes.values())
+                logger.warning(f"Dropped {self.pending() + in_flight} undelivered Telegram messages on shutdown")
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+        for lane in self._lanes.values():
+            while not lane.queue.empty():
+                self._settle(lane.queue.get_nowait(), False)
+        self._lanes.clear()
+
+    def stats(self) -> dict:
+        """Return delivery counters"""
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'throttled': self.throttled,
+            'pending': self.pending(),
+            'chats': len(self._lanes),
+        }
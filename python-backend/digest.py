@@ -0,0 +1,176 @@
+"""
+HAMCODZ Signal Digest
+=====================
+Coalesces bursts of signals into digest messages.
+
+When a news spike fires signals on many pairs at once, sending one
+Telegram message per signal burns the flood limit and floods
+subscribers. In digest mode delivered signals are buffered and sent
+together: at the end of each analysis cycle, or when a window expires
+(so streamed signals are batched too). Each digest is split into as few
+messages as fit Telegram's 4096-character limit.
+
+Signals are still logged, tracked and stored one by one when they are
+buffered; only the outbound messages are combined. A digest that cannot
+be delivered at all is put back and retried; signals are only dropped
+(and logged one by one) after repeated failures.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Telegram's limit for one message's text
+TELEGRAM_MAX_LENGTH = 4096
+
+DIGEST_HEADER = "📬 <b>{count} new signals</b>"
+DIGEST_PART = " ({part}/{total})"
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖➖➖➖\n\n"
+
+
+def pack_digest(messages: List[str], limit: int = TELEGRAM_MAX_LENGTH) -> List[str]:
+    """
+    Join messages into as few digest texts of at most `limit` characters
+    as possible, keeping their order. A message that cannot fit with a
+    header is sent on its own, unchanged.
+    """
+    # Room for the longest header any chunk can get
+    n = len(messages)
+    reserve = len(DIGEST_HEADER.format(count=n) + DIGEST_PART.format(part=n, total=n) + DIGEST_SEPARATOR)
+
+    chunks: List[List[str]] = []
+    size = 0
+    for message in messages:
+        added = len(message) + (len(DIGEST_SEPARATOR) if chunks and chunks[-1] else 0)
+        if chunks and chunks[-1] and size + added <= limit - reserve:
+            chunks[-1].append(message)
+            size += added
+        else:
+            chunks.append([message])
+            size = len(message)
+
+    texts = []
+    for part, chunk in enumerate(chunks, 1):
+        header = DIGEST_HEADER.format(count=len(chunk))
+        if len(chunks) > 1:
+            header += DIGEST_PART.format(part=part, total=len(chunks))
+        text = DIGEST_SEPARATOR.join([header] + chunk)
+        texts.append(text if len(text) <= limit else DIGEST_SEPARATOR.join(chunk))
+    return texts
+
+
+class SignalDigest:
+    """
+    Buffer of signals waiting to go out as a digest.
+
+    Args:
+        deliver: async (signals) -> bool, e.g. SignalManager.send_digest
+        window: Seconds after the first buffered signal before the digest
+            is sent even if nobody calls flush() (None = only on flush)
+        retry_delay: Seconds before a failed digest is tried again
+        max_attempts: Failed deliveries before a digest's signals are dropped
+        on_dropped: Optional (signal) -> None for each dropped signal
+    """
+
+    def __init__(self,
+                 deliver: Callable[[list], Awaitable[bool]],
+                 window: Optional[float] = 30.0,
+                 retry_delay: float = 30.0,
+                 max_attempts: int = 5,
+                 on_dropped: Optional[Callable[[object], None]] = None):
+        self.deliver = deliver
+        self.window = window
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.on_dropped = on_dropped
+        self._failures_in_row = 0
+
+        self._buffer: list = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+        self.digests = 0
+        self.signals = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def add(self, signal):
+        """Buffer a signal for the next digest"""
+        self._buffer.append(signal)
+        if self.window is not None and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after(self.window))
+
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Send everything buffered as one digest; returns the number of signals"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        try:
+            sent = await self.deliver(batch)
+        except Exception as e:
+            logger.error(f"Digest of {len(batch)} signals failed: {e}")
+            sent = False
+        if not sent:
+            self.failed += 1
+            self._failures_in_row += 1
+            if self._failures_in_row < self.max_attempts:
+                # Retried ahead of anything buffered meanwhile
+                self._buffer = batch + self._buffer
+                if self._timer is None:
+                    self._timer = asyncio.create_task(self._flush_after(self.retry_delay))
+                logger.warning(f"Digest of {len(batch)} signals not delivered, "
+                               f"retrying in {self.retry_delay:.0f}s")
+            else:
+                self._failures_in_row = 0
+                self.dropped += len(batch)
+                for signal in batch:
+                    logger.error(f"Dropped {signal.pair} {signal.signal_type.value} signal "
+                                 f"{signal.signal_id} after {self.max_attempts} failed digests")
+                    if self.on_dropped:
+                        self.on_dropped(signal)
+            return 0
+        self._failures_in_row = 0
+        self.digests += 1
+        self.signals += len(batch)
+        logger.info(f"Sent digest of {len(batch)} signals")
+        return len(batch)
+
+    def flush_in_background(self):
+        """Start a flush without waiting for it"""
+        task = asyncio.create_task(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def close(self):
+        """Send what is buffered and wait for flushes in progress"""
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+        await self.flush()
+        if self._timer is not None:
+            # Delivery failed just now: no retry before exit
+            self._timer.cancel()
+            self._timer = None
+            logger.error(f"Exiting with {len(self._buffer)} undelivered digest signals")
+
+    def stats(self) -> dict:
+        """Return digest counters"""
+        return {
+            'digests': self.digests,
+            'signals': self.signals,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'pending': self.pending(),
+        }
@@ -0,0 +1,248 @@
+"""
+HAMCODZ Signal Fan-out
+======================
+Delivers each signal to every destination in a routing table: tier
+channels, private chats, and delayed copies for the free tier.
+
+Tiers match the Prisma `plan` field (FREE, PREMIUM, VIP). Each
+destination gets a message variant ('full' or 'free', see templates.py);
+every variant is rendered once per signal and reused. Sends run
+concurrently up to a limit, delayed copies are scheduled on the event
+loop, and a failing destination never blocks or fails the others.
+
+Delayed copies that have not gone out when the process exits (one-off
+runs close right after their cycle) are kept in a pending file and sent
+by resume() on the next start: at their due time if that is still ahead,
+otherwise straight away. Without a pending file, delayed tiers need a
+long-running process (--schedule or --stream).
+
+Routing table (FANOUT_ROUTES file):
+
+    {"routes": [
+        {"chat_id": "@hamcodz_vip", "tier": "VIP"},
+        {"chat_id": "@hamcodz_premium", "tier": "PREMIUM"},
+        {"chat_id": "@hamcodz_free", "tier": "FREE", "delay_minutes": 30},
+        {"chat_id": "123456789", "tier": "VIP", "pairs": ["XAU/USD"]}
+    ]}
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from digest import pack_digest
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("FREE", "PREMIUM", "VIP")
+
+# Message variant per tier unless a route names one
+TIER_VARIANTS = {"FREE": "free", "PREMIUM": "full", "VIP": "full"}
+
+STRENGTH_ORDER = {"WEAK": 0, "MODERATE": 1, "STRONG": 2}
+
+
+@dataclass
+class Route:
+    """One destination for signals"""
+    chat_id: str
+    tier: str = "VIP"
+    delay_minutes: float = 0.0
+    variant: Optional[str] = None
+    pairs: List[str] = field(default_factory=list)  # empty = all pairs
+    min_strength: Optional[str] = None
+
+    def __post_init__(self):
+        if self.tier not in TIERS:
+            raise ValueError(f"Unknown tier {self.tier!r} for {self.chat_id} (expected one of {TIERS})")
+        if self.variant is None:
+            self.variant = TIER_VARIANTS[self.tier]
+
+    def accepts(self, signal) -> bool:
+        if self.pairs and signal.pair not in self.pairs:
+            return False
+        if self.min_strength and STRENGTH_ORDER[signal.strength.value] < STRENGTH_ORDER[self.min_strength]:
+            return False
+        return True
+
+
+def load_routes(path: str) -> List[Route]:
+    """Read a routing table file"""
+    with open(path) as f:
+        data = json.load(f)
+    return [Route(**entry) for entry in data["routes"]]
+
+
+class FanoutDispatcher:
+    """
+    Concurrent multi-destination signal delivery.
+
+    Args:
+        send: async (text, chat_id) -> bool, e.g. DeliveryQueue.send
+        routes: Destinations
+        render: (signal, variant) -> message text
+        max_concurrency: Most sends in flight at once
+        pending_path: File keeping delayed sends across restarts (None = lost on exit)
+    """
+
+    def __init__(self,
+                 send: Callable[[str, str], Awaitable[bool]],
+                 routes: List[Route],
+                 render: Callable[[object, str], str],
+                 max_concurrency: int = 32,
+                 pending_path: Optional[str] = None):
+        self.send = send
+        self.routes = routes
+        self.render = render
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.pending_path = pending_path
+        # key -> {'chat_id', 'tier', 'text', 'due'} for delayed sends not yet made
+        self._pending: Dict[str, dict] = {}
+        self._delayed: Dict[asyncio.Task, str] = {}  # task -> pending key
+        if pending_path and os.path.exists(pending_path):
+            with open(pending_path) as f:
+                self._pending = json.load(f)
+
+        self.delivered = 0
+        self.failed = 0
+        self.failures_by_chat: Dict[str, int] = {}
+
+    async def _send_one(self, text: str, route: Route) -> bool:
+        try:
+            async with self._semaphore:
+                ok = await self.send(text, route.chat_id)
+        except Exception as e:
+            logger.error(f"Fan-out to {route.chat_id} failed: {e}")
+            ok = False
+        if ok:
+            self.delivered += 1
+        else:
+            self.failed += 1
+            self.failures_by_chat[route.chat_id] = self.failures_by_chat.get(route.chat_id, 0) + 1
+        return ok
+
+    async def _send_later(self, key: str):
+        entry = self._pending[key]
+        await asyncio.sleep(max(0.0, entry['due'] - time.time()))
+        await self._send_one(entry['text'], Route(entry['chat_id'], entry['tier']))
+        del self._pending[key]
+        self._save_pending()
+
+    def _save_pending(self):
+        if not self.pending_path:
+            return
+        tmp_path = f"{self.pending_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._pending, f)
+            os.replace(tmp_path, self.pending_path)
+        except OSError as e:
+            logger.error(f"Could not save delayed deliveries to {self.pending_path}: {e}")
+
+    async def dispatch(self, signal) -> Dict[str, bool]:
+        """
+        Deliver `signal` to every matching route.
+
+        Immediate destinations are awaited and their outcome returned by
+        chat id; delayed ones are scheduled and not included.
+        """
+        routes = [r for r in self.routes if r.accepts(signal)]
+        rendered: Dict[str, str] = {}
+        for variant in {r.variant for r in routes}:
+            rendered[variant] = self.render(signal, variant)
+
+        immediate = []
+        for route in routes:
+            text = rendered[route.variant]
+            if route.delay_minutes > 0:
+                self._schedule(text, route)
+            else:
+                immediate.append(route)
+
+        results = await asyncio.gather(*(self._send_one(rendered[r.variant], r) for r in immediate))
+        return {route.chat_id: ok for route, ok in zip(immediate, results)}
+
+    async def dispatch_digest(self, signals: list) -> Dict[str, bool]:
+        """
+        Deliver several signals as digest messages.
+
+        Each route gets the signals it accepts packed into as few messages
+        as fit (a single signal goes out as its normal message). Returns
+        by chat id whether every immediate message went out.
+        """
+        rendered: Dict[tuple, str] = {}
+        immediate = []
+        for route in self.routes:
+            texts = []
+            for signal in signals:
+                if not route.accepts(signal):
+                    continue
+                key = (id(signal), route.variant)
+                if key not in rendered:
+                    rendered[key] = self.render(signal, route.variant)
+                texts.append(rendered[key])
+            if not texts:
+                continue
+            for text in (texts if len(texts) == 1 else pack_digest(texts)):
+                if route.delay_minutes > 0:
+                    self._schedule(text, route)
+                else:
+                    immediate.append((text, route))
+
+        results = await asyncio.gather(*(self._send_one(text, route) for text, route in immediate))
+        outcome: Dict[str, bool] = {}
+        for (_, route), ok in zip(immediate, results):
+            outcome[route.chat_id] = outcome.get(route.chat_id, True) and ok
+        return outcome
+
+    def _schedule(self, text: str, route: Route):
+        key = uuid.uuid4().hex
+        self._pending[key] = {'chat_id': route.chat_id, 'tier': route.tier, 'text': text,
+                              'due': time.time() + route.delay_minutes * 60}
+        self._save_pending()
+        self._start(key)
+
+    def _start(self, key: str):
+        task = asyncio.create_task(self._send_later(key))
+        self._delayed[task] = key
+        task.add_done_callback(self._delayed.pop)
+
+    def resume(self):
+        """Schedule delayed sends saved by an earlier run"""
+        waiting = [key for key in self._pending if key not in self._delayed.values()]
+        for key in waiting:
+            self._start(key)
+        if waiting:
+            logger.info(f"Resumed {len(waiting)} delayed signal deliveries")
+
+    async def close(self, timeout: float = 10.0):
+        """Finish delayed sends already due; keep (or, without a pending file, drop) the rest"""
+        now = time.time()
+        due = [task for task, key in self._delayed.items() if self._pending[key]['due'] <= now]
+        if due:
+            await asyncio.wait(due, timeout=timeout)
+        if self._delayed:
+            if self.pending_path:
+                logger.info(f"Keeping {len(self._delayed)} delayed signal deliveries "
+                            f"in {self.pending_path} for the next start")
+            else:
+                logger.warning(f"Cancelling {len(self._delayed)} delayed signal deliveries "
+                               f"(delayed tiers need a long-running process)")
+            for task in list(self._delayed):
+                task.cancel()
+            await asyncio.gather(*list(self._delayed), return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Return fan-out counters"""
+        return {
+            'routes': len(self.routes),
+            'delivered': self.delivered,
+            'failed': self.failed,
+            'delayed_pending': len(self._pending),
+            'failures_by_chat': dict(self.failures_by_chat),
+        }
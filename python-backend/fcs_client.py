@@ -0,0 +1,341 @@
+"""
+HAMCODZ FCS API Client
+======================
+Rate-limited, retrying client for the FCS forex API.
+
+Features:
+- Token-bucket rate limiter matched to the plan's request budget
+- Exponential backoff with full jitter (honours Retry-After on 429)
+- Circuit breaker so an outage fails fast instead of burning quota
+- Optional grouping of several symbols into one request
+- Configurable base URL, so it can run against a local fake FCS server
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import aiohttp
+
+from fcs_parser import loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FCS_API_URL = "https://fcsapi.com/api/forex"
+
+# HTTP statuses worth retrying; everything else fails immediately
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FCSError(Exception):
+    """Raised when the FCS API cannot deliver the requested data"""
+
+
+class CircuitOpenError(FCSError):
+    """Raised when the circuit breaker is open and requests are refused"""
+
+
+class _RetryableStatus(Exception):
+    """Internal: HTTP status that should be retried"""
+
+    def __init__(self, status: int, retry_after: Optional[str] = None):
+        super().__init__(f"HTTP {status} from FCS")
+        self.status = status
+        self.retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `capacity` stored"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    CLOSED: requests flow. After `failure_threshold` consecutive failures it
+    goes OPEN and refuses requests for `reset_timeout` seconds, then lets a
+    single trial request through (HALF_OPEN) to decide whether to close.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a request may be attempted now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.error(f"FCS circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+@dataclass
+class FCSClientConfig:
+    """FCS client configuration"""
+    api_key: str
+    base_url: str = DEFAULT_FCS_API_URL
+    requests_per_minute: float = 10.0
+    burst: int = 5
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    timeout: float = 15.0
+    batch_size: int = 1
+    batch_window: float = 0.01
+    failure_threshold: int = 5
+    reset_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "FCSClientConfig":
+        """Build a config from FCS_* environment variables"""
+        return cls(
+            api_key=api_key or os.getenv("FCS_API_KEY", ""),
+            base_url=os.getenv("FCS_API_URL", DEFAULT_FCS_API_URL),
+            requests_per_minute=float(os.getenv("FCS_RATE_LIMIT", "10")),
+            burst=int(os.getenv("FCS_RATE_BURST", "5")),
+            max_retries=int(os.getenv("FCS_MAX_RETRIES", "3")),
+            batch_size=int(os.getenv("FCS_BATCH_SIZE", "1")),
+        )
+
+
+def fcs_period(timeframe: str) -> str:
+    """Convert a canonical timeframe ("1H") to the FCS period label ("1h")"""
+    return timeframe.lower()
+
+
+class FCSClient:
+    """
+    Async FCS API client.
+
+    Owns a long-lived aiohttp session; call close() (or use it as an async
+    context manager) when done.
+    """
+
+    def __init__(self, config: FCSClientConfig):
+        self.config = config
+        self.bucket = TokenBucket(config.requests_per_minute / 60.0, config.burst)
+        self.breaker = CircuitBreaker(config.failure_threshold, config.reset_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Pending batch per (timeframe, count): symbol -> futures
+        self._pending: Dict[Tuple[str, int], Dict[str, List[asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, int], asyncio.TimerHandle] = {}
+        self._flushes: Set[asyncio.Task] = set()
+
+        self.requests_sent = 0
+        self.retries = 0
+
+    async def __aenter__(self) -> "FCSClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+            self._session = aiohttp.ClientSession(timeout=timeout)
+        return self._session
+
+    async def close(self):
+        """Send batches still waiting, then close the underlying HTTP session"""
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            self._start_flush(key)
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_candles(self, symbol: str, timeframe: str, count: int) -> dict:
+        """
+        Fetch raw candle data for one symbol.
+
+        Calls made within `batch_window` of each other for the same
+        timeframe/count are grouped into requests of up to `batch_size`
+        symbols. Returns a payload of the form
+        {"status": True, "symbol": ..., "period": ..., "response": [...]}.
+
+        Raises:
+            FCSError: if the API could not deliver data for the symbol
+        """
+        if self.config.batch_size <= 1:
+            payloads = await self._fetch_batch([symbol], timeframe, count)
+            return payloads[symbol]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (timeframe, count)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = {}
+            self._timers[key] = loop.call_later(self.config.batch_window, self._start_flush, key)
+        pending.setdefault(symbol, []).append(future)
+        return await future
+
+    def _start_flush(self, key: Tuple[str, int]):
+        self._timers.pop(key, None)
+        task = asyncio.create_task(self._flush(key))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, key: Tuple[str, int]):
+        pending = self._pending.pop(key, {})
+        symbols = list(pending)
+        size = self.config.batch_size
+        chunks = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+        async def run_chunk(chunk: List[str]):
+            try:
+                payloads = await self._fetch_batch(chunk, *key)
+            except Exception as e:
+                for symbol in chunk:
+                    for future in pending[symbol]:
+                        if not future.done():
+                            future.set_exception(e)
+                return
+            for symbol in chunk:
+                for future in pending[symbol]:
+                    if future.done():
+                        continue
+                    if symbol in payloads:
+                        future.set_result(payloads[symbol])
+                    else:
+                        future.set_exception(FCSError(f"No data returned for {symbol}"))
+
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+
+    async def _fetch_batch(self, symbols: List[str], timeframe: str, count: int) -> Dict[str, dict]:
+        """Request candles for one or more symbols and split the response"""
+        params = {
+            "symbol": ",".join(symbols),
+            "period": fcs_period(timeframe),
+            "count": count,
+            "access_key": self.config.api_key,
+        }
+        data = await self._request("candles", params)
+
+        response = data.get("response")
+        if isinstance(response, dict):
+            # Multi-symbol shape: {"EURUSD": [...], "GBPUSD": [...]}
+            return {
+                symbol: {**data, "symbol": symbol, "response": rows}
+                for symbol, rows in response.items()
+                if symbol in symbols
+            }
+        if len(symbols) != 1:
+            raise FCSError(f"Unexpected single-symbol response for batch {symbols}")
+        return {symbols[0]: {**data, "symbol": data.get("symbol", symbols[0])}}
+
+    async def _request(self, path: str, params: dict) -> dict:
+        """GET `path` with rate limiting, retries and circuit breaking"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("FCS circuit breaker is open")
+
+        url = f"{self.config.base_url}/{path}"
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.config.max_retries + 1):
+            if attempt:
+                self.retries += 1
+            await self.bucket.acquire()
+            fatal: Optional[FCSError] = None
+            try:
+                self.requests_sent += 1
+                async with self._get_session().get(url, params=params) as response:
+                    if response.status in RETRYABLE_STATUSES:
+                        raise _RetryableStatus(response.status, response.headers.get("Retry-After"))
+                    if response.status != 200:
+                        # Client errors won't improve on retry
+                        fatal = FCSError(f"HTTP {response.status} from FCS: {await response.text()}")
+                    else:
+                        data = loads(await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, _RetryableStatus) as e:
+                last_error = e
+                if attempt < self.config.max_retries:
+                    delay = self._backoff(attempt)
+                    if isinstance(e, _RetryableStatus) and e.retry_after is not None:
+                        delay = e.retry_after
+                    logger.warning(f"FCS request failed ({e}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                continue
+
+            # The API answered, so the upstream is healthy
+            self.breaker.record_success()
+            if fatal is not None:
+                raise fatal
+            if not data.get("status"):
+                raise FCSError(f"FCS returned no data: {data.get('msg', data)}")
+            return data
+
+        self.breaker.record_failure()
+        raise FCSError(f"FCS request failed after {self.config.max_retries + 1} attempts: {last_error}")
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        cap = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def stats(self) -> dict:
+        """Return client counters"""
+        return {
+            'requests_sent': self.requests_sent,
+            'retries': self.retries,
+            'circuit_state': self.breaker.state,
+            'tokens_available': round(self.bucket.tokens, 2),
+        }
@@ -0,0 +1,149 @@
+"""
+HAMCODZ FCS Response Parser
+===========================
+Fast path from raw FCS candle payloads to columnar CandleArrays.
+
+The payload is decoded with orjson when it is installed (stdlib json
+otherwise). Rows are written column by column into one preallocated
+(6, n) float block, with no intermediate DataFrame. Ordering,
+duplicates and gaps are then checked with vectorized NumPy operations.
+"""
+
+import json
+import logging
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from candles import CandleArrays
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def loads(payload: Union[bytes, str]) -> Any:
+        """Decode JSON with orjson"""
+        return orjson.loads(payload)
+except ImportError:  # pragma: no cover - depends on the environment
+    def loads(payload: Union[bytes, str]) -> Any:
+        """Decode JSON with the standard library"""
+        return json.loads(payload)
+
+# FCS short keys, in CandleArrays field order
+FCS_KEYS = ('t', 'o', 'h', 'l', 'c', 'v')
+LONG_KEYS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class CandleFormatError(ValueError):
+    """Raised when a candle payload cannot be parsed"""
+
+
+def _rows(response: Any) -> list:
+    # FCS returns either a list of rows or an index-keyed object
+    if isinstance(response, dict):
+        return list(response.values())
+    if isinstance(response, list):
+        return response
+    raise CandleFormatError(f"Unexpected candle response type: {type(response).__name__}")
+
+
+def parse_candle_rows(response: Any) -> CandleArrays:
+    """
+    Convert FCS candle rows into CandleArrays.
+
+    Rows may be dicts with FCS short keys (t/o/h/l/c/v), long keys
+    (timestamp/open/...), or positional lists in that order. Timestamps
+    may be unix seconds or "YYYY-MM-DD HH:MM:SS" strings (the FCS 'tm' key).
+    """
+    rows = _rows(response)
+    n = len(rows)
+    block = np.empty((6, n))
+    if n == 0:
+        return CandleArrays(block[0].astype(np.int64), *block[1:])
+
+    first = rows[0]
+    try:
+        if isinstance(first, dict):
+            keys = FCS_KEYS if 'o' in first else LONG_KEYS
+            for i in range(1, 5):
+                block[i] = [row[keys[i]] for row in rows]
+            if keys[5] in first:
+                block[5] = [row.get(keys[5]) or 0.0 for row in rows]
+            else:
+                block[5] = 0.0
+            if keys[0] in first:
+                block[0] = [row[keys[0]] for row in rows]
+                timestamp = block[0].astype(np.int64)
+            else:
+                timestamp = np.array([row['tm'] for row in rows], dtype='datetime64[s]').astype(np.int64)
+        else:
+            width = len(first)
+            for i in range(min(width, 6)):
+                block[i] = [row[i] for row in rows]
+            if width < 6:
+                block[5] = 0.0
+            timestamp = block[0].astype(np.int64)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise CandleFormatError(f"Malformed candle rows: {e}") from e
+
+    return CandleArrays(timestamp, block[1], block[2], block[3], block[4], block[5])
+
+
+def normalize_order(candles: CandleArrays) -> CandleArrays:
+    """Sort ascending by timestamp and drop duplicate bars (keeping the last)"""
+    ts = candles.timestamp
+    if len(ts) < 2:
+        return candles
+    diffs = np.diff(ts)
+    if (diffs > 0).all():
+        return candles
+    if (diffs < 0).all():
+        return candles[::-1]  # newest-first payload
+
+    order = np.argsort(ts, kind='stable')
+    candles = candles[order]
+    ts = candles.timestamp
+    keep = np.concatenate((ts[1:] != ts[:-1], [True]))
+    dropped = len(ts) - int(keep.sum())
+    if dropped:
+        logger.warning(f"Dropped {dropped} duplicate candles")
+    return candles[keep]
+
+
+def find_gaps(timestamp: np.ndarray, period: int) -> np.ndarray:
+    """Indices i where bar i+1 does not immediately follow bar i"""
+    if len(timestamp) < 2:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.diff(timestamp) > period)
+
+
+def parse_fcs_payload(payload: Union[bytes, str, dict],
+                      period: Optional[int] = None) -> CandleArrays:
+    """
+    Parse a raw FCS candle payload into ordered CandleArrays.
+
+    Args:
+        payload: Raw response body, or an already decoded dict
+        period: Bar length in seconds; if given, gaps are counted and logged
+
+    Raises:
+        CandleFormatError: if the payload is not a usable candle response
+    """
+    data = payload if isinstance(payload, dict) else loads(payload)
+    if not isinstance(data, dict) or 'response' not in data:
+        raise CandleFormatError("Payload has no 'response' field")
+
+    candles = normalize_order(parse_candle_rows(data['response']))
+
+    bad = (candles.high < candles.low).sum()
+    if bad:
+        logger.warning(f"{bad} candles have high < low")
+
+    if period:
+        gaps = find_gaps(candles.timestamp, period)
+        if len(gaps):
+            # Weekend closures show up here too; only worth a debug line
+            logger.debug(f"{len(gaps)} gaps in {data.get('symbol', 'candles')}")
+
+    return candles
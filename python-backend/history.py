@@ -0,0 +1,180 @@
+"""
+HAMCODZ Signal History
+======================
+Bounded in-memory window of recent signals with older ones spilled to disk.
+
+The newest signals stay in memory, up to a count and an age. Signals that
+fall out of the window are appended to a JSON-lines spill file, so memory
+use stays flat however long the process runs. query() and iteration read
+both tiers. A sparse (timestamp, offset) index over the spill file lets
+time-range queries skip straight to the right part of the file.
+"""
+
+import os
+import json
+import logging
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Iterator, List, Optional, Tuple
+
+from signal_engine import Signal, SignalType, SignalStrength
+
+logger = logging.getLogger(__name__)
+
+# One sparse index entry per this many spilled signals
+INDEX_EVERY = 256
+
+
+def signal_to_dict(signal: Signal) -> dict:
+    """JSON-serialisable form of a Signal (all fields)"""
+    data = dict(signal.__dict__)
+    data['signal_type'] = signal.signal_type.value
+    data['strength'] = signal.strength.value
+    data['timestamp'] = signal.timestamp.isoformat()
+    return data
+
+
+def signal_from_dict(data: dict) -> Signal:
+    """Inverse of signal_to_dict()"""
+    data = dict(data)
+    data['signal_type'] = SignalType(data['signal_type'])
+    data['strength'] = SignalStrength(data['strength'])
+    data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+    return Signal(**data)
+
+
+class SignalHistory:
+    """
+    Signal list with a bounded hot window.
+
+    Args:
+        max_signals: Most signals kept in memory
+        max_age: Longest time a signal stays in memory (None = no age limit)
+        spill_path: JSON-lines file for older signals (None drops them)
+    """
+
+    def __init__(self,
+                 max_signals: int = 1000,
+                 max_age: Optional[timedelta] = None,
+                 spill_path: Optional[str] = None):
+        self.max_signals = max_signals
+        self.max_age = max_age
+        self.spill_path = spill_path
+
+        self._hot: Deque[Signal] = deque()
+        self._index: List[Tuple[datetime, int]] = []  # (timestamp, offset) every INDEX_EVERY lines
+        self.spilled = 0
+
+        if spill_path and os.path.exists(spill_path):
+            self._load_index()
+
+    def _load_index(self):
+        with open(self.spill_path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if self.spilled % INDEX_EVERY == 0:
+                    try:
+                        timestamp = datetime.fromisoformat(json.loads(line)['timestamp'])
+                    except (ValueError, KeyError):
+                        offset += len(line)
+                        continue  # torn line after a crash
+                    self._index.append((timestamp, offset))
+                self.spilled += 1
+                offset += len(line)
+        logger.info(f"Signal history: {self.spilled} signals on disk in {self.spill_path}")
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._hot)
+
+    def append(self, signal: Signal):
+        self._hot.append(signal)
+        self.evict()
+
+    def evict(self, now: Optional[datetime] = None):
+        """Spill signals beyond the count or age limit"""
+        overflow = []
+        while len(self._hot) > self.max_signals:
+            overflow.append(self._hot.popleft())
+        if self.max_age is not None:
+            cutoff = (now or datetime.utcnow()) - self.max_age
+            while self._hot and self._hot[0].timestamp < cutoff:
+                overflow.append(self._hot.popleft())
+        if overflow:
+            self._spill(overflow)
+
+    def _spill(self, signals: List[Signal]):
+        if not self.spill_path:
+            self.spilled += len(signals)
+            return
+        try:
+            with open(self.spill_path, 'ab') as f:
+                offset = f.tell()
+                for signal in signals:
+                    line = (json.dumps(signal_to_dict(signal)) + "\n").encode()
+                    if self.spilled % INDEX_EVERY == 0:
+                        self._index.append((signal.timestamp, offset))
+                    f.write(line)
+                    offset += len(line)
+                    self.spilled += 1
+        except OSError as e:
+            logger.error(f"Could not spill signal history to {self.spill_path}: {e}")
+
+    def _read_spill(self, since: Optional[datetime] = None) -> Iterator[Signal]:
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        start = 0
+        if since is not None and self._index:
+            # Last indexed position at or before `since`
+            position = bisect_right([ts for ts, _ in self._index], since) - 1
+            start = self._index[position][1] if position >= 0 else 0
+        with open(self.spill_path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                try:
+                    yield signal_from_dict(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def __iter__(self) -> Iterator[Signal]:
+        """All signals, oldest first (the spilled part is streamed from disk)"""
+        yield from self._read_spill()
+        yield from list(self._hot)
+
+    def recent(self, count: Optional[int] = None) -> List[Signal]:
+        """Newest in-memory signals, oldest first"""
+        hot = list(self._hot)
+        return hot if count is None else hot[-count:]
+
+    def query(self,
+              pair: Optional[str] = None,
+              since: Optional[datetime] = None,
+              until: Optional[datetime] = None,
+              limit: Optional[int] = None) -> List[Signal]:
+        """Signals matching pair and [since, until), across memory and disk, oldest first"""
+        def matches(signal: Signal) -> bool:
+            return ((pair is None or signal.pair == pair)
+                    and (since is None or signal.timestamp >= since)
+                    and (until is None or signal.timestamp < until))
+
+        # Only read the disk tier if the range reaches back past the hot window
+        sources = [list(self._hot)]
+        if self.spilled and (since is None or not self._hot or since < self._hot[0].timestamp):
+            sources.insert(0, self._read_spill(since))
+        result = []
+        for source in sources:
+            for signal in source:
+                if until is not None and signal.timestamp >= until:
+                    break
+                if matches(signal):
+                    result.append(signal)
+        return result[-limit:] if limit else result
+
+    def state(self) -> List[Signal]:
+        """In-memory signals (for checkpoints; spilled ones are already on disk)"""
+        return list(self._hot)
+
+    def load_state(self, signals: List[Signal]):
+        """Put checkpointed signals in front of the ones added since start"""
+        self._hot = deque(list(signals) + list(self._hot))
+        self.evict()
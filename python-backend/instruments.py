@@ -0,0 +1,201 @@
+"""
+HAMCODZ Instrument Registry
+===========================
+Instrument universe and per-pair settings loaded from instruments.json.
+
+Features:
+- One file describes every instrument: symbol, pip size, price digits,
+  timeframes, engine parameters and mock price ranges
+- Lookups (pip multiplier, digits, pairs per timeframe) are precomputed
+  on load rather than derived from the symbol on every call
+- Hot reload: the file's mtime is checked cheaply, and on change only the
+  instruments whose settings differ are reported to subscribers
+"""
+
+import os
+import json
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from timeframes import normalize_timeframe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instruments.json")
+
+
+@dataclass(frozen=True)
+class MockProfile:
+    """Price range and typical ATR used to generate mock candles"""
+    low: float
+    high: float
+    atr_pips: float
+
+
+@dataclass
+class Instrument:
+    """Settings for one tradable instrument"""
+    symbol: str
+    pip_size: float = 0.0001
+    digits: int = 5
+    timeframes: Tuple[str, ...] = ("1H",)
+    engine: Dict[str, float] = field(default_factory=dict)
+    mock: Optional[MockProfile] = None
+    cooldown_minutes: Dict[str, float] = field(default_factory=dict)  # per direction
+
+    @property
+    def pip_multiplier(self) -> int:
+        return int(round(1 / self.pip_size))
+
+    @property
+    def api_symbol(self) -> str:
+        return self.symbol.replace("/", "")
+
+    @classmethod
+    def from_dict(cls, data: dict, defaults: Optional[dict] = None) -> "Instrument":
+        merged = {**(defaults or {}), **data}
+        engine = {**(defaults or {}).get('engine', {}), **data.get('engine', {})}
+        mock = merged.get('mock')
+        cooldown = merged.get('cooldown_minutes', {})
+        if not isinstance(cooldown, dict):
+            cooldown = {'BUY': cooldown, 'SELL': cooldown}
+        return cls(
+            symbol=merged['symbol'],
+            pip_size=float(merged.get('pip_size', 0.0001)),
+            digits=int(merged.get('digits', 5)),
+            timeframes=tuple(normalize_timeframe(tf) for tf in merged.get('timeframes', ["1H"])),
+            engine={k: float(v) for k, v in engine.items()},
+            mock=MockProfile(float(mock['low']), float(mock['high']), float(mock['atr_pips'])) if mock else None,
+            cooldown_minutes={k.upper(): float(v) for k, v in cooldown.items()}
+        )
+
+
+class InstrumentRegistry:
+    """
+    Loads instruments.json and keeps precomputed lookup tables.
+
+    Args:
+        path: Config file (default: $INSTRUMENTS_FILE or instruments.json
+            next to this module)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("INSTRUMENTS_FILE") or DEFAULT_PATH
+        self.instruments: Dict[str, Instrument] = {}
+        self.symbols: List[str] = []
+        self.reloads = 0
+
+        self._mtime: Optional[float] = None
+        self._pip_multipliers: Dict[str, int] = {}
+        self._digits: Dict[str, int] = {}
+        self._by_timeframe: Dict[str, Set[str]] = {}
+        self._listeners: List[Callable[[Set[str]], None]] = []
+
+        self.reload_if_changed()
+        if not self.instruments:
+            raise ValueError(f"No instruments configured in {self.path}")
+
+    def _read(self) -> Dict[str, Instrument]:
+        with open(self.path) as f:
+            config = json.load(f)
+        defaults = config.get('defaults', {})
+        instruments = {}
+        for entry in config.get('instruments', []):
+            instrument = Instrument.from_dict(entry, defaults)
+            instruments[instrument.symbol] = instrument
+        return instruments
+
+    def _rebuild(self, instruments: Dict[str, Instrument]):
+        self.instruments = instruments
+        self.symbols = list(instruments)
+        self._pip_multipliers = {s: i.pip_multiplier for s, i in instruments.items()}
+        self._digits = {s: i.digits for s, i in instruments.items()}
+        by_timeframe: Dict[str, Set[str]] = {}
+        for symbol, instrument in instruments.items():
+            for timeframe in instrument.timeframes:
+                by_timeframe.setdefault(timeframe, set()).add(symbol)
+        self._by_timeframe = by_timeframe
+
+    def reload_if_changed(self) -> Set[str]:
+        """
+        Re-read the file if its mtime moved.
+
+        Returns the symbols that were added, removed or changed (empty if
+        nothing changed). A file that fails to parse is logged and the
+        previous configuration is kept.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if self._mtime is None:
+                raise
+            logger.error(f"Cannot stat {self.path}: {e}")
+            return set()
+        if mtime == self._mtime:
+            return set()
+
+        try:
+            fresh = self._read()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if self._mtime is None:
+                raise
+            logger.error(f"Ignoring invalid instrument config {self.path}: {e}")
+            self._mtime = mtime
+            return set()
+
+        first_load = self._mtime is None
+        self._mtime = mtime
+        changed = {s for s in set(fresh) | set(self.instruments)
+                   if fresh.get(s) != self.instruments.get(s)}
+        if not changed:
+            return set()
+
+        self._rebuild(fresh)
+        if first_load:
+            logger.info(f"Loaded {len(fresh)} instruments from {self.path}")
+            return changed
+
+        self.reloads += 1
+        logger.info(f"Instrument config reloaded: {len(changed)} changed ({', '.join(sorted(changed))})")
+        for listener in self._listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Instrument reload listener failed: {e}")
+        return changed
+
+    def subscribe(self, listener: Callable[[Set[str]], None]):
+        """Call `listener(changed_symbols)` after every reload"""
+        self._listeners.append(listener)
+
+    async def watch(self, interval: float = 5.0):
+        """Poll the file for changes until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        return self.instruments.get(symbol)
+
+    def pip_multiplier(self, symbol: str) -> Optional[int]:
+        return self._pip_multipliers.get(symbol)
+
+    def digits(self, symbol: str) -> Optional[int]:
+        return self._digits.get(symbol)
+
+    def engine_params(self, symbol: str) -> Dict[str, float]:
+        instrument = self.instruments.get(symbol)
+        return dict(instrument.engine) if instrument else {}
+
+    def cooldown(self, symbol: str, direction: str) -> Optional[float]:
+        """Configured signal cool-down in seconds for a pair/direction, if any"""
+        instrument = self.instruments.get(symbol)
+        minutes = instrument.cooldown_minutes.get(direction) if instrument else None
+        return minutes * 60 if minutes is not None else None
+
+    def pairs_for(self, timeframe: str, pairs: Optional[Iterable[str]] = None) -> List[str]:
+        """Configured instruments that trade `timeframe` (optionally limited to `pairs`)"""
+        allowed = self._by_timeframe.get(normalize_timeframe(timeframe), set())
+        return [p for p in (self.symbols if pairs is None else pairs) if p in allowed]
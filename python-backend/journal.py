@@ -0,0 +1,349 @@
+"""
+HAMCODZ Signal Journal
+======================
+Append-only JSON-lines journal of delivered signals and their outcomes.
+
+Features:
+- Appends one line per record, so a save is O(new records); there is no
+  rewrite of the whole history
+- Group commit: lines are flushed and fsynced once per batch of records
+  or per time window, not once per record
+- Rotation of the active segment by size and age
+- Compaction folds closed segments into one record per signal and writes
+  an offset index beside it, so a single signal is found with one seek
+- Safe next to other processes on the same directory: a writer holds a
+  lock on its active segment, and compaction only takes segments no
+  process holds (file locks are POSIX-only; elsewhere a process only
+  compacts segments it closed itself)
+- export_json() writes the legacy signals_history.json layout on demand
+"""
+
+import os
+import json
+import time
+import glob
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def signal_record(signal) -> dict:
+    """Journal/export representation of a Signal"""
+    return {
+        'id': signal.signal_id,
+        'pair': signal.pair,
+        'type': signal.signal_type.value,
+        'entry': signal.entry_price,
+        'tp1': signal.take_profit_1,
+        'tp2': signal.take_profit_2,
+        'sl': signal.stop_loss,
+        'strength': signal.strength.value,
+        'analysis': signal.analysis,
+        'timestamp': signal.timestamp.isoformat(),
+        'bar_time': signal.bar_time,
+        'status': 'ACTIVE',
+        'result': 'PENDING',
+        'pips': None,
+    }
+
+
+def event_record(event) -> dict:
+    """Journal representation of a lifecycle SignalEvent (a partial update)"""
+    return {
+        'id': event.signal_id,
+        'status': event.status,
+        'result': event.result,
+        'pips': event.pips,
+        'last_event': event.kind,
+        'closed': event.closed,
+    }
+
+
+class SignalJournal:
+    """
+    Segmented append-only journal.
+
+    Args:
+        directory: Where segments live
+        max_bytes: Rotate the active segment beyond this size
+        max_age: Rotate the active segment after this many seconds
+        fsync_every: Records per group commit
+        fsync_interval: Longest time records wait for a group commit
+        compact_after: Closed raw segments that trigger a compaction
+        read_only: Only read the journal (no appends, no compaction)
+    """
+
+    def __init__(self,
+                 directory: str = "journal",
+                 max_bytes: int = 16 * 1024 * 1024,
+                 max_age: float = 86400.0,
+                 fsync_every: int = 64,
+                 fsync_interval: float = 1.0,
+                 compact_after: int = 4,
+                 read_only: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self.read_only = read_only
+
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._path: Optional[str] = None  # active segment
+        self._opened_at = 0.0
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self._indexes: Dict[str, Dict[str, int]] = {}  # compacted segment -> {id: offset}
+        self._closed: Set[str] = set()  # segments this process wrote and closed
+
+        self.appended = 0
+        self.syncs = 0
+        self.compactions = 0
+
+        self._refresh_indexes()
+        # Segments left by earlier runs are closed; fold them in if enough piled up
+        if not read_only and len(self._raw_segments()) >= self.compact_after:
+            self.compact()
+
+    # Segment naming: journal-000001.jsonl (raw), compact-000001.jsonl (+ .idx)
+
+    def _raw_segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "journal-*.jsonl")))
+
+    def _compacted_segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "compact-*.jsonl")))
+
+    @staticmethod
+    def _index_path(segment: str) -> str:
+        return segment[:-len(".jsonl")] + ".idx"
+
+    @staticmethod
+    def _seq(path: str) -> int:
+        return int(os.path.basename(path).split("-")[1].split(".")[0])
+
+    def _refresh_indexes(self):
+        # Another process may have compacted since we last looked
+        compacted = self._compacted_segments()
+        for path in list(self._indexes):
+            if path not in compacted:
+                del self._indexes[path]
+        for path in compacted:
+            if path not in self._indexes:
+                with open(self._index_path(path)) as f:
+                    self._indexes[path] = json.load(f)
+
+    @contextmanager
+    def _directory_lock(self):
+        """Serialises segment creation and compaction across processes"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _open_segment(self):
+        with self._directory_lock():
+            existing = self._raw_segments() + self._compacted_segments()
+            seq = max((self._seq(p) for p in existing), default=0) + 1
+            while True:
+                path = os.path.join(self.directory, f"journal-{seq:06d}.jsonl")
+                try:
+                    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+                    break
+                except FileExistsError:
+                    seq += 1
+            if fcntl is not None:
+                # Held while the segment is active so no one compacts it
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        self._file = os.fdopen(fd, 'a')
+        self._path = path
+        self._opened_at = time.time()
+
+    def _close_segment(self):
+        self.flush()
+        self._closed.add(self._path)
+        self._file.close()
+        self._file = None
+        self._path = None
+
+    def _claim(self, path: str):
+        """Lock a raw segment for compaction; None if a writer still holds it"""
+        if fcntl is None:
+            return None
+        f = open(path)
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+        return f
+
+    def append(self, record: dict):
+        """Append one record; durable after the next group commit"""
+        if self.read_only:
+            raise RuntimeError("Journal was opened read-only")
+        if self._file is None:
+            self._open_segment()
+        self._file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self._unsynced += 1
+        self.appended += 1
+        if self._unsynced >= self.fsync_every or time.time() - self._last_sync >= self.fsync_interval:
+            self.flush()
+        if self._file.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age:
+            self.rotate()
+
+    def append_signal(self, signal):
+        self.append(signal_record(signal))
+
+    def append_event(self, event):
+        """Lifecycle listener"""
+        self.append(event_record(event))
+
+    def flush(self):
+        """Group commit: flush and fsync everything appended so far"""
+        if self._file is None or not self._unsynced:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self.syncs += 1
+
+    def rotate(self):
+        """Close the active segment; the next append starts a new one"""
+        if self._file is None:
+            return
+        self._close_segment()
+        # The active segment is never compacted, only closed ones
+        if len(self._raw_segments()) >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        """Fold closed raw segments into one indexed segment per signal"""
+        if self.read_only:
+            return
+        with self._directory_lock():
+            claimed = []
+            try:
+                raw = []
+                for path in self._raw_segments():
+                    if path == self._path:
+                        continue
+                    lock = self._claim(path)
+                    if lock is not None:
+                        claimed.append(lock)
+                    elif path not in self._closed:
+                        continue  # another process is still writing it
+                    raw.append(path)
+                if raw:
+                    self._compact(raw)
+            finally:
+                for lock in claimed:
+                    lock.close()
+
+    def _compact(self, raw: List[str]):
+        merged: Dict[str, dict] = {}
+        for path in raw:
+            for record in self._read_lines(path):
+                merged.setdefault(record['id'], {}).update(record)
+
+        target = os.path.join(self.directory, f"compact-{self._seq(raw[-1]):06d}.jsonl")
+        index: Dict[str, int] = {}
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, 'w') as f:
+            for signal_id, record in merged.items():
+                index[signal_id] = f.tell()
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with open(f"{tmp_path}.idx", 'w') as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{tmp_path}.idx", self._index_path(target))
+        os.replace(tmp_path, target)
+        for path in raw:
+            os.unlink(path)
+            self._closed.discard(path)
+
+        self._indexes[target] = index
+        self.compactions += 1
+        logger.info(f"Compacted {len(raw)} journal segments into {os.path.basename(target)} "
+                    f"({len(merged)} signals)")
+
+    @staticmethod
+    def _read_lines(path: str) -> Iterator[dict]:
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            return  # compacted away by another process meanwhile
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+
+    def get(self, signal_id: str) -> Optional[dict]:
+        """Latest state of one signal (index seeks for compacted history)"""
+        record: Dict = {}
+        self._refresh_indexes()
+        for path, index in sorted(self._indexes.items()):
+            offset = index.get(signal_id)
+            if offset is not None:
+                with open(path) as f:
+                    f.seek(offset)
+                    record.update(json.loads(f.readline()))
+        self.flush()
+        for path in self._raw_segments():
+            for entry in self._read_lines(path):
+                if entry.get('id') == signal_id:
+                    record.update(entry)
+        return record or None
+
+    def iter_signals(self) -> Iterator[dict]:
+        """Every signal's latest state, oldest first"""
+        self.flush()
+        merged: Dict[str, dict] = {}
+        for path in self._compacted_segments() + self._raw_segments():
+            for record in self._read_lines(path):
+                merged.setdefault(record['id'], {}).update(record)
+        return iter(merged.values())
+
+    def export_json(self, filepath: str = "signals_history.json") -> int:
+        """Write the full history as one JSON array (on demand only)"""
+        data = [r for r in self.iter_signals() if 'pair' in r]
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, filepath)
+        logger.info(f"Exported {len(data)} signals to {filepath}")
+        return len(data)
+
+    def close(self):
+        """Commit outstanding records and close the active segment"""
+        if self._file is not None:
+            self._close_segment()
+
+    def stats(self) -> dict:
+        """Return journal counters"""
+        return {
+            'appended': self.appended,
+            'syncs': self.syncs,
+            'compactions': self.compactions,
+            'segments': len(self._raw_segments()) + len(self._indexes),
+        }
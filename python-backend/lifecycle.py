@@ -0,0 +1,291 @@
+"""
+HAMCODZ Signal Lifecycle Tracker
+================================
+Follows delivered signals until they hit TP1, TP2 or SL.
+
+Every pair/direction keeps two sorted price-level indexes: one of stop
+losses and one of each open signal's next target. A new bar's high and
+low are located in them with a bisect, so resolving a bar costs
+O(log n + hits) instead of a scan of every open signal.
+
+Outcomes are emitted as SignalEvent objects to subscribers. Status and
+result values match the Signal model in prisma/schema.prisma.
+"""
+
+import time
+import uuid
+import logging
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Signal.status / Signal.result values (prisma/schema.prisma)
+STATUS_ACTIVE = "ACTIVE"
+STATUS_HIT_TP = "HIT_TP"
+STATUS_HIT_SL = "HIT_SL"
+STATUS_CLOSED = "CLOSED"
+RESULT_WIN = "WIN"
+RESULT_LOSS = "LOSS"
+RESULT_BREAKEVEN = "BE"  # expired exactly at entry
+RESULT_PENDING = "PENDING"
+
+
+@dataclass
+class TrackedSignal:
+    """An open signal and its progress"""
+    signal_id: str
+    signal: object
+    active_from: int  # first bar open time that counts for this signal
+    opened_at: float
+    status: str = STATUS_ACTIVE
+    result: str = RESULT_PENDING
+    pips: float = 0.0
+    tp1_hit: bool = False
+    closed_at: Optional[float] = None
+
+
+@dataclass
+class SignalEvent:
+    """A signal reached TP1, TP2, its stop, or expired"""
+    kind: str  # 'TP1', 'TP2', 'SL' or 'EXPIRED'
+    signal_id: str
+    pair: str
+    direction: str
+    price: float
+    pips: float
+    bar_time: int
+    status: str
+    result: str
+    closed: bool
+    signal: object = field(repr=False, default=None)
+
+
+class _LevelIndex:
+    """Price levels kept sorted, each tagged with a signal id"""
+
+    def __init__(self):
+        self.levels: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def add(self, level: float, signal_id: str):
+        index = bisect_right(self.levels, level)
+        self.levels.insert(index, level)
+        self.ids.insert(index, signal_id)
+
+    def remove(self, level: float, signal_id: str):
+        index = bisect_left(self.levels, level)
+        while index < len(self.levels) and self.levels[index] == level:
+            if self.ids[index] == signal_id:
+                del self.levels[index]
+                del self.ids[index]
+                return
+            index += 1
+
+    def at_or_below(self, price: float) -> List[str]:
+        return self.ids[:bisect_right(self.levels, price)]
+
+    def at_or_above(self, price: float) -> List[str]:
+        return self.ids[bisect_left(self.levels, price):]
+
+
+class LifecycleTracker:
+    """
+    Resolves open signals against incoming bars.
+
+    If a single bar reaches both the stop and a target, the stop is assumed
+    to have been hit first. After TP1 the signal stays open for TP2; a stop
+    hit after TP1 closes it, still as a win, with the TP1 pips.
+
+    Args:
+        pip_multiplier: pair -> pips per price unit
+        max_age: Seconds after which a still-open signal is closed (None = never)
+    """
+
+    def __init__(self,
+                 pip_multiplier: Optional[Callable[[str], int]] = None,
+                 max_age: Optional[float] = None):
+        self.pip_multiplier = pip_multiplier or (lambda pair: 10000)
+        self.max_age = max_age
+
+        self.open: Dict[str, TrackedSignal] = {}
+        self._stops: Dict[Tuple[str, str], _LevelIndex] = {}
+        self._targets: Dict[Tuple[str, str], _LevelIndex] = {}
+        self._last_bar: Dict[Tuple[str, str], int] = {}
+        self._last_close: Dict[str, float] = {}
+        self._listeners: List[Callable[[SignalEvent], None]] = []
+
+        self.resolved = 0
+
+    def subscribe(self, listener: Callable[[SignalEvent], None]):
+        """Call `listener(event)` for every outcome"""
+        self._listeners.append(listener)
+
+    def track(self, signal) -> str:
+        """Start following a delivered signal; returns its id"""
+        if signal.signal_id is None:
+            signal.signal_id = uuid.uuid4().hex
+        if signal.bar_time is not None:
+            active_from = signal.bar_time + 1
+        else:
+            active_from = int(signal.timestamp.timestamp())
+        tracked = TrackedSignal(signal.signal_id, signal, active_from, time.time())
+        self._insert(tracked)
+        return tracked.signal_id
+
+    def _insert(self, tracked: TrackedSignal):
+        signal = tracked.signal
+        key = (signal.pair, signal.signal_type.value)
+        self.open[tracked.signal_id] = tracked
+        self._stops.setdefault(key, _LevelIndex()).add(signal.stop_loss, tracked.signal_id)
+        self._targets.setdefault(key, _LevelIndex()).add(self._next_target(tracked), tracked.signal_id)
+
+    @staticmethod
+    def _next_target(tracked: TrackedSignal) -> float:
+        signal = tracked.signal
+        return signal.take_profit_2 if tracked.tp1_hit else signal.take_profit_1
+
+    def on_bars(self, pair: str, bars, timeframe: str = "") -> List[SignalEvent]:
+        """
+        Feed a pair's latest bars (CandleArrays). Bars older than the last
+        one seen for this pair/timeframe are skipped; the newest bar is
+        re-read each time since it may still be forming.
+        """
+        if not len(bars):
+            return []
+        key = (pair, timeframe)
+        last = self._last_bar.get(key)
+        self._last_bar[key] = int(bars.timestamp[-1])
+        self._last_close[pair] = float(bars.close[-1])
+        if not any(self._stops.get((pair, d)) for d in ("BUY", "SELL")):
+            return []
+
+        start = 0 if last is None else int(np.searchsorted(bars.timestamp, last))
+        events = []
+        for i in range(start, len(bars)):
+            events.extend(self._on_bar(pair, int(bars.timestamp[i]), float(bars.high[i]), float(bars.low[i])))
+        return events
+
+    def _on_bar(self, pair: str, ts: int, high: float, low: float) -> List[SignalEvent]:
+        events = []
+        for direction in ("BUY", "SELL"):
+            stops = self._stops.get((pair, direction))
+            if not stops:
+                continue
+            targets = self._targets[(pair, direction)]
+            if direction == "BUY":
+                stop_hits, target_hits = stops.at_or_above(low), targets.at_or_below(high)
+            else:
+                stop_hits, target_hits = stops.at_or_below(high), targets.at_or_above(low)
+
+            for signal_id in stop_hits:
+                tracked = self.open.get(signal_id)
+                if tracked and ts >= tracked.active_from:
+                    events.append(self._resolve(tracked, 'SL', tracked.signal.stop_loss, ts))
+
+            for signal_id in target_hits:
+                tracked = self.open.get(signal_id)
+                if not tracked or ts < tracked.active_from:
+                    continue
+                if not tracked.tp1_hit:
+                    events.append(self._resolve(tracked, 'TP1', tracked.signal.take_profit_1, ts))
+                    reached_tp2 = high >= tracked.signal.take_profit_2 if direction == "BUY" \
+                        else low <= tracked.signal.take_profit_2
+                    if not reached_tp2:
+                        continue
+                events.append(self._resolve(tracked, 'TP2', tracked.signal.take_profit_2, ts))
+
+        self._emit(events)
+        return events
+
+    def _emit(self, events: List[SignalEvent]):
+        for event in events:
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Lifecycle listener failed: {e}")
+
+    def _pips(self, signal, price: float) -> float:
+        move = price - signal.entry_price if signal.signal_type.value == "BUY" else signal.entry_price - price
+        return round(move * self.pip_multiplier(signal.pair), 1)
+
+    def _resolve(self, tracked: TrackedSignal, kind: str, price: float, ts: int) -> SignalEvent:
+        signal = tracked.signal
+        key = (signal.pair, signal.signal_type.value)
+        closed = True
+
+        if kind == 'TP1':
+            tracked.tp1_hit = True
+            tracked.status, tracked.result = STATUS_HIT_TP, RESULT_WIN
+            tracked.pips = self._pips(signal, price)
+            self._targets[key].remove(signal.take_profit_1, tracked.signal_id)
+            self._targets[key].add(signal.take_profit_2, tracked.signal_id)
+            closed = False
+        elif kind == 'TP2':
+            tracked.status, tracked.result = STATUS_HIT_TP, RESULT_WIN
+            tracked.pips = self._pips(signal, price)
+        elif kind == 'SL' and not tracked.tp1_hit:
+            tracked.status, tracked.result = STATUS_HIT_SL, RESULT_LOSS
+            tracked.pips = self._pips(signal, price)
+        elif kind == 'EXPIRED':
+            tracked.status = STATUS_CLOSED
+            if not tracked.tp1_hit:
+                tracked.pips = self._pips(signal, price)
+                if tracked.pips > 0:
+                    tracked.result = RESULT_WIN
+                elif tracked.pips < 0:
+                    tracked.result = RESULT_LOSS
+                else:
+                    tracked.result = RESULT_BREAKEVEN
+        # SL after TP1 keeps the TP1 win
+
+        if closed:
+            self._close(tracked)
+        logger.info(f"{signal.pair} {signal.signal_type.value} {kind} at {price} "
+                    f"({tracked.pips:+.1f} pips, {tracked.result})")
+        return SignalEvent(kind, tracked.signal_id, signal.pair, signal.signal_type.value, price,
+                           tracked.pips, ts, tracked.status, tracked.result, closed, signal)
+
+    def _close(self, tracked: TrackedSignal):
+        signal = tracked.signal
+        key = (signal.pair, signal.signal_type.value)
+        self._stops[key].remove(signal.stop_loss, tracked.signal_id)
+        self._targets[key].remove(self._next_target(tracked), tracked.signal_id)
+        tracked.closed_at = time.time()
+        del self.open[tracked.signal_id]
+        self.resolved += 1
+
+    def expire(self, now: Optional[float] = None) -> List[SignalEvent]:
+        """Close signals older than max_age at the pair's last known price"""
+        if self.max_age is None:
+            return []
+        now = time.time() if now is None else now
+        events = []
+        for tracked in [t for t in self.open.values() if now - t.opened_at > self.max_age]:
+            price = self._last_close.get(tracked.signal.pair, tracked.signal.entry_price)
+            events.append(self._resolve(tracked, 'EXPIRED', price, int(now)))
+        self._emit(events)
+        return events
+
+    def state(self) -> dict:
+        """Open signals and bar positions (for checkpoints)"""
+        return {'open': list(self.open.values()), 'last_bar': dict(self._last_bar)}
+
+    def load_state(self, state: dict):
+        """Restore signals saved by state()"""
+        for tracked in state['open']:
+            if tracked.signal_id not in self.open:
+                self._insert(tracked)
+        for key, ts in state['last_bar'].items():
+            self._last_bar.setdefault(key, ts)
+
+    def stats(self) -> dict:
+        """Return tracker counters"""
+        return {'open': len(self.open), 'resolved': self.resolved}
@@ -0,0 +1,135 @@
+"""
+HAMCODZ Logging Setup
+=====================
+Non-blocking logging for the runner.
+
+Features:
+- Loggers only put records on a queue; a background QueueListener thread
+  does the console and file I/O, so logging never blocks the event loop
+- Log file rotation by size, or by time (LOG_ROTATE_WHEN)
+- Optional JSON lines output with the pair, stage and duration fields
+  that call sites attach via `extra=`
+- Sampling of routine per-pair records (those with a `pair` field, below
+  WARNING) for runs with many instruments
+"""
+
+import os
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Record attributes passed through `extra=` that the JSON formatter emits
+STRUCTURED_FIELDS = ('pair', 'stage', 'duration')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class PairSampleFilter(logging.Filter):
+    """
+    Keeps a fraction of routine per-pair records.
+
+    Args:
+        rate: Fraction of records with a `pair` field kept (warnings and
+              errors are always kept)
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING or getattr(record, 'pair', None) is None:
+            return True
+        if random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+def setup_logging(level: int = logging.INFO,
+                  log_file: Optional[str] = "signals.log",
+                  max_bytes: int = 10 * 1024 * 1024,
+                  backups: int = 5,
+                  rotate_when: Optional[str] = None,
+                  json_format: bool = False,
+                  pair_sample_rate: float = 1.0) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Args:
+        level: Root log level
+        log_file: Log file (None logs to the console only)
+        max_bytes: Rotate the file beyond this size
+        backups: Rotated files kept
+        rotate_when: Rotate by time instead, e.g. 'midnight' or 'H'
+        json_format: Write JSON lines instead of text
+        pair_sample_rate: Fraction of routine per-pair records kept
+
+    Returns:
+        The started listener (stopped and flushed at interpreter exit)
+    """
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        if rotate_when:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(
+                log_file, when=rotate_when, backupCount=backups, utc=True))
+        else:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backups))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(PairSampleFilter(pair_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def setup_logging_from_env() -> logging.handlers.QueueListener:
+    """setup_logging() configured from LOG_* environment variables"""
+    return setup_logging(
+        level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO),
+        log_file=os.getenv("LOG_FILE", "signals.log") or None,
+        max_bytes=int(float(os.getenv("LOG_MAX_MB", "10")) * 1024 * 1024),
+        backups=int(os.getenv("LOG_BACKUPS", "5")),
+        rotate_when=os.getenv("LOG_ROTATE_WHEN") or None,
+        json_format=os.getenv("LOG_FORMAT", "text").lower() == "json",
+        pair_sample_rate=float(os.getenv("LOG_PAIR_SAMPLE_RATE", "1.0")),
+    )
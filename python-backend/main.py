@@ -5,12 +5,18 @@ Main script to run signal generation and delivery.
 
 Usage:
     python main.py                    # Run once
-    python main.py --schedule         # Run on schedule (every hour)
+    python main.py --schedule         # Run at every candle close (hourly)
     python main.py --test             # Test mode (no actual sending)
+    python main.py --stream tcp://127.0.0.1:9100   # Bars from a tick stream
+    python main.py --shards 4 --schedule           # Split instruments over 4 workers
+    python main.py --shard-index 0 --shard-count 2 --schedule   # One of 2 hosts
+    python main.py --report daily    # Send the daily performance summary
+    python main.py --export          # Export journaled history to signals_history.json
 """
 
 import os
 import sys
+import time
 import asyncio
 import argparse
 import logging
@@ -21,33 +27,45 @@ import json
 # Local imports
 from signal_engine import SignalEngine, Signal, SignalType
 from telegram_bot import SignalSender
+from singleflight import SingleFlightCache
+from fcs_client import FCSClient, FCSClientConfig, FCSError
+from timeframes import TIMEFRAME_SECONDS, normalize_timeframe, next_bar_close, bar_open_time, timeframe_seconds
+from candles import CandleArrays
+from resampler import MultiTimeframeResampler, session_offset
+from tick_stream import StreamingSignalRunner
+from fcs_parser import parse_fcs_payload
+from scheduler import CandleCloseScheduler, Schedule
+from pipeline import SignalPipeline
+from analysis_pool import AnalysisPool
+from sharding import ShardCoordinator, ShardWorkerClient, static_shard
+from instruments import InstrumentRegistry
+from checkpoint import Checkpointer, worker_states
+from dedup import DedupIndex
+from lifecycle import LifecycleTracker, SignalEvent
+from performance import PerformanceStats
+from journal import SignalJournal
+from signal_store import SignalStore
+from archive import ColumnarArchive, HAVE_PYARROW
+from history import SignalHistory
+from db_sync import SignalSync, sink_for
+from fanout import FanoutDispatcher, Route, load_routes
+from templates import TemplateSet
+from digest import SignalDigest
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('signals.log')
-    ]
-)
+from log_setup import setup_logging_from_env
+
+# Configure logging (queued to a background thread, see log_setup.py)
+setup_logging_from_env()
 logger = logging.getLogger(__name__)
 
 
 # Configuration
-FOREX_PAIRS = [
-    "EUR/USD",
-    "GBP/USD", 
-    "USD/JPY",
-    "AUD/USD",
-    "USD/CAD",
-    "EUR/GBP",
-    "GBP/JPY",
-    "XAU/USD"  # Gold
-]
+# Instruments (pip sizes, timeframes, engine settings) live in instruments.json
+
+# Longest base-timeframe history requested when deriving higher timeframes
+MAX_BASE_CANDLES = 5000
 
-# API Configuration (using free APIs)
-FCS_API_URL = "https://fcsapi.com/api/forex"
+# API Configuration (using free APIs; FCS settings live in fcs_client.py)
 EXCHANGERATE_API_URL = "https://api.exchangerate-api.com/v4/latest"
 
 
@@ -57,48 +75,156 @@ class ForexDataProvider:
     Supports multiple data sources for redundancy.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 cache_ttl: Optional[float] = None,
+                 allow_mock_fallback: Optional[bool] = None,
+                 instruments: Optional[InstrumentRegistry] = None):
         self.api_key = api_key or os.getenv("FCS_API_KEY", "")
+        self.instruments = instruments
         self.use_mock = not self.api_key  # Use mock data if no API key
+        
+        # With an API key, errors are raised rather than silently replaced
+        # by mock candles unless the fallback is explicitly enabled
+        if allow_mock_fallback is None:
+            allow_mock_fallback = os.getenv("FCS_ALLOW_MOCK_FALLBACK", "").lower() in ("1", "true", "yes")
+        self.allow_mock_fallback = allow_mock_fallback
+        self.client = None if self.use_mock else FCSClient(FCSClientConfig.from_env(self.api_key))
+        
+        # Identical concurrent requests share one API call; results are
+        # reused for a short while but never past the next candle close
+        if cache_ttl is None:
+            cache_ttl = float(os.getenv("CANDLE_CACHE_TTL", "30"))
+        self.cache = SingleFlightCache(ttl=cache_ttl)
+        
+        # Higher timeframes are aggregated locally from the finest one
+        self.resamplers: dict = {}
     
     async def fetch_candles(self, pair: str, timeframe: str = "1H", count: int = 100) -> Optional[dict]:
         """
         Fetch candlestick data for a pair.
         
-        For free tier, we'll use mock data that simulates real market conditions.
-        In production, you'd replace this with actual API calls.
+        Concurrent calls with the same (pair, timeframe, count) are coalesced
+        into one request. The returned dict may be shared between callers
+        and must not be mutated.
         """
-        import aiohttp
-        import numpy as np
-        import pandas as pd
+        timeframe = normalize_timeframe(timeframe)
+        key = (pair, timeframe, count)
+        return await self.cache.get(
+            key,
+            lambda: self._fetch_candles_uncached(pair, timeframe, count),
+            # D1/W1 bars close at the FX session rollover, as in the resampler
+            expires_at=next_bar_close(time.time(), timeframe, session_offset(timeframe))
+        )
+    
+    async def _fetch_candles_uncached(self, pair: str, timeframe: str, count: int) -> Optional[dict]:
+        """
+        Fetch candlestick data for a pair, bypassing the cache.
         
+        Without an API key, mock data that simulates real market conditions
+        is used. With a key, FCS errors propagate as FCSError unless the
+        mock fallback is enabled.
+        """
         if self.use_mock:
-            return self._generate_mock_candles(pair, count)
+            return self._generate_mock_candles(pair, count, timeframe)
         
         try:
-            # FCS API call (requires free API key)
-            async with aiohttp.ClientSession() as session:
-                url = f"{FCS_API_URL}/candles"
-                params = {
-                    "symbol": pair.replace("/", ""),
-                    "period": timeframe,
-                    "access_key": self.api_key
-                }
-                
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
-                    
-                    if data.get("status"):
-                        return self._parse_fcs_response(data)
-                    else:
-                        logger.warning(f"API returned no data for {pair}, using mock")
-                        return self._generate_mock_candles(pair, count)
-                        
-        except Exception as e:
-            logger.error(f"Error fetching data for {pair}: {e}")
-            return self._generate_mock_candles(pair, count)
-    
-    def _generate_mock_candles(self, pair: str, count: int = 100) -> dict:
+            instrument = self.instruments.get(pair) if self.instruments else None
+            symbol = instrument.api_symbol if instrument else pair.replace("/", "")
+            data = await self.client.fetch_candles(symbol, timeframe, count)
+        except FCSError as e:
+            if not self.allow_mock_fallback:
+                raise
+            logger.warning(f"FCS fetch failed for {pair} ({e}), using mock data")
+            return self._generate_mock_candles(pair, count, timeframe)
+        
+        return self._parse_fcs_response(data, timeframe)
+    
+    async def fetch_timeframes(self,
+                               pair: str,
+                               timeframes: List[str],
+                               count: int = 100) -> dict:
+        """
+        Fetch several timeframes for a pair with a single API request.
+        
+        The finest timeframe is fetched and the others are resampled from
+        it locally, aligned to the forex session. Aggregates are cached, so
+        each cycle only rebuilds the still-open higher-timeframe bars.
+        
+        Returns:
+            Mapping of timeframe -> data dict in the fetch_candles format
+        """
+        timeframes = [normalize_timeframe(tf) for tf in timeframes]
+        base_tf = min(timeframes, key=timeframe_seconds)
+        ratio = max(timeframe_seconds(tf) for tf in timeframes) // timeframe_seconds(base_tf)
+        base_count = min(count * ratio, MAX_BASE_CANDLES)
+        
+        resampler = self.resamplers.get(base_tf)
+        if resampler is None:
+            resampler = self.resamplers[base_tf] = MultiTimeframeResampler(base_tf, max_bars=count)
+        
+        # Warm aggregates (built earlier or restored from a checkpoint) only
+        # need the base bars since their last update, not the long history
+        last_update = resampler.last_update(pair, timeframes)
+        if last_update is not None:
+            behind = int((time.time() - last_update) // timeframe_seconds(base_tf)) + 1
+            if behind < count:
+                base_count = count
+        
+        data = await self.fetch_candles(pair, base_tf, base_count)
+        if not data or 'candles' not in data:
+            return {}
+        
+        base = data['arrays']
+        frames = resampler.update(pair, base, timeframes)
+        
+        result = {}
+        for tf in timeframes:
+            candles = data['candles'] if tf == base_tf else frames[tf].to_frame()
+            result[tf] = {**data, 'timeframe': tf, 'candles': candles.tail(count), 'arrays': frames[tf][-count:]}
+        return result
+    
+    async def prefetch(self, pairs: List[str], timeframe: str = "1H", count: int = 100):
+        """
+        Fetch many pairs concurrently to warm the cache.
+        
+        Concurrent requests are rate limited and, if FCS_BATCH_SIZE > 1,
+        grouped into multi-symbol requests. Failures are logged here and
+        raised again when the pair itself is fetched.
+        """
+        results = await asyncio.gather(
+            *(self.fetch_candles(pair, timeframe, count) for pair in pairs),
+            return_exceptions=True
+        )
+        for pair, result in zip(pairs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Prefetch failed for {pair}: {result}")
+    
+    def state(self) -> dict:
+        """Resampled aggregates per base timeframe (for checkpoints)"""
+        return {base_tf: (resampler.max_bars, resampler.state())
+                for base_tf, resampler in self.resamplers.items()}
+    
+    def load_state(self, state: dict):
+        """Restore aggregates saved by state()"""
+        for base_tf, (max_bars, saved) in state.items():
+            resampler = self.resamplers.get(base_tf)
+            if resampler is None:
+                resampler = self.resamplers[base_tf] = MultiTimeframeResampler(base_tf, max_bars=max_bars)
+            resampler.load_state(saved)
+    
+    def forget(self, pair: str):
+        """Drop cached candles and aggregates for a pair"""
+        self.cache.invalidate_matching(lambda key: key[0] == pair)
+        for resampler in self.resamplers.values():
+            resampler.forget(pair)
+    
+    async def close(self):
+        """Release the API client's HTTP session"""
+        if self.client:
+            await self.client.close()
+    
+    def _generate_mock_candles(self, pair: str, count: int = 100, timeframe: str = "1H") -> dict:
         """
         Generate realistic mock candlestick data.
         Uses actual price ranges for each pair with proper ATR.
@@ -106,21 +232,13 @@ class ForexDataProvider:
         import numpy as np
         import pandas as pd
         
-        # Realistic price ranges and ATR values for each pair
-        # Format: (low, high, typical_atr_in_pips, pip_value)
-        pair_configs = {
-            "EUR/USD": (1.0800, 1.1000, 15, 0.0001),   # 15 pips ATR
-            "GBP/USD": (1.2500, 1.2800, 20, 0.0001),   # 20 pips ATR
-            "USD/JPY": (148.00, 152.00, 15, 0.01),     # 15 pips ATR
-            "AUD/USD": (0.6400, 0.6700, 12, 0.0001),   # 12 pips ATR
-            "USD/CAD": (1.3500, 1.3800, 15, 0.0001),   # 15 pips ATR
-            "EUR/GBP": (0.8550, 0.8750, 10, 0.0001),   # 10 pips ATR
-            "GBP/JPY": (186.00, 194.00, 25, 0.01),     # 25 pips ATR
-            "XAU/USD": (2300.00, 2400.00, 150, 0.1)    # 150 pips (1500 points) ATR
-        }
-        
-        config = pair_configs.get(pair, (1.0000, 2.0000, 10, 0.0001))
-        low, high, atr_pips, pip_value = config
+        # Realistic price range and ATR for the pair (see instruments.json)
+        instrument = self.instruments.get(pair) if self.instruments else None
+        if instrument and instrument.mock:
+            low, high, atr_pips = instrument.mock.low, instrument.mock.high, instrument.mock.atr_pips
+            pip_value = instrument.pip_size
+        else:
+            low, high, atr_pips, pip_value = 1.0000, 2.0000, 10, 0.0001
         atr = atr_pips * pip_value  # Convert ATR to price units
         
         # Generate base price movement
@@ -149,29 +267,34 @@ class ForexDataProvider:
         candles['high'] = candles[['high', 'open', 'close']].max(axis=1)
         candles['low'] = candles[['low', 'open', 'close']].min(axis=1)
         
+        # Bar open times, ending with the currently forming bar
+        period = timeframe_seconds(timeframe)
+        last_open = int(bar_open_time(time.time(), timeframe))
+        candles.insert(0, 'timestamp', last_open - period * np.arange(count - 1, -1, -1))
+        candles['volume'] = 0.0
+        
         return {
             'pair': pair,
-            'timeframe': '1H',
+            'timeframe': timeframe,
             'candles': candles,
+            'arrays': CandleArrays.from_frame(candles),
             'last_update': datetime.now().isoformat()
         }
     
-    def _parse_fcs_response(self, data: dict) -> dict:
-        """Parse FCS API response into standard format"""
-        import pandas as pd
-        
-        candles_data = data.get("response", [])
-        
-        df = pd.DataFrame(candles_data)
-        df.columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    def _parse_fcs_response(self, data: dict, timeframe: str = "1H") -> dict:
+        """
+        Parse FCS API response into standard format.
         
-        for col in ['open', 'high', 'low', 'close']:
-            df[col] = pd.to_numeric(df[col])
+        Rows go straight into NumPy columns (see fcs_parser); the DataFrame
+        the engine consumes is built once from those columns.
+        """
+        arrays = parse_fcs_payload(data, timeframe_seconds(timeframe))
         
         return {
             'pair': data.get("symbol", "UNKNOWN"),
-            'timeframe': data.get("period", "1H"),
-            'candles': df,
+            'timeframe': data.get("period", timeframe),
+            'candles': arrays.to_frame(),
+            'arrays': arrays,
             'last_update': datetime.utcnow().isoformat()
         }
 
@@ -184,60 +307,265 @@ class SignalManager:
     def __init__(self, 
                  telegram_token: Optional[str] = None,
                  telegram_channel: Optional[str] = None,
-                 api_key: Optional[str] = None):
+                 api_key: Optional[str] = None,
+                 analysis_workers: Optional[int] = None,
+                 pairs: Optional[List[str]] = None,
+                 instruments: Optional[InstrumentRegistry] = None,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_read_only: bool = False,
+                 dedup_path: Optional[str] = None,
+                 journal_dir: Optional[str] = None,
+                 journal_read_only: bool = False,
+                 store_path: Optional[str] = None,
+                 history_path: Optional[str] = None,
+                 sync_outbox: Optional[str] = None,
+                 fanout_pending: Optional[str] = None):
+        
+        # Instrument settings, re-read between cycles when the file changes
+        self.instruments = instruments or InstrumentRegistry()
+        self.instruments.subscribe(self._on_instruments_changed)
         
-        self.engine = SignalEngine()
-        self.data_provider = ForexDataProvider(api_key)
+        # Instruments this manager is responsible for (a shard in worker mode);
+        # without an explicit list it follows the config file
+        self._follow_instruments = pairs is None
+        self.pairs: List[str] = list(self.instruments.symbols if pairs is None else pairs)
+        
+        self.engine = SignalEngine(instruments=self.instruments)
+        self.engines: dict = {}  # pair -> SignalEngine with per-instrument settings
+        self.data_provider = ForexDataProvider(api_key, instruments=self.instruments)
+        
+        # Optional process pool so CPU-bound analysis leaves the event loop free
+        if analysis_workers is None:
+            analysis_workers = int(os.getenv("ANALYSIS_WORKERS", "0"))
+        self.analysis_pool = None
+        if analysis_workers > 0:
+            self.analysis_pool = AnalysisPool(analysis_workers, engine_kwargs={
+                'risk_reward_ratio': self.engine.risk_reward_ratio,
+                'min_rr': self.engine.min_rr
+            })
+        
+        # Message templates compiled per instrument, rendered once per signal and variant
+        self.templates = TemplateSet(self.engine.get_pip_multiplier, self.instruments.digits)
         
         # Telegram integration
         self.telegram = None
+        self.fanout = None
         if telegram_token and telegram_channel:
             self.telegram = SignalSender(telegram_token, telegram_channel)
+            # Destinations per tier (FANOUT_ROUTES); by default just the channel
+            routes_path = os.getenv("FANOUT_ROUTES", "")
+            routes = load_routes(routes_path) if routes_path else [Route(telegram_channel)]
+            self.fanout = FanoutDispatcher(
+                self.telegram.queue.send,
+                routes,
+                render=self.render_signal,
+                max_concurrency=int(os.getenv("FANOUT_CONCURRENCY", "32")),
+                # Delayed (free tier) sends outlive the process here (empty path disables)
+                pending_path=(os.getenv("FANOUT_PENDING_FILE", "fanout_pending.json")
+                              if fanout_pending is None else fanout_pending) or None
+            )
         
-        # In-memory signal storage (use database in production)
-        self.signals: List[Signal] = []
+        # Recent signals in memory, older ones spilled to disk (empty path drops them)
+        if history_path is None:
+            history_path = os.getenv("SIGNAL_HISTORY_FILE", "signals_spill.jsonl")
+        max_hours = float(os.getenv("SIGNAL_HISTORY_MAX_HOURS", "168"))
+        self.signals = SignalHistory(
+            max_signals=int(os.getenv("SIGNAL_HISTORY_MAX", "1000")),
+            max_age=timedelta(hours=max_hours) if max_hours > 0 else None,
+            spill_path=history_path or None
+        )
         self.last_signal_time: Optional[datetime] = None
+        self.last_bars: dict = {}  # (pair, timeframe) -> open time of the last analysed bar
+        
+        # Idempotency index: the same signal is never sent twice, and a
+        # pair/direction stays quiet for its cool-down after firing
+        if dedup_path is None:
+            dedup_path = os.getenv("DEDUP_FILE", "signal_index.jsonl")
+        self.dedup = DedupIndex(
+            path=dedup_path or None,
+            cooldown=float(os.getenv("DEDUP_COOLDOWN_MINUTES", "240")) * 60,
+            cooldown_for=self.instruments.cooldown,
+            pip_multiplier=self.engine.get_pip_multiplier
+        )
+        
+        # Digest mode: signals of a cycle (or window) go out together, not one message each
+        self.digest_mode = os.getenv("DIGEST_MODE", "off").lower()
+        if self.digest_mode not in ("off", "cycle", "window"):
+            raise ValueError(f"DIGEST_MODE must be off, cycle or window, not {self.digest_mode!r}")
+        self.digest = None
+        if self.digest_mode != "off":
+            # Cycle digests go out when the cycle ends, never part-way through
+            window = float(os.getenv("DIGEST_WINDOW", "30"))
+            self.digest = SignalDigest(self.send_digest, window=window if self.digest_mode == "window" else None,
+                                       retry_delay=window, on_dropped=self.dedup.release)
+        self.scheduler: Optional[CandleCloseScheduler] = None
+        
+        # Follows delivered signals to TP1/TP2/SL using each new bar
+        max_age_hours = float(os.getenv("SIGNAL_MAX_AGE_HOURS", "72"))
+        self.lifecycle = LifecycleTracker(pip_multiplier=self.engine.get_pip_multiplier,
+                                          max_age=max_age_hours * 3600 if max_age_hours > 0 else None)
+        self.lifecycle.subscribe(self._on_signal_event)
+        
+        # Win/loss/pip counters for the daily and weekly reports
+        self.performance = PerformanceStats()
+        self.lifecycle.subscribe(self.performance.on_event)
+        
+        # Append-only record of delivered signals and outcomes (empty dir disables)
+        if journal_dir is None:
+            journal_dir = os.getenv("JOURNAL_DIR", "journal")
+        self.journal = None
+        if journal_dir:
+            self.journal = SignalJournal(
+                journal_dir,
+                max_bytes=int(os.getenv("JOURNAL_MAX_MB", "16")) * 1024 * 1024,
+                fsync_every=int(os.getenv("JOURNAL_FSYNC_EVERY", "64")),
+                read_only=journal_read_only
+            )
+            if not journal_read_only:
+                self.lifecycle.subscribe(self.journal.append_event)
+        
+        # Queryable SQLite copy of signals and outcomes (empty path disables);
+        # shard workers share one database file, WAL handles the concurrency
+        if store_path is None:
+            store_path = os.getenv("SIGNAL_DB", "signals.db")
+        self.store = None
+        if store_path:
+            self.store = SignalStore(store_path)
+            self.lifecycle.subscribe(self.store.update_outcome)
+        
+        # Bulk sync to the web platform's database through a local outbox
+        # (disabled unless SIGNAL_SYNC_URL is set)
+        sync_url = os.getenv("SIGNAL_SYNC_URL", "")
+        self.sync = None
+        if sync_url:
+            self.sync = SignalSync(
+                sink_for(sync_url),
+                outbox_path=sync_outbox or os.getenv("SIGNAL_SYNC_OUTBOX", "sync_outbox.db"),
+                batch_size=int(os.getenv("SIGNAL_SYNC_BATCH", "1000")),
+                interval=float(os.getenv("SIGNAL_SYNC_INTERVAL", "5"))
+            )
+            self.lifecycle.subscribe(self.sync.enqueue_event)
+        
+        # Parquet archive of closed candles and generated signals for research
+        # (disabled unless ARCHIVE_DIR is set; needs pyarrow)
+        archive_dir = os.getenv("ARCHIVE_DIR", "")
+        self.archive = None
+        if archive_dir and HAVE_PYARROW:
+            self.archive = ColumnarArchive(archive_dir)
+        elif archive_dir:
+            logger.warning("ARCHIVE_DIR is set but pyarrow is not installed; archive disabled")
+        
+        # Periodic checkpoints so a restart resumes warm (empty path disables)
+        if checkpoint_path is None:
+            checkpoint_path = os.getenv("CHECKPOINT_FILE", "runner_state.ckpt")
+        self.checkpoint = None
+        if checkpoint_path:
+            self.checkpoint = Checkpointer(checkpoint_path, float(os.getenv("CHECKPOINT_INTERVAL", "300")),
+                                           read_only=checkpoint_read_only)
+            self.checkpoint.register('manager', self._checkpoint_state, self._restore_checkpoint)
+            self.checkpoint.register('resamplers', self.data_provider.state, self.data_provider.load_state)
+            self.checkpoint.register('dedup', self.dedup.state, self.dedup.load_state)
+            self.checkpoint.register('lifecycle', self.lifecycle.state, self.lifecycle.load_state)
+            self.checkpoint.register('performance', self.performance.state, self.performance.load_state)
+            if self.archive:
+                self.checkpoint.register('archive', self.archive.state, self.archive.load_state)
+        
+        # fetch -> analyze -> deliver, each stage with its own workers
+        self.pipeline = SignalPipeline(
+            fetch=self.data_provider.fetch_candles,
+            analyze=self.analyze_data,
+            deliver=self._deliver,
+            admit=self.dedup.admit,
+            fetch_timeframes=self.data_provider.fetch_timeframes,
+            fetch_workers=int(os.getenv("PIPELINE_FETCH_WORKERS", "4")),
+            analyze_workers=analysis_workers or int(os.getenv("PIPELINE_ANALYZE_WORKERS", "1")),
+            deliver_workers=int(os.getenv("PIPELINE_DELIVER_WORKERS", "1")),
+            queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+        )
     
-    async def analyze_pair(self, pair: str) -> Optional[Signal]:
+    async def analyze_pair(self, pair: str, timeframe: str = "1H") -> Optional[Signal]:
         """
         Analyze a single pair and generate signal if conditions are met.
         """
-        logger.info(f"Analyzing {pair}...")
-        
         # Fetch candle data
-        data = await self.data_provider.fetch_candles(pair)
+        data = await self.data_provider.fetch_candles(pair, timeframe)
         
         if not data or 'candles' not in data:
             logger.warning(f"No data available for {pair}")
             return None
         
-        candles = data['candles']
+        return await self.analyze_data(pair, data)
+    
+    async def analyze_data(self, pair: str, data: dict) -> Optional[Signal]:
+        """
+        Run the engine on already fetched candle data.
+        """
+        logger.info(f"Analyzing {pair}...", extra={'pair': pair, 'stage': 'analyze'})
+        started = time.perf_counter()
         
-        # Generate signal
-        signal = self.engine.analyze(pair, candles)
+        bar_time = None
+        if 'arrays' in data and len(data['arrays']):
+            bar_time = int(data['arrays'].timestamp[-1])
+            self.last_bars[(pair, data.get('timeframe'))] = bar_time
+            self.lifecycle.on_bars(pair, data['arrays'], data.get('timeframe', ''))
+            if self.archive:
+                self.archive.add_candles(pair, data.get('timeframe', '1H'), data['arrays'])
         
+        if self.analysis_pool and 'arrays' in data:
+            signal = await self.analysis_pool.analyze(pair, data['arrays'],
+                                                      self.instruments.engine_params(pair))
+        else:
+            signal = self.engine_for(pair).analyze(pair, data['candles'])
+        
+        if signal:
+            signal.bar_time = bar_time
+            signal.timeframe = data.get('timeframe')
+            if self.archive:
+                self.archive.add_signal(signal)
+        
+        duration = round((time.perf_counter() - started) * 1000, 1)
+        log_fields = {'pair': pair, 'stage': 'analyze', 'duration': duration}
         if signal:
-            logger.info(f"Signal generated for {pair}: {signal.signal_type.value}")
+            logger.info(f"Signal generated for {pair}: {signal.signal_type.value} ({duration} ms)",
+                        extra=log_fields)
         else:
-            logger.info(f"No signal for {pair}")
+            logger.info(f"No signal for {pair} ({duration} ms)", extra=log_fields)
         
         return signal
     
-    async def analyze_all_pairs(self) -> List[Signal]:
+    def engine_for(self, pair: str) -> SignalEngine:
+        """Engine configured with the pair's own parameters"""
+        engine = self.engines.get(pair)
+        if engine is None:
+            params = self.instruments.engine_params(pair)
+            engine = SignalEngine(instruments=self.instruments, **params) if params else self.engine
+            self.engines[pair] = engine
+        return engine
+    
+    def _on_instruments_changed(self, changed):
+        """Rebuild state only for instruments whose settings changed"""
+        for pair in changed:
+            self.engines.pop(pair, None)
+            self.data_provider.forget(pair)
+        self.templates.invalidate(changed)
+        if self._follow_instruments:
+            self.pairs = list(self.instruments.symbols)
+        else:
+            self.pairs = [p for p in self.pairs if self.instruments.get(p)]
+    
+    async def analyze_all_pairs(self,
+                                pairs: Optional[List[str]] = None,
+                                timeframe: str = "1H") -> List[Signal]:
         """
-        Analyze all configured pairs and return any signals found.
+        Analyze the given pairs (default: all configured) and return any signals found.
         """
-        signals = []
-        
-        for pair in FOREX_PAIRS:
-            try:
-                signal = await self.analyze_pair(pair)
-                if signal:
-                    signals.append(signal)
-            except Exception as e:
-                logger.error(f"Error analyzing {pair}: {e}")
-        
-        return signals
+        pairs = self.pairs if pairs is None else pairs
+        return await self.pipeline.run_cycle(pairs, timeframe, send=False)
+    
+    def _on_signal_event(self, event: SignalEvent):
+        """Outcome of a tracked signal (TP1/TP2/SL/EXPIRED)"""
+        logger.info(f"Signal {event.signal_id[:8]} {event.pair} {event.direction}: {event.kind} "
+                    f"-> {event.status}/{event.result} ({event.pips:+.1f} pips)")
     
     async def send_signal(self, signal: Signal) -> bool:
         """
@@ -247,48 +575,215 @@ class SignalManager:
             logger.warning("Telegram not configured, skipping send")
             return False
         
-        message = self.engine.format_signal_for_telegram(signal)
-        return await self.telegram.send_signal(message)
+        results = await self.fanout.dispatch(signal)
+        # Only delayed destinations matched: nothing to fail yet
+        return any(results.values()) if results else True
     
-    async def run_once(self, send: bool = True) -> List[Signal]:
+    async def send_digest(self, signals: List[Signal]) -> bool:
+        """
+        Send several signals as digest messages via Telegram.
+        """
+        if not self.telegram:
+            logger.warning("Telegram not configured, skipping digest")
+            return False
+        
+        results = await self.fanout.dispatch_digest(signals)
+        # As in send_signal: retrying would duplicate messages that did go out
+        sent = any(results.values()) if results else True
+        if sent:
+            for signal in signals:
+                self.dedup.commit(signal)
+        return sent
+    
+    def render_signal(self, signal: Signal, variant: str = "full") -> str:
+        """Telegram message for a signal in the given fan-out variant"""
+        return self.templates.render(signal, variant=variant)
+    
+    async def send_report(self, period: str = "daily") -> bool:
+        """Send the daily or weekly performance report to Telegram"""
+        stats = self.performance.report(period)
+        if not self.telegram:
+            logger.warning("Telegram not configured, skipping report")
+            return False
+        if period == "weekly":
+            return await self.telegram.send_weekly_report(stats)
+        return await self.telegram.send_daily_summary(stats)
+    
+    async def run_once(self,
+                       send: bool = True,
+                       pairs: Optional[List[str]] = None,
+                       timeframe: str = "1H",
+                       wait_for_delivery: bool = True,
+                       due: Optional[dict] = None) -> List[Signal]:
         """
         Run analysis once and optionally send signals.
+        
+        Signals are handed to the pipeline's delivery stage as soon as they
+        are found. With wait_for_delivery=False the call returns once
+        analysis is done and sending continues in the background.
+        
+        `due` (timeframe -> pairs, None = all) analyses several timeframes in one cycle;
+        a pair due on more than one is fetched once on the finest and the
+        others are resampled from it.
         """
+        self.instruments.reload_if_changed()
+        if due is None:
+            due = {timeframe: pairs}
+        # None = every configured pair that trades on the timeframe
+        due = {tf: self.instruments.pairs_for(tf, self.pairs) if tf_pairs is None else tf_pairs
+               for tf, tf_pairs in due.items()}
+        
         logger.info("=" * 50)
-        logger.info(f"Starting signal analysis at {datetime.utcnow()}")
+        logger.info(f"Starting {','.join(due)} signal analysis at {datetime.utcnow()}")
         logger.info("=" * 50)
         
-        signals = await self.analyze_all_pairs()
+        # Pairs needing several timeframes are fetched by the pipeline itself
+        multi = {pair for pair in set().union(*due.values())
+                 if sum(pair in tf_pairs for tf_pairs in due.values()) > 1}
+        for tf, tf_pairs in due.items():
+            await self.data_provider.prefetch([p for p in tf_pairs if p not in multi], tf)
+        signals = await self.pipeline.run_timeframes(due, send=send)
         
-        if signals and send:
-            for signal in signals:
-                await self.send_signal(signal)
-                self.signals.append(signal)
-            
-            self.last_signal_time = datetime.utcnow()
+        if send and self.digest_mode == "cycle":
+            # Deliveries only buffer in digest mode, so draining is quick
+            await self.pipeline.drain()
+            if wait_for_delivery:
+                await self.digest.flush()
+            else:
+                self.digest.flush_in_background()
+        elif send and wait_for_delivery:
+            await self.pipeline.drain()
+            if self.digest:
+                await self.digest.flush()
         
         logger.info(f"Analysis complete. {len(signals)} signals generated.")
+        logger.info(f"Pipeline stats: {self.pipeline.stats()}")
+        self.lifecycle.expire()
+        if self.journal:
+            self.journal.flush()
+        if self.checkpoint:
+            self.checkpoint.maybe_save()
         return signals
     
-    async def run_scheduled(self, interval_minutes: int = 60):
+    async def _deliver(self, signal: Signal) -> bool:
+        """Pipeline delivery stage: send (or buffer for the digest) and record a signal"""
+        if self.digest and self.telegram:
+            # The dedup key is committed (or released) when the digest goes out
+            self.digest.add(signal)
+            sent = True
+        else:
+            sent = await self.send_signal(signal)
+            if self.telegram and not sent:
+                # Free the dedup key and cool-down so the next cycle can resend it
+                self.dedup.release(signal)
+                return False
+            self.dedup.commit(signal)
+        self._record_delivered(signal)
+        self.signals.append(signal)
+        self.last_signal_time = datetime.utcnow()
+        return sent
+    
+    def _record_delivered(self, signal: Signal):
+        """Start tracking a sent signal and persist it"""
+        self.lifecycle.track(signal)
+        self.performance.on_open(signal)
+        if self.journal:
+            self.journal.append_signal(signal)
+        if self.store:
+            self.store.insert(signal)
+        if self.sync:
+            self.sync.enqueue_signal(signal)
+            self.sync.start()
+    
+    async def run_scheduled(self,
+                            interval_minutes: int = 60,
+                            schedules: Optional[List[Schedule]] = None,
+                            settle_delay: float = 5.0):
         """
-        Run analysis on a schedule.
+        Run analysis at every candle close.
+        
+        By default one schedule covers all pairs on the timeframe matching
+        `interval_minutes`. Pass `schedules` for several timeframes or
+        per-pair schedules. Cycles never overlap; late ticks are counted
+        as missed.
         """
-        logger.info(f"Starting scheduled analysis (every {interval_minutes} minutes)")
+        if schedules is None:
+            timeframe = next((tf for tf, secs in TIMEFRAME_SECONDS.items()
+                              if secs == interval_minutes * 60), None)
+            if timeframe is None:
+                raise ValueError(f"Interval of {interval_minutes} minutes does not match a candle timeframe")
+            schedules = [Schedule(timeframe)]
+        
+        async def cycle(due):
+            await self.run_once(due=due, wait_for_delivery=False)
+        
+        self.scheduler = CandleCloseScheduler(schedules, cycle, settle_delay=settle_delay)
+        await self.scheduler.run()
+    
+    async def run_stream(self, url: str, timeframe: str = "1H", send: bool = True):
+        """
+        Analyze bars built from a live tick stream instead of polling.
+        
+        Each pair's history is seeded from one polled fetch, then every bar
+        that closes on the stream is analysed immediately.
+        """
+        if self.digest and self.digest.window is None:
+            # No cycles on a stream: cycle digests fall back to the window
+            self.digest.window = float(os.getenv("DIGEST_WINDOW", "30"))
+        
+        async def on_signal(signal: Signal):
+            logger.info(f"Stream signal for {signal.pair}: {signal.signal_type.value}")
+            if self.archive:
+                self.archive.add_signal(signal)
+            if send:
+                if self.dedup.admit(signal):
+                    await self._deliver(signal)
+            else:
+                self.signals.append(signal)
+        
+        def on_bars(pair: str, tf: str, bars: CandleArrays):
+            self.lifecycle.on_bars(pair, bars, tf)
+            if self.archive:
+                self.archive.add_candles(pair, tf, bars)
         
-        while True:
+        runner = StreamingSignalRunner(self.engine, self.pairs, timeframe,
+                                       on_signal=on_signal, on_bars=on_bars,
+                                       engine_for=self.engine_for)
+        if self.checkpoint:
+            # Loads bars saved by the previous run, if any
+            self.checkpoint.register('stream', runner.aggregator.state, runner.aggregator.load_state)
+        
+        # Only pairs without an unbroken restored history need a seed fetch
+        current_open = bar_open_time(time.time(), timeframe)
+        to_seed = [pair for pair in self.pairs
+                   if (runner.aggregator.history_end(pair, timeframe) or 0)
+                   < current_open - timeframe_seconds(timeframe)]
+        if len(to_seed) < len(self.pairs):
+            logger.info(f"Resumed {len(self.pairs) - len(to_seed)} pairs from checkpoint")
+        
+        await self.data_provider.prefetch(to_seed, timeframe)
+        for pair in to_seed:
             try:
-                await self.run_once()
+                data = await self.data_provider.fetch_candles(pair, timeframe)
             except Exception as e:
-                logger.error(f"Error in scheduled run: {e}")
-            
-            # Wait for next interval
-            await asyncio.sleep(interval_minutes * 60)
+                logger.warning(f"Could not seed history for {pair}: {e}")
+                continue
+            # Drop the still-forming bar; the stream will rebuild it
+            bars = data['arrays'][:-1]
+            runner.aggregator.seed(pair, timeframe, bars)
+        
+        logger.info(f"Streaming ticks from {url}")
+        saver = asyncio.create_task(self.checkpoint.run()) if self.checkpoint else None
+        try:
+            await runner.run(url)
+        finally:
+            if saver:
+                saver.cancel()
     
     def save_signals_to_file(self, filepath: str = "signals_history.json"):
-        """Save signals to JSON file"""
+        """Save the in-memory signal window to a JSON file (the journal keeps full history)"""
         data = []
-        for signal in self.signals:
+        for signal in self.signals.recent():
             data.append({
                 'pair': signal.pair,
                 'type': signal.signal_type.value,
@@ -305,6 +800,89 @@ class SignalManager:
             json.dump(data, f, indent=2)
         
         logger.info(f"Saved {len(data)} signals to {filepath}")
+    
+    def _checkpoint_state(self) -> dict:
+        return {
+            'signals': self.signals.state(),
+            'last_signal_time': self.last_signal_time,
+            'last_bars': self.last_bars,
+        }
+    
+    def _restore_checkpoint(self, state: dict):
+        self.signals.load_state(state['signals'])
+        self.last_signal_time = self.last_signal_time or state['last_signal_time']
+        self.last_bars = {**state['last_bars'], **self.last_bars}
+    
+    def metrics(self) -> dict:
+        """Flat numeric metrics (sent as heartbeats in worker mode)"""
+        stats = self.pipeline.stats()
+        metrics = {
+            'instruments': len(self.pairs),
+            'signals': len(self.signals),
+            'fetched': stats['fetch']['processed'],
+            'fetch_failed': stats['fetch']['failed'],
+            'analyzed': stats['analyze']['processed'],
+            'delivered': stats['deliver']['processed'],
+            'delivery_failed': stats['deliver']['failed'],
+            'suppressed_duplicates': self.dedup.suppressed,
+            'open_signals': len(self.lifecycle.open),
+            'resolved_signals': self.lifecycle.resolved,
+        }
+        if self.sync:
+            metrics['sync_pending'] = self.sync.stats()['pending']
+        if self.telegram:
+            sends = self.telegram.bot.stats().get('sendMessage')
+            if sends:
+                metrics['telegram_p95_latency_ms'] = sends['p95_latency_ms']
+            queue = self.telegram.queue.stats()
+            metrics['telegram_pending'] = queue['pending']
+            metrics['telegram_throttled'] = queue['throttled']
+        if self.digest:
+            metrics['digest_pending'] = self.digest.pending()
+        if self.scheduler:
+            metrics['missed_ticks'] = self.scheduler.missed
+        return metrics
+    
+    async def run_worker(self, socket_path: str, worker_id: str, **schedule_kwargs):
+        """
+        Run as a shard worker: the coordinator assigns our instruments and
+        we run the normal scheduled loop over them.
+        """
+        self.pairs = []
+        self._follow_instruments = False
+        
+        def on_assign(pairs: List[str]):
+            self.pairs = pairs
+        
+        client = ShardWorkerClient(socket_path, worker_id, on_assign, self.metrics)
+        scheduled = asyncio.create_task(self.run_scheduled(**schedule_kwargs))
+        try:
+            await client.run()
+        finally:
+            scheduled.cancel()
+    
+    async def close(self):
+        """Finish pending deliveries and release network resources"""
+        await self.pipeline.stop()
+        if self.digest:
+            await self.digest.close()
+        if self.journal:
+            self.journal.close()
+        if self.store:
+            await self.store.close()
+        if self.sync:
+            await self.sync.close()
+        if self.archive:
+            self.archive.close()
+        if self.fanout:
+            await self.fanout.close()
+        if self.telegram:
+            await self.telegram.close()
+        if self.checkpoint:
+            self.checkpoint.save()
+        if self.analysis_pool:
+            await self.analysis_pool.close()
+        await self.data_provider.close()
 
 
 async def main():
@@ -313,7 +891,19 @@ async def main():
     parser.add_argument('--schedule', action='store_true', help='Run on schedule')
     parser.add_argument('--test', action='store_true', help='Test mode (no sending)')
     parser.add_argument('--interval', type=int, default=60, help='Interval in minutes')
+    parser.add_argument('--timeframes', type=str, help='Comma-separated timeframes to schedule (e.g. 1H,4H)')
+    parser.add_argument('--workers', type=int, help='Analysis worker processes (0 = analyze on the event loop)')
+    parser.add_argument('--shards', type=int, help='Coordinator mode: split the instruments across N worker processes')
+    parser.add_argument('--shard-index', type=int, help='Multi-host mode: index of this host\'s shard')
+    parser.add_argument('--shard-count', type=int, help='Multi-host mode: total number of shards')
+    parser.add_argument('--worker', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-id', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--settle', type=float, default=5.0, help='Seconds to wait after each candle close')
     parser.add_argument('--pair', type=str, help='Analyze specific pair only')
+    parser.add_argument('--export', type=str, nargs='?', const='signals_history.json',
+                        help='Export the journaled signal history to a JSON file')
+    parser.add_argument('--report', choices=['daily', 'weekly'], help='Send (or with --test, print) a performance report')
+    parser.add_argument('--stream', type=str, help='Build bars from a tick stream (tcp://host:port or ws://...)')
     args = parser.parse_args()
     
     # Get configuration from environment
@@ -326,38 +916,146 @@ async def main():
         telegram_token = None
         telegram_channel = None
     
+    instruments = InstrumentRegistry()
+    
+    if args.shards:
+        # Coordinator: workers inherit the scheduling flags
+        worker_args = ['--interval', str(args.interval), '--settle', str(args.settle)]
+        if args.timeframes:
+            worker_args += ['--timeframes', args.timeframes]
+        if args.workers is not None:
+            worker_args += ['--workers', str(args.workers)]
+        if args.test:
+            worker_args.append('--test')
+        coordinator = ShardCoordinator(instruments.symbols, args.shards, worker_args=worker_args)
+        instruments.subscribe(lambda changed: coordinator.set_universe(instruments.symbols))
+        watcher = asyncio.create_task(instruments.watch())
+        try:
+            await coordinator.run()
+        finally:
+            watcher.cancel()
+        return
+    
+    pairs = None
+    if args.shard_count:
+        shard_index = args.shard_index or 0
+        pairs = static_shard(instruments.symbols, shard_index, args.shard_count)
+        logger.info(f"Shard {shard_index}/{args.shard_count}: {len(pairs)} instruments")
+    
+    # Shard workers keep state in their own files
+    checkpoint_path = os.getenv("CHECKPOINT_FILE", "runner_state.ckpt")
+    dedup_path = os.getenv("DEDUP_FILE", "signal_index.jsonl")
+    journal_dir = os.getenv("JOURNAL_DIR", "journal")
+    history_path = os.getenv("SIGNAL_HISTORY_FILE", "signals_spill.jsonl")
+    sync_outbox = os.getenv("SIGNAL_SYNC_OUTBOX", "sync_outbox.db")
+    fanout_pending = os.getenv("FANOUT_PENDING_FILE", "fanout_pending.json")
+    if args.worker:
+        checkpoint_path = checkpoint_path and f"{checkpoint_path}.{args.worker_id}"
+        dedup_path = dedup_path and f"{dedup_path}.{args.worker_id}"
+        journal_dir = journal_dir and os.path.join(journal_dir, args.worker_id)
+        history_path = history_path and f"{history_path}.{args.worker_id}"
+        sync_outbox = f"{sync_outbox}.{args.worker_id}"
+        fanout_pending = fanout_pending and f"{fanout_pending}.{args.worker_id}"
+    
     # Initialize manager
     manager = SignalManager(
         telegram_token=telegram_token,
         telegram_channel=telegram_channel,
-        api_key=api_key
+        api_key=api_key,
+        analysis_workers=args.workers,
+        pairs=pairs,
+        instruments=instruments,
+        checkpoint_path=checkpoint_path,
+        # One-off runs read the live runner's checkpoint but never overwrite it
+        checkpoint_read_only=not (args.schedule or args.stream or args.worker),
+        dedup_path=dedup_path,
+        journal_dir=journal_dir,
+        journal_read_only=bool(args.export or args.report),
+        # Test, report and export runs leave the live signal database alone
+        store_path="" if (args.test or args.export or args.report) else None,
+        history_path=history_path,
+        sync_outbox=sync_outbox,
+        fanout_pending=fanout_pending
     )
+    if args.shard_count:
+        # Re-shard when instruments are added or removed
+        instruments.subscribe(lambda changed: setattr(
+            manager, 'pairs', static_shard(instruments.symbols, shard_index, args.shard_count)))
     
-    if args.pair:
-        # Analyze specific pair
-        signal = await manager.analyze_pair(args.pair)
-        if signal:
-            print(manager.engine.format_signal_for_telegram(signal))
-    
-    elif args.schedule:
-        # Run on schedule
-        await manager.run_scheduled(args.interval)
+    if manager.checkpoint:
+        manager.checkpoint.restore()
+    if manager.fanout and not (args.test or args.pair or args.export or args.report):
+        # Delayed sends a previous run exited before making
+        manager.fanout.resume()
     
-    else:
-        # Run once
-        signals = await manager.run_once(send=not args.test)
+    try:
+        if manager.analysis_pool:
+            await manager.analysis_pool.start()
+        
+        if args.pair:
+            # Analyze specific pair
+            signal = await manager.analyze_pair(args.pair)
+            if signal:
+                print(manager.templates.render(signal))
         
-        print(f"\n{'='*50}")
-        print(f"ANALYSIS COMPLETE")
-        print(f"{'='*50}")
-        print(f"Signals generated: {len(signals)}")
+        elif args.export:
+            # Full history from the journal, in the signals_history.json layout
+            if manager.journal:
+                manager.journal.export_json(args.export)
+            else:
+                manager.save_signals_to_file(args.export)
         
-        for signal in signals:
-            print(f"\n{manager.engine.format_signal_for_telegram(signal)}")
+        elif args.report:
+            # Performance report from the checkpointed statistics; --shards
+            # workers checkpoint their own, so those are added in
+            if checkpoint_path:
+                for worker_id, state in worker_states(checkpoint_path, 'performance').items():
+                    manager.performance.merge_state(state)
+                    logger.info(f"Added performance statistics from {worker_id}")
+            if args.test:
+                print(json.dumps(manager.performance.report(args.report), indent=2))
+            else:
+                await manager.send_report(args.report)
         
-        # Save to file
-        if signals:
-            manager.save_signals_to_file()
+        elif args.worker:
+            # Shard worker launched by a coordinator
+            schedules = None
+            if args.timeframes:
+                schedules = [Schedule(tf.strip()) for tf in args.timeframes.split(',')]
+            await manager.run_worker(args.worker, args.worker_id,
+                                     interval_minutes=args.interval,
+                                     schedules=schedules,
+                                     settle_delay=args.settle)
+        
+        elif args.stream:
+            # Analyze bars from a live tick stream
+            await manager.run_stream(args.stream, send=not args.test)
+        
+        elif args.schedule:
+            # Run on schedule, aligned to candle closes
+            schedules = None
+            if args.timeframes:
+                schedules = [Schedule(tf.strip()) for tf in args.timeframes.split(',')]
+            await manager.run_scheduled(args.interval, schedules, settle_delay=args.settle)
+        
+        else:
+            # Run once
+            signals = await manager.run_once(send=not args.test)
+            
+            print(f"\n{'='*50}")
+            print(f"ANALYSIS COMPLETE")
+            print(f"{'='*50}")
+            print(f"Signals generated: {len(signals)}")
+            
+            for signal in signals:
+                print(f"\n{manager.templates.render(signal)}")
+            
+            # Delivered signals are already journaled; test runs keep the
+            # old one-off export
+            if signals and args.test:
+                manager.save_signals_to_file()
+    finally:
+        await manager.close()
 
 
 if __name__ == "__main__":
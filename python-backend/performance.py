@@ -0,0 +1,192 @@
+"""
+HAMCODZ Performance Statistics
+==============================
+Incrementally maintained win/loss/pip statistics for the daily and weekly
+Telegram reports.
+
+Every signal is counted in the UTC day bucket it was opened in, and in the
+all-time totals, broken down per pair and per strength. Opening or
+resolving a signal updates a handful of counters (O(1)). The weekly view
+sums the last seven day buckets, and old buckets simply drop off, so
+reports never rescan signal history. Statistics checkpointed by shard
+workers can be merged in for a cluster-wide report.
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+@dataclass
+class Counters:
+    """Signal outcome counters"""
+    total_signals: int = 0
+    wins: int = 0
+    losses: int = 0
+    total_pips: float = 0.0
+    breakeven: int = 0
+
+    def apply(self, signals: int = 0, wins: int = 0, losses: int = 0, pips: float = 0.0,
+              breakeven: int = 0):
+        self.total_signals += signals
+        self.wins += wins
+        self.losses += losses
+        self.total_pips += pips
+        self.breakeven += breakeven
+
+    def merge(self, other: "Counters"):
+        self.apply(other.total_signals, other.wins, other.losses, other.total_pips, other.breakeven)
+
+    def as_dict(self) -> dict:
+        decided = self.wins + self.losses
+        resolved = decided + self.breakeven
+        return {
+            'total_signals': self.total_signals,
+            'wins': self.wins,
+            'losses': self.losses,
+            'breakeven': self.breakeven,
+            'pending': self.total_signals - resolved,
+            # Break-even signals count as neither a win nor a loss
+            'win_rate': self.wins / decided * 100 if decided else 0.0,
+            'total_pips': round(self.total_pips, 1),
+            'avg_pips': round(self.total_pips / resolved, 1) if resolved else 0.0,
+        }
+
+
+@dataclass
+class _Bucket:
+    """Counters for one period, overall and per pair/strength"""
+    overall: Counters = field(default_factory=Counters)
+    pairs: Dict[str, Counters] = field(default_factory=dict)
+    strengths: Dict[str, Counters] = field(default_factory=dict)
+
+    def apply(self, pair: str, strength: str, **deltas):
+        self.overall.apply(**deltas)
+        self.pairs.setdefault(pair, Counters()).apply(**deltas)
+        self.strengths.setdefault(strength, Counters()).apply(**deltas)
+
+    def merge(self, other: "_Bucket"):
+        self.overall.merge(other.overall)
+        for pair, counters in other.pairs.items():
+            self.pairs.setdefault(pair, Counters()).merge(counters)
+        for strength, counters in other.strengths.items():
+            self.strengths.setdefault(strength, Counters()).merge(counters)
+
+    def report(self) -> dict:
+        report = self.overall.as_dict()
+        report['by_pair'] = {pair: c.as_dict() for pair, c in sorted(self.pairs.items())}
+        report['by_strength'] = {s: c.as_dict() for s, c in sorted(self.strengths.items())}
+        return report
+
+
+@dataclass
+class _OpenRecord:
+    """Where an open signal is counted and what it has contributed so far"""
+    day: int
+    pair: str
+    strength: str
+    result: str = "PENDING"
+    pips: float = 0.0
+
+
+class PerformanceStats:
+    """
+    Rolling daily, weekly and all-time statistics.
+
+    Args:
+        retention_days: Day buckets kept (older ones only remain in all-time)
+    """
+
+    def __init__(self, retention_days: int = 35):
+        self.retention_days = retention_days
+        self.days: Dict[int, _Bucket] = {}
+        self.all_time = _Bucket()
+        self._open: Dict[str, _OpenRecord] = {}
+        self._newest_day = 0
+
+    def _bucket(self, day: int) -> _Bucket:
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = _Bucket()
+            if day > self._newest_day:
+                self._newest_day = day
+                cutoff = day - self.retention_days
+                for old in [d for d in self.days if d <= cutoff]:
+                    del self.days[old]
+        return bucket
+
+    def on_open(self, signal, now: Optional[float] = None):
+        """Count a newly delivered signal (must already have a signal_id)"""
+        opened = time.time() if now is None else now
+        record = _OpenRecord(int(opened // DAY), signal.pair, signal.strength.value)
+        self._open[signal.signal_id] = record
+        self._apply(record, signals=1)
+
+    def on_event(self, event):
+        """Lifecycle listener: apply the change in result and pips"""
+        record = self._open.get(event.signal_id)
+        if record is None:
+            return
+        wins = losses = breakeven = 0
+        if event.result != record.result:
+            wins = (event.result == "WIN") - (record.result == "WIN")
+            losses = (event.result == "LOSS") - (record.result == "LOSS")
+            breakeven = (event.result == "BE") - (record.result == "BE")
+        pips = event.pips - record.pips
+        record.result, record.pips = event.result, event.pips
+        if wins or losses or breakeven or pips:
+            self._apply(record, wins=wins, losses=losses, breakeven=breakeven, pips=pips)
+        if event.closed:
+            del self._open[event.signal_id]
+
+    def _apply(self, record: _OpenRecord, **deltas):
+        self.all_time.apply(record.pair, record.strength, **deltas)
+        # Days already rolled out of retention only count towards all-time
+        if record.day > self._newest_day - self.retention_days:
+            self._bucket(record.day).apply(record.pair, record.strength, **deltas)
+
+    def report(self, period: str = "daily", now: Optional[float] = None) -> dict:
+        """
+        Stats dict for TelegramBot.send_daily_summary / send_weekly_report.
+
+        Args:
+            period: 'daily' (today, UTC), 'weekly' (last 7 days) or 'all'
+        """
+        today = int((time.time() if now is None else now) // DAY)
+        if period == "all":
+            report = self.all_time.report()
+        else:
+            span = {'daily': 1, 'weekly': 7}.get(period)
+            if span is None:
+                raise ValueError(f"Unknown report period: {period}")
+            combined = _Bucket()
+            for day in range(today - span + 1, today + 1):
+                if day in self.days:
+                    combined.merge(self.days[day])
+            report = combined.report()
+        report['period'] = period
+        return report
+
+    def state(self) -> dict:
+        """Buckets and open-signal records (for checkpoints)"""
+        return {'days': self.days, 'all_time': self.all_time, 'open': self._open}
+
+    def load_state(self, state: dict):
+        """Restore counters saved by state() (replaces current counters)"""
+        self.days = state['days']
+        self.all_time = state['all_time']
+        self._open = state['open']
+        self._newest_day = max(self.days, default=0)
+
+    def merge_state(self, state: dict):
+        """Add counters saved by another process's state(), e.g. a shard worker's"""
+        for day, bucket in state['days'].items():
+            if day > self._newest_day - self.retention_days:
+                self._bucket(day).merge(bucket)
+        self.all_time.merge(state['all_time'])
+        self._open.update(state['open'])
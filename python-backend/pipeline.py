@@ -0,0 +1,246 @@
+"""
+HAMCODZ Signal Pipeline
+=======================
+Staged asyncio pipeline: fetch -> analyze -> deliver.
+
+Each stage has its own worker pool and feeds the next through a bounded
+asyncio.Queue. A cycle returns once every pair has been analysed. Delivery
+keeps draining in the background, so a slow Telegram call no longer holds
+up the next cycle's fetches. Because the queues are bounded, a delivery
+outage slows analysis down (backpressure) instead of growing memory.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageMetrics:
+    """Counters and latency figures for one pipeline stage"""
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    suppressed: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+    def record(self, latency: float, ok: bool = True):
+        self.processed += 1
+        if not ok:
+            self.failed += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def observe_queue(self, depth: int):
+        self.queue_depth = depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def as_dict(self) -> dict:
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'suppressed': self.suppressed,
+            'avg_latency_ms': round(self.total_latency / self.processed * 1000, 1) if self.processed else 0.0,
+            'max_latency_ms': round(self.max_latency * 1000, 1),
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+@dataclass
+class _Cycle:
+    """Book-keeping for one submitted batch of pairs"""
+    send: bool
+    remaining: int
+    done: asyncio.Future
+    signals: list = field(default_factory=list)
+
+    def finish_one(self):
+        self.remaining -= 1
+        if self.remaining <= 0 and not self.done.done():
+            self.done.set_result(self.signals)
+
+
+class SignalPipeline:
+    """
+    Long-lived fetch/analyze/deliver pipeline.
+
+    Args:
+        fetch: async (pair, timeframe) -> candle data (or None)
+        analyze: async (pair, data) -> Signal or None
+        deliver: async (signal) -> bool
+        admit: optional (signal) -> bool; signals it rejects (duplicates)
+            are counted as suppressed instead of being delivered
+        fetch_timeframes: optional async (pair, timeframes) -> {timeframe: data};
+            used when several timeframes of a pair are due together, so
+            they come from one request
+    """
+
+    def __init__(self,
+                 fetch: Callable[[str, str], Awaitable[Any]],
+                 analyze: Callable[[str, Any], Awaitable[Any]],
+                 deliver: Callable[[Any], Awaitable[bool]],
+                 admit: Optional[Callable[[Any], bool]] = None,
+                 fetch_timeframes: Optional[Callable[[str, List[str]], Awaitable[Dict[str, Any]]]] = None,
+                 fetch_workers: int = 4,
+                 analyze_workers: int = 1,
+                 deliver_workers: int = 1,
+                 queue_size: int = 32):
+        self.fetch = fetch
+        self.analyze = analyze
+        self.deliver = deliver
+        self.admit = admit
+        self.fetch_timeframes = fetch_timeframes
+        self.queue_size = queue_size
+
+        self.metrics = {
+            'fetch': StageMetrics('fetch', fetch_workers),
+            'analyze': StageMetrics('analyze', analyze_workers),
+            'deliver': StageMetrics('deliver', deliver_workers),
+        }
+        self._queues: dict = {}
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self):
+        """Spawn the stage workers (must be called inside the event loop)"""
+        if self.running:
+            return
+        self._queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in self.metrics}
+        for name, handler in (('fetch', self._fetch_item),
+                              ('analyze', self._analyze_item),
+                              ('deliver', self._deliver_item)):
+            for _ in range(self.metrics[name].workers):
+                self._workers.append(asyncio.create_task(self._worker(name, handler)))
+
+    async def run_cycle(self, pairs: List[str], timeframe: str = "1H", send: bool = True) -> list:
+        """
+        Push `pairs` through fetch and analysis; returns the signals found.
+
+        With send=True, signals are queued for delivery, which may still be
+        in progress when this returns (see drain()).
+        """
+        return await self.run_timeframes({timeframe: pairs}, send)
+
+    async def run_timeframes(self, due: Dict[str, List[str]], send: bool = True) -> list:
+        """
+        Like run_cycle() for several timeframes at once (timeframe -> pairs).
+
+        Each pair goes through the fetch stage once with all of its due
+        timeframes; every (pair, timeframe) is then analysed separately.
+        """
+        self.start()
+        by_pair: Dict[str, List[str]] = {}
+        for timeframe, pairs in due.items():
+            for pair in pairs:
+                by_pair.setdefault(pair, []).append(timeframe)
+        loop = asyncio.get_running_loop()
+        cycle = _Cycle(send, sum(len(tfs) for tfs in by_pair.values()), loop.create_future())
+        if not by_pair:
+            return []
+        for pair, timeframes in by_pair.items():
+            await self._put('fetch', (cycle, pair, timeframes))
+        return await cycle.done
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until all queued work, including deliveries, has finished"""
+        if not self.running:
+            return
+        joins = asyncio.gather(*(queue.join() for queue in self._queues.values()))
+        try:
+            await asyncio.wait_for(joins, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pipeline drain timed out with "
+                           f"{self._queues['deliver'].qsize()} deliveries pending")
+
+    async def stop(self, timeout: Optional[float] = 30.0):
+        """Drain outstanding work, then cancel the workers"""
+        await self.drain(timeout)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        """Per-stage metrics"""
+        for name, queue in self._queues.items():
+            self.metrics[name].queue_depth = queue.qsize()
+        return {name: m.as_dict() for name, m in self.metrics.items()}
+
+    async def _put(self, stage: str, item):
+        queue = self._queues[stage]
+        # Blocks when the stage is saturated: this is the backpressure
+        await queue.put((time.perf_counter(), item))
+        self.metrics[stage].observe_queue(queue.qsize())
+
+    async def _worker(self, stage: str, handler):
+        queue = self._queues[stage]
+        metrics = self.metrics[stage]
+        while True:
+            enqueued, item = await queue.get()
+            ok = False
+            try:
+                ok = await handler(item)
+            except Exception as e:
+                logger.error(f"Pipeline {stage} stage failed: {e}")
+            finally:
+                metrics.record(time.perf_counter() - enqueued, ok)
+                queue.task_done()
+
+    async def _fetch_item(self, item) -> bool:
+        cycle, pair, timeframes = item
+        try:
+            if len(timeframes) > 1 and self.fetch_timeframes:
+                fetched = await self.fetch_timeframes(pair, timeframes)
+            else:
+                fetched = {tf: await self.fetch(pair, tf) for tf in timeframes}
+        except Exception as e:
+            logger.error(f"Error fetching {pair}: {e}", extra={'pair': pair, 'stage': 'fetch'})
+            for _ in timeframes:
+                cycle.finish_one()
+            return False
+        ok = True
+        for tf in timeframes:
+            data = fetched.get(tf)
+            if not data or 'candles' not in data:
+                logger.warning(f"No {tf} data available for {pair}", extra={'pair': pair, 'stage': 'fetch'})
+                cycle.finish_one()
+                ok = False
+                continue
+            await self._put('analyze', (cycle, pair, data))
+        return ok
+
+    async def _analyze_item(self, item) -> bool:
+        cycle, pair, data = item
+        try:
+            signal = await self.analyze(pair, data)
+            if signal:
+                if cycle.send and self.admit and not self.admit(signal):
+                    self.metrics['deliver'].suppressed += 1
+                    return True
+                cycle.signals.append(signal)
+                if cycle.send:
+                    await self._put('deliver', signal)
+            return True
+        except Exception as e:
+            logger.error(f"Error analyzing {pair}: {e}", extra={'pair': pair, 'stage': 'analyze'})
+            return False
+        finally:
+            cycle.finish_one()
+
+    async def _deliver_item(self, signal) -> bool:
+        return bool(await self.deliver(signal))
@@ -0,0 +1,203 @@
+"""
+HAMCODZ Timeframe Resampler
+===========================
+Derives higher timeframes (4H, 1D, 1W) from a single base timeframe.
+
+Only the finest timeframe is fetched from the API. Higher timeframes are
+aggregated locally with np.*.reduceat over bucket boundaries, aligned to the
+forex session: days roll over at 22:00 UTC (17:00 New York) and weeks open
+on Sunday 22:00 UTC.
+
+Aggregates are cached per pair and updated incrementally, so a new base bar
+only re-aggregates the still-open higher-timeframe bar.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from candles import CandleArrays
+from timeframes import normalize_timeframe, timeframe_seconds
+
+logger = logging.getLogger(__name__)
+
+# Forex trading day starts at the New York close
+SESSION_ROLLOVER = 22 * 3600
+# The unix epoch was a Thursday; the FX week opens Sunday 22:00 UTC
+WEEK_OPEN_OFFSET = 3 * 86400 + SESSION_ROLLOVER
+
+
+def session_offset(timeframe: str) -> int:
+    """Bucket anchor (seconds) that aligns `timeframe` bars to the FX session"""
+    period = timeframe_seconds(timeframe)
+    if normalize_timeframe(timeframe) == "1W":
+        return WEEK_OPEN_OFFSET
+    return SESSION_ROLLOVER % period
+
+
+def resample(bars: CandleArrays, timeframe: str, offset: Optional[int] = None) -> CandleArrays:
+    """
+    Aggregate time-ordered base bars into `timeframe` bars.
+
+    Args:
+        bars: Base timeframe candles, ascending by timestamp
+        timeframe: Target timeframe (must be a multiple of the base)
+        offset: Bucket anchor in seconds; defaults to session alignment
+
+    Returns:
+        Aggregated candles stamped with each bucket's open time
+    """
+    n = len(bars)
+    if n == 0:
+        return CandleArrays.empty()
+
+    period = timeframe_seconds(timeframe)
+    if offset is None:
+        offset = session_offset(timeframe)
+
+    bucket = (bars.timestamp - offset) // period
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.concatenate((starts[1:], [n])) - 1
+
+    return CandleArrays(
+        timestamp=bucket[starts] * period + offset,
+        open=bars.open[starts],
+        high=np.maximum.reduceat(bars.high, starts),
+        low=np.minimum.reduceat(bars.low, starts),
+        close=bars.close[ends],
+        volume=np.add.reduceat(bars.volume, starts),
+    )
+
+
+class TimeframeAggregator:
+    """Incrementally maintained aggregates for one pair and timeframe"""
+
+    def __init__(self, timeframe: str, max_bars: int = 500):
+        self.timeframe = normalize_timeframe(timeframe)
+        self.offset = session_offset(self.timeframe)
+        self.max_bars = max_bars
+        self.bars = CandleArrays.empty()
+        self.last_base_ts: Optional[int] = None
+
+    def update(self, base: CandleArrays) -> CandleArrays:
+        """
+        Fold a window of base bars into the aggregates.
+
+        The open (last) aggregate bar is rebuilt from the base bars that fall
+        inside it, which also picks up revisions to a still-forming base bar.
+        Closed aggregate bars are never recomputed.
+        """
+        if len(base) == 0:
+            return self.bars
+        if self.last_base_ts is not None and base.timestamp[-1] < self.last_base_ts:
+            return self.bars  # stale window, nothing new
+
+        if len(self.bars) == 0:
+            self.bars = resample(base, self.timeframe, self.offset)
+        else:
+            open_start = self.bars.timestamp[-1]
+            if base.timestamp[0] <= open_start:
+                fresh = resample(base[base.timestamp >= open_start], self.timeframe, self.offset)
+                self.bars = CandleArrays.concat([self.bars[:-1], fresh])
+            else:
+                # The window doesn't reach back to the open bar; merge instead
+                fresh = resample(base[base.timestamp > self.last_base_ts], self.timeframe, self.offset)
+                self._merge(fresh)
+
+        self.last_base_ts = int(base.timestamp[-1])
+        if len(self.bars) > self.max_bars:
+            self.bars = self.bars[-self.max_bars:]
+        return self.bars
+
+    def _merge(self, fresh: CandleArrays):
+        if len(fresh) == 0:
+            return
+        parts = [self.bars]
+        if fresh.timestamp[0] == self.bars.timestamp[-1]:
+            last = self.bars[-1:]
+            merged = CandleArrays(
+                last.timestamp,
+                last.open,
+                np.maximum(last.high, fresh.high[:1]),
+                np.minimum(last.low, fresh.low[:1]),
+                fresh.close[:1],
+                last.volume + fresh.volume[:1],
+            )
+            parts = [self.bars[:-1], merged]
+            fresh = fresh[1:]
+        self.bars = CandleArrays.concat(parts + [fresh])
+
+
+class MultiTimeframeResampler:
+    """
+    Per-pair cache of higher-timeframe aggregates built from one base feed.
+    """
+
+    def __init__(self, base_timeframe: str = "1H", max_bars: int = 500):
+        self.base_timeframe = normalize_timeframe(base_timeframe)
+        self.max_bars = max_bars
+        self._aggregators: Dict[str, Dict[str, TimeframeAggregator]] = {}
+
+    def update(self, pair: str, base: CandleArrays, timeframes: Iterable[str]) -> Dict[str, CandleArrays]:
+        """
+        Update `pair`'s aggregates with new base bars.
+
+        Returns a mapping of timeframe -> candles, including the base.
+        """
+        base_seconds = timeframe_seconds(self.base_timeframe)
+        result = {self.base_timeframe: base}
+        aggregators = self._aggregators.setdefault(pair, {})
+
+        for timeframe in timeframes:
+            timeframe = normalize_timeframe(timeframe)
+            if timeframe == self.base_timeframe:
+                continue
+            if timeframe_seconds(timeframe) % base_seconds:
+                raise ValueError(f"{timeframe} is not a multiple of base {self.base_timeframe}")
+            aggregator = aggregators.get(timeframe)
+            if aggregator is None:
+                aggregator = aggregators[timeframe] = TimeframeAggregator(timeframe, self.max_bars)
+            result[timeframe] = aggregator.update(base)
+
+        return result
+
+    def last_update(self, pair: str, timeframes: Iterable[str]) -> Optional[int]:
+        """Newest base bar folded into all of `timeframes` (None if any is missing)"""
+        aggregators = self._aggregators.get(pair, {})
+        latest = []
+        for timeframe in timeframes:
+            timeframe = normalize_timeframe(timeframe)
+            if timeframe == self.base_timeframe:
+                continue
+            aggregator = aggregators.get(timeframe)
+            if aggregator is None or aggregator.last_base_ts is None:
+                return None
+            latest.append(aggregator.last_base_ts)
+        return min(latest) if latest else None
+
+    def state(self) -> dict:
+        """Aggregates per pair and timeframe (for checkpoints)"""
+        return {
+            pair: {tf: (agg.bars, agg.last_base_ts) for tf, agg in aggregators.items()}
+            for pair, aggregators in self._aggregators.items()
+        }
+
+    def load_state(self, state: dict):
+        """Restore aggregates saved by state()"""
+        for pair, saved in state.items():
+            aggregators = self._aggregators.setdefault(pair, {})
+            for timeframe, (bars, last_base_ts) in saved.items():
+                aggregator = TimeframeAggregator(timeframe, self.max_bars)
+                aggregator.bars = bars[-self.max_bars:]
+                aggregator.last_base_ts = last_base_ts
+                aggregators[timeframe] = aggregator
+
+    def forget(self, pair: str):
+        """Drop a pair's aggregates (e.g. after its configuration changed)"""
+        self._aggregators.pop(pair, None)
+
+    def get(self, pair: str, timeframe: str) -> Optional[CandleArrays]:
+        """Cached aggregates for a pair/timeframe, if any"""
+        aggregator = self._aggregators.get(pair, {}).get(normalize_timeframe(timeframe))
+        return aggregator.bars if aggregator else None
@@ -0,0 +1,164 @@
+"""
+HAMCODZ Candle-Close Scheduler
+==============================
+Wakes the runner at each timeframe's bar close instead of sleeping a fixed
+interval after every run.
+
+Features:
+- Fires at bar close + settle delay (so the API has the closed bar)
+- Several timeframes and per-pair schedules; coinciding closes are merged
+- Skips bars that closed while the forex market was shut (weekend)
+- Never overlaps cycles: a tick that arrives while the previous cycle is
+  still running is counted as missed rather than queued
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from resampler import session_offset
+from timeframes import normalize_timeframe, bar_open_time, next_bar_close, timeframe_seconds
+
+logger = logging.getLogger(__name__)
+
+# Forex week (UTC): closes Friday 22:00, reopens Sunday 22:00
+MARKET_CLOSE = (4, 22)  # (weekday, hour)
+MARKET_OPEN = (6, 22)
+
+# timeframe -> pairs due (None means every configured pair)
+DueMap = Dict[str, Optional[List[str]]]
+
+
+def is_market_open(ts: float) -> bool:
+    """Whether the forex market is open at unix timestamp `ts`"""
+    now = datetime.utcfromtimestamp(ts)
+    hour_of_week = now.weekday() * 24 + now.hour
+    closed_from = MARKET_CLOSE[0] * 24 + MARKET_CLOSE[1]
+    open_from = MARKET_OPEN[0] * 24 + MARKET_OPEN[1]
+    return not (closed_from <= hour_of_week < open_from)
+
+
+def bar_was_traded(close_ts: float, timeframe: str) -> bool:
+    """False if the bar closing at `close_ts` lies entirely in the weekend"""
+    period = timeframe_seconds(timeframe)
+    if period >= 2 * 86400:
+        return True
+    return is_market_open(close_ts - period) or is_market_open(close_ts - 1)
+
+
+@dataclass
+class Schedule:
+    """Run `pairs` (None = all) every time a `timeframe` bar closes"""
+    timeframe: str
+    pairs: Optional[List[str]] = None
+
+
+class CandleCloseScheduler:
+    """
+    Calls `job(due)` shortly after every scheduled bar close.
+
+    `due` maps each timeframe whose bar just closed to the pairs to analyse.
+    """
+
+    def __init__(self,
+                 schedules: List[Schedule],
+                 job: Callable[[DueMap], Awaitable],
+                 settle_delay: float = 5.0,
+                 skip_market_closed: bool = True):
+        if not schedules:
+            raise ValueError("At least one schedule is required")
+        self.schedules = [Schedule(normalize_timeframe(s.timeframe), s.pairs) for s in schedules]
+        self.job = job
+        self.settle_delay = settle_delay
+        self.skip_market_closed = skip_market_closed
+
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        self.runs = 0
+        self.missed = 0
+        self.skipped_closed = 0
+        self.last_boundary: Optional[float] = None
+
+    def next_boundary(self, now: float) -> float:
+        """Earliest upcoming bar close across all schedules"""
+        return min(next_bar_close(now, s.timeframe, session_offset(s.timeframe)) for s in self.schedules)
+
+    def due_at(self, boundary: float) -> DueMap:
+        """Schedules whose bar closes exactly at `boundary`"""
+        due: DueMap = {}
+        for s in self.schedules:
+            if (boundary - session_offset(s.timeframe)) % timeframe_seconds(s.timeframe):
+                continue
+            if s.timeframe in due:
+                existing = due[s.timeframe]
+                due[s.timeframe] = None if existing is None or s.pairs is None \
+                    else sorted(set(existing) | set(s.pairs))
+            else:
+                due[s.timeframe] = s.pairs
+        return due
+
+    async def run(self):
+        """Run until stop() is called"""
+        self._running = True
+        logger.info(f"Scheduler started for {', '.join(s.timeframe for s in self.schedules)} "
+                    f"(settle {self.settle_delay:.0f}s)")
+
+        boundary = self.next_boundary(time.time())
+        while self._running:
+            delay = boundary + self.settle_delay - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # If we overslept (suspend, blocked loop), count the skipped closes
+            base = min((s.timeframe for s in self.schedules), key=timeframe_seconds)
+            latest = bar_open_time(time.time() - self.settle_delay, base, session_offset(base))
+            if latest > boundary:
+                skipped = int((latest - boundary) // timeframe_seconds(base))
+                self.missed += skipped
+                logger.warning(f"Scheduler overslept, missed {skipped} tick(s)")
+                boundary = latest
+
+            self._fire(boundary)
+            boundary = self.next_boundary(boundary)
+
+    def _fire(self, boundary: float):
+        self.last_boundary = boundary
+        due = self.due_at(boundary)
+        if self.skip_market_closed:
+            due = {tf: pairs for tf, pairs in due.items() if bar_was_traded(boundary, tf)}
+            if not due:
+                self.skipped_closed += 1
+                logger.debug(f"Market closed, skipping bar closing at {datetime.utcfromtimestamp(boundary)}")
+                return
+
+        if self._task is not None and not self._task.done():
+            self.missed += 1
+            logger.warning(f"Previous cycle still running, skipped tick at "
+                           f"{datetime.utcfromtimestamp(boundary)} ({self.missed} missed so far)")
+            return
+
+        if due:
+            self.runs += 1
+            self._task = asyncio.create_task(self._run_job(due))
+
+    async def _run_job(self, due: DueMap):
+        try:
+            await self.job(due)
+        except Exception as e:
+            logger.error(f"Error in scheduled run: {e}")
+
+    def stop(self):
+        self._running = False
+
+    def stats(self) -> dict:
+        """Return scheduler counters"""
+        return {
+            'runs': self.runs,
+            'missed': self.missed,
+            'skipped_market_closed': self.skipped_closed,
+            'last_boundary': self.last_boundary,
+        }
@@ -0,0 +1,295 @@
+"""
+HAMCODZ Sharded Runner
+======================
+Splits a large instrument universe across several worker processes.
+
+Features:
+- Consistent-hash ring (with virtual nodes): when a worker joins or leaves,
+  only the instruments it owned move
+- Coordinator that launches N local workers and talks to them over a Unix
+  socket using JSON lines (no external broker)
+- Workers run their own fetch/analyze/deliver loop and send heartbeats
+  with metrics; the coordinator aggregates them and restarts dead workers
+- Static mode for several hosts: every host builds the same ring from
+  --shard-index/--shard-count and keeps only its own instruments
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from bisect import bisect
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Heartbeat metrics that are levels rather than counts (latencies, queue
+# depths): health() reports their maximum and each worker's value, not a sum
+GAUGE_SUFFIXES = ('_ms', '_pending')
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys (instruments) to nodes (workers)"""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Partition `keys` by owning node"""
+        result: Dict[str, List[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            owner = self.owner(key)
+            if owner is not None:
+                result[owner].append(key)
+        return result
+
+
+def static_shard(universe: Iterable[str], index: int, count: int) -> List[str]:
+    """Instruments owned by shard `index` of `count` (multi-host mode)"""
+    ring = HashRing(f"shard-{i}" for i in range(count))
+    return ring.assign(universe)[f"shard-{index}"]
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict):
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+
+
+class ShardCoordinator:
+    """
+    Launches and supervises local worker processes.
+
+    Args:
+        universe: All instruments to cover
+        workers: Number of worker processes
+        socket_path: Unix socket used for the coordination channel
+        worker_args: Extra command-line arguments passed to each worker
+        heartbeat_timeout: Seconds without a heartbeat before a worker is
+            reported unhealthy
+    """
+
+    def __init__(self,
+                 universe: List[str],
+                 workers: int,
+                 socket_path: str = "/tmp/hamcodz-coordinator.sock",
+                 worker_args: Optional[List[str]] = None,
+                 heartbeat_timeout: float = 60.0,
+                 report_interval: float = 60.0):
+        self.universe = list(universe)
+        self.worker_count = workers
+        self.socket_path = socket_path
+        self.worker_args = worker_args or []
+        self.heartbeat_timeout = heartbeat_timeout
+        self.report_interval = report_interval
+
+        self.ring = HashRing()
+        self.assignments: Dict[str, List[str]] = {}
+        self.metrics: Dict[str, dict] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.restarts = 0
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+
+    async def run(self):
+        """Serve the coordination socket and keep the workers alive"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info(f"Coordinator listening on {self.socket_path} for {len(self.universe)} instruments")
+
+        try:
+            for i in range(self.worker_count):
+                await self._spawn(f"worker-{i}")
+            last_report = time.monotonic()
+            while True:
+                await asyncio.sleep(1.0)
+                await self._supervise()
+                if time.monotonic() - last_report >= self.report_interval:
+                    logger.info(f"Cluster health: {self.health()}")
+                    last_report = time.monotonic()
+        finally:
+            server.close()
+            for process in self._processes.values():
+                if process.returncode is None:
+                    process.terminate()
+            await asyncio.gather(*(p.wait() for p in self._processes.values()), return_exceptions=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _spawn(self, worker_id: str):
+        main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        env = dict(os.environ)
+        log_file = env.get("LOG_FILE", "signals.log")
+        if log_file:
+            # Workers rotating one shared log file would lose each other's records
+            env["LOG_FILE"] = f"{log_file}.{worker_id}"
+        self._processes[worker_id] = await asyncio.create_subprocess_exec(
+            sys.executable, main_path,
+            "--worker", self.socket_path, "--worker-id", worker_id,
+            *self.worker_args,
+            env=env
+        )
+        logger.info(f"Started {worker_id} (pid {self._processes[worker_id].pid})")
+
+    async def _supervise(self):
+        for worker_id, process in list(self._processes.items()):
+            if process.returncode is not None:
+                logger.error(f"{worker_id} exited with code {process.returncode}, restarting")
+                self.restarts += 1
+                await self._spawn(worker_id)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        worker_id = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get("type") == "hello":
+                    worker_id = message["worker"]
+                    self._writers[worker_id] = writer
+                    self.ring.add(worker_id)
+                    self.last_seen[worker_id] = time.monotonic()
+                    await self._rebalance()
+                elif message.get("type") == "heartbeat" and worker_id:
+                    self.last_seen[worker_id] = time.monotonic()
+                    self.metrics[worker_id] = message.get("metrics", {})
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Coordination channel error for {worker_id}: {e}")
+        finally:
+            if worker_id and self._writers.get(worker_id) is writer:
+                del self._writers[worker_id]
+                self.ring.remove(worker_id)
+                self.metrics.pop(worker_id, None)
+                logger.warning(f"{worker_id} disconnected, rebalancing")
+                await self._rebalance()
+            writer.close()
+
+    def set_universe(self, universe: List[str]):
+        """Replace the instrument list (e.g. after a config reload) and reassign"""
+        self.universe = list(universe)
+        asyncio.ensure_future(self._rebalance())
+
+    async def _rebalance(self):
+        """Push the current ring's assignments to every connected worker"""
+        assignments = self.ring.assign(self.universe)
+        for worker_id, pairs in assignments.items():
+            if self.assignments.get(worker_id) == pairs:
+                continue
+            writer = self._writers.get(worker_id)
+            if writer is None:
+                continue
+            try:
+                await _send(writer, {"type": "assign", "pairs": pairs})
+            except ConnectionError:
+                continue
+        moved = sum(1 for wid, pairs in assignments.items() if self.assignments.get(wid) != pairs)
+        self.assignments = assignments
+        logger.info(f"Assigned {len(self.universe)} instruments across {len(assignments)} workers "
+                    f"({moved} workers changed)")
+
+    def health(self) -> dict:
+        """Summed counters, peak gauges and per-worker liveness and gauges"""
+        now = time.monotonic()
+        workers = {}
+        for worker_id in self._processes:
+            age = now - self.last_seen[worker_id] if worker_id in self.last_seen else None
+            workers[worker_id] = {
+                'instruments': len(self.assignments.get(worker_id, [])),
+                'healthy': worker_id in self._writers and age is not None and age < self.heartbeat_timeout,
+                'last_heartbeat_s': round(age, 1) if age is not None else None,
+            }
+        totals: Dict[str, float] = {}
+        peaks: Dict[str, float] = {}
+        for worker_id, metrics in self.metrics.items():
+            for key, value in metrics.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if key.endswith(GAUGE_SUFFIXES):
+                    peaks[key] = max(peaks.get(key, value), value)
+                    if worker_id in workers:
+                        workers[worker_id][key] = value
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return {'workers': workers, 'totals': totals, 'peaks': peaks, 'restarts': self.restarts}
+
+
+class ShardWorkerClient:
+    """
+    Worker side of the coordination channel.
+
+    Calls `on_assign(pairs)` whenever the coordinator changes this worker's
+    instruments and sends `metrics()` as a heartbeat every `interval` seconds.
+    """
+
+    def __init__(self,
+                 socket_path: str,
+                 worker_id: str,
+                 on_assign: Callable[[List[str]], None],
+                 metrics: Callable[[], dict],
+                 interval: float = 10.0):
+        self.socket_path = socket_path
+        self.worker_id = worker_id
+        self.on_assign = on_assign
+        self.metrics = metrics
+        self.interval = interval
+
+    async def run(self):
+        """Stay connected; exits (so the coordinator restarts us) if the channel drops"""
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        await _send(writer, {"type": "hello", "worker": self.worker_id})
+        heartbeat = asyncio.create_task(self._heartbeat(writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("Coordinator closed the channel")
+                message = json.loads(line)
+                if message.get("type") == "assign":
+                    logger.info(f"{self.worker_id} assigned {len(message['pairs'])} instruments")
+                    self.on_assign(message["pairs"])
+        finally:
+            heartbeat.cancel()
+            writer.close()
+
+    async def _heartbeat(self, writer: asyncio.StreamWriter):
+        while True:
+            await _send(writer, {"type": "heartbeat", "worker": self.worker_id, "metrics": self.metrics()})
+            await asyncio.sleep(self.interval)
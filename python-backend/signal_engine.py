@@ -20,6 +20,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
+from templates import TemplateSet
+
 
 class SignalType(Enum):
     BUY = "BUY"
@@ -50,6 +52,9 @@ class Signal:
     order_block: bool = False
     fvg: bool = False
     liquidity_sweep: bool = False
+    bar_time: Optional[int] = None  # Open time (unix) of the bar the signal was built on
+    signal_id: Optional[str] = None  # Assigned when the signal is delivered
+    timeframe: Optional[str] = None  # Candle timeframe the signal was built on
 
 
 class TechnicalAnalysis:
@@ -336,11 +341,15 @@ class ICTConcepts:
 class SignalEngine:
     """Main signal generation engine"""
     
-    def __init__(self, risk_reward_ratio: float = 1.5, min_rr: float = 1.5):
+    def __init__(self, risk_reward_ratio: float = 1.5, min_rr: float = 1.5, instruments=None):
         self.ta = TechnicalAnalysis()
         self.ict = ICTConcepts()
         self.risk_reward_ratio = risk_reward_ratio
         self.min_rr = min_rr
+        # Optional InstrumentRegistry with configured pip sizes and digits
+        self.instruments = instruments
+        # Compiled message templates, built on first use
+        self.templates: Optional[TemplateSet] = None
     
     def analyze(self, pair: str, candles: pd.DataFrame) -> Optional[Signal]:
         """
@@ -506,6 +515,11 @@ class SignalEngine:
     
     def get_pip_multiplier(self, pair: str) -> int:
         """Get pip multiplier based on pair type"""
+        if self.instruments is not None:
+            multiplier = self.instruments.pip_multiplier(pair)
+            if multiplier is not None:
+                return multiplier
+        
         # JPY pairs use 100 (2 decimal places)
         if 'JPY' in pair:
             return 100
@@ -516,53 +530,12 @@ class SignalEngine:
         else:
             return 10000
     
-    def format_signal_for_telegram(self, signal: Signal) -> str:
+    def format_signal_for_telegram(self, signal: Signal, fmt: str = "html") -> str:
         """Format signal for Telegram message"""
-        emoji = "🟢" if signal.signal_type == SignalType.BUY else "🔴"
-        direction = signal.signal_type.value
-        
-        # Get correct pip multiplier for this pair
-        pip_mult = self.get_pip_multiplier(signal.pair)
-        
-        # Calculate pips
-        if signal.signal_type == SignalType.BUY:
-            tp1_pips = (signal.take_profit_1 - signal.entry_price) * pip_mult
-            tp2_pips = (signal.take_profit_2 - signal.entry_price) * pip_mult
-            sl_pips = (signal.entry_price - signal.stop_loss) * pip_mult
-        else:
-            tp1_pips = (signal.entry_price - signal.take_profit_1) * pip_mult
-            tp2_pips = (signal.entry_price - signal.take_profit_2) * pip_mult
-            sl_pips = (signal.stop_loss - signal.entry_price) * pip_mult
-        
-        strength_emoji = {
-            SignalStrength.STRONG: "💪💪💪",
-            SignalStrength.MODERATE: "💪💪",
-            SignalStrength.WEAK: "💪"
-        }
-        
-        # Format price decimals based on pair type
-        decimals = 2 if 'JPY' in signal.pair else 5
-        if 'XAU' in signal.pair:
-            decimals = 2
-        
-        message = f"""
-{emoji} <b>{signal.pair} SIGNAL - {direction}</b> {emoji}
-
-📊 <b>Entry:</b> {signal.entry_price:.{decimals}f}
-🎯 <b>TP1:</b> {signal.take_profit_1:.{decimals}f} (+{tp1_pips:.0f} pips)
-🎯 <b>TP2:</b> {signal.take_profit_2:.{decimals}f} (+{tp2_pips:.0f} pips)
-🛑 <b>SL:</b> {signal.stop_loss:.{decimals}f} (-{sl_pips:.0f} pips)
-
-📝 <b>Analysis:</b>
-{signal.analysis}
-
-⏰ <b>Time:</b> {signal.timestamp.strftime('%H:%M UTC')}
-📊 <b>Strength:</b> {strength_emoji[signal.strength]}
-📉 <b>Risk:</b> 1-2% recommended
-
-<i>Signal by HAMCODZ Trading</i>
-"""
-        return message.strip()
+        if self.templates is None:
+            digits = self.instruments.digits if self.instruments is not None else None
+            self.templates = TemplateSet(self.get_pip_multiplier, digits)
+        return self.templates.render(signal, fmt)
 
 
 # Example usage
@@ -0,0 +1,294 @@
+"""
+HAMCODZ Signal Store
+====================
+SQLite store for delivered signals, queryable by pair, time and status.
+
+Features:
+- Table mirrors the Prisma Signal model (prisma/schema.prisma), with
+  indexes on (pair, createdAt) and status
+- WAL mode: readers never block the writer and vice versa
+- One writer thread drains a queue and commits whole batches in a single
+  transaction, so the event loop only enqueues and never waits on disk.
+  If a batch fails, its operations are retried one by one so a single bad
+  row loses only itself; flush() reports whether anything failed
+- Reads run in a thread too, using fixed SQL that sqlite3 keeps prepared
+"""
+
+import uuid
+import queue
+import sqlite3
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Signal (
+    id          TEXT PRIMARY KEY,
+    pair        TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    entryPrice  REAL NOT NULL,
+    takeProfit1 REAL NOT NULL,
+    takeProfit2 REAL,
+    takeProfit3 REAL,
+    stopLoss    REAL NOT NULL,
+    analysis    TEXT,
+    confidence  INTEGER NOT NULL DEFAULT 70,
+    timeframe   TEXT NOT NULL DEFAULT 'H1',
+    status      TEXT NOT NULL DEFAULT 'ACTIVE',
+    createdAt   TEXT NOT NULL,
+    updatedAt   TEXT NOT NULL,
+    result      TEXT,
+    pips        REAL
+);
+CREATE INDEX IF NOT EXISTS Signal_pair_createdAt_idx ON Signal (pair, createdAt);
+CREATE INDEX IF NOT EXISTS Signal_status_idx ON Signal (status);
+"""
+
+COLUMNS = ('id', 'pair', 'type', 'entryPrice', 'takeProfit1', 'takeProfit2', 'takeProfit3', 'stopLoss',
+           'analysis', 'confidence', 'timeframe', 'status', 'createdAt', 'updatedAt', 'result', 'pips')
+
+INSERT_SQL = f"INSERT OR IGNORE INTO Signal ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+UPDATE_OUTCOME_SQL = "UPDATE Signal SET status = ?, result = ?, pips = ?, updatedAt = ? WHERE id = ?"
+
+OPEN_SIGNALS_SQL = "SELECT * FROM Signal WHERE status = 'ACTIVE' ORDER BY createdAt"
+
+SUMMARY_SQL = """
+SELECT COUNT(*) AS total_signals,
+       COALESCE(SUM(result = 'WIN'), 0) AS wins,
+       COALESCE(SUM(result = 'LOSS'), 0) AS losses,
+       COALESCE(SUM(result = 'BE'), 0) AS breakeven,
+       COALESCE(SUM(pips), 0) AS total_pips
+FROM Signal WHERE createdAt >= ? AND createdAt < ?
+"""
+
+# Signal strength -> Prisma confidence (0-100)
+CONFIDENCE = {'STRONG': 85, 'MODERATE': 70, 'WEAK': 55}
+
+
+def iso_timestamp(dt: datetime) -> str:
+    """Prisma-style UTC timestamp text (naive datetimes are taken as UTC)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def now_timestamp() -> str:
+    """Current time as iso_timestamp() text"""
+    return iso_timestamp(datetime.now(timezone.utc))
+
+
+def prisma_timeframe(timeframe: Optional[str]) -> str:
+    """'1H' -> 'H1', '15m' -> 'M15', '1D' -> 'D1' (the frontend's notation)"""
+    if not timeframe:
+        return 'H1'
+    count, unit = timeframe[:-1], timeframe[-1]
+    return {'m': 'M', 'H': 'H', 'D': 'D', 'W': 'W'}.get(unit, unit.upper()) + count
+
+
+def prisma_row(signal,
+               status: str = 'ACTIVE',
+               result: str = 'PENDING',
+               pips: Optional[float] = None,
+               updated_at: Optional[str] = None) -> dict:
+    """Signal as a row of the Prisma Signal model (column -> value)"""
+    if signal.signal_id is None:
+        signal.signal_id = uuid.uuid4().hex
+    created = iso_timestamp(signal.timestamp)
+    return {
+        'id': signal.signal_id,
+        'pair': signal.pair,
+        'type': signal.signal_type.value,
+        'entryPrice': signal.entry_price,
+        'takeProfit1': signal.take_profit_1,
+        'takeProfit2': signal.take_profit_2,
+        'takeProfit3': None,
+        'stopLoss': signal.stop_loss,
+        'analysis': signal.analysis,
+        'confidence': CONFIDENCE.get(signal.strength.value, 70),
+        'timeframe': prisma_timeframe(signal.timeframe),
+        'status': status,
+        'createdAt': created,
+        'updatedAt': updated_at or created,
+        'result': result,
+        'pips': pips,
+    }
+
+
+class SignalStore:
+    """
+    Batched SQLite signal store.
+
+    Args:
+        path: Database file
+        batch_size: Most operations committed per transaction
+    """
+
+    def __init__(self, path: str = "signals.db", batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._local = threading.local()
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="signal-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, cached_statements=64)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    # Writes
+
+    def insert(self, signal):
+        """Queue a delivered signal for insertion (returns immediately)"""
+        row = prisma_row(signal)
+        self._queue.put((INSERT_SQL, tuple(row[column] for column in COLUMNS)))
+
+    def update_outcome(self, event):
+        """Lifecycle listener: queue a status/result/pips update"""
+        self._queue.put((UPDATE_OUTCOME_SQL, (event.status, event.result, event.pips, now_timestamp(), event.signal_id)))
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            operations = [entry for entry in batch if isinstance(entry, tuple)]
+            try:
+                with conn:
+                    # Consecutive statements of one kind go through executemany
+                    sql, rows = None, []
+                    for entry in operations:
+                        if entry[0] != sql and rows:
+                            conn.executemany(sql, rows)
+                            rows = []
+                        sql = entry[0]
+                        rows.append(entry[1])
+                    if rows:
+                        conn.executemany(sql, rows)
+                self.written += len(operations)
+                self.batches += 1
+                for entry in batch:
+                    if isinstance(entry, Future):
+                        entry.set_result(self.failed)
+            except sqlite3.Error as e:
+                logger.error(f"Signal store write of {len(operations)} operations failed ({e}), "
+                             f"retrying them one by one")
+                self._write_each(conn, batch)
+            if None in batch:
+                conn.close()
+                return
+
+    def _write_each(self, conn: sqlite3.Connection, batch: list):
+        # In queue order, so a flush marker settles after everything before it
+        for entry in batch:
+            if isinstance(entry, Future):
+                entry.set_result(self.failed)
+            elif entry is not None:
+                try:
+                    with conn:
+                        conn.execute(*entry)
+                    self.written += 1
+                except sqlite3.Error as e:
+                    self.failed += 1
+                    logger.error(f"Signal store dropped a write that keeps failing: {e} ({entry[1]})")
+
+    async def flush(self) -> bool:
+        """Wait until everything queued so far is written; False if any of it failed"""
+        failed = self.failed
+        future: Future = Future()
+        self._queue.put(future)
+        return await asyncio.wrap_future(future) == failed
+
+    async def close(self):
+        """Commit pending writes and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, self._writer.join)
+
+    # Reads (run in a thread on a per-thread connection)
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _fetch(self, sql: str, params: tuple = ()) -> List[dict]:
+        return [dict(row) for row in self._reader().execute(sql, params).fetchall()]
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[dict]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._fetch, sql, params)
+
+    async def signals(self,
+                      pair: Optional[str] = None,
+                      since: Optional[datetime] = None,
+                      until: Optional[datetime] = None,
+                      status: Optional[str] = None,
+                      limit: int = 1000) -> List[dict]:
+        """Signals filtered by pair, creation time range and status (newest first)"""
+        clauses, params = [], []
+        if pair:
+            clauses.append("pair = ?")
+            params.append(pair)
+        if since:
+            clauses.append("createdAt >= ?")
+            params.append(iso_timestamp(since))
+        if until:
+            clauses.append("createdAt < ?")
+            params.append(iso_timestamp(until))
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return await self._run(f"SELECT * FROM Signal {where} ORDER BY createdAt DESC LIMIT ?",
+                               (*params, limit))
+
+    async def open_signals(self) -> List[dict]:
+        """Signals that have not reached a target or stop yet (lifecycle path)"""
+        return await self._run(OPEN_SIGNALS_SQL)
+
+    async def summary(self, since: datetime, until: Optional[datetime] = None) -> dict:
+        """Report stats for signals created in [since, until)"""
+        until = until or datetime.now(timezone.utc)
+        row = (await self._run(SUMMARY_SQL, (iso_timestamp(since), iso_timestamp(until))))[0]
+        decided = row['wins'] + row['losses']
+        resolved = decided + row['breakeven']
+        return {
+            'total_signals': row['total_signals'],
+            'wins': row['wins'],
+            'losses': row['losses'],
+            'breakeven': row['breakeven'],
+            'pending': row['total_signals'] - resolved,
+            'win_rate': row['wins'] / decided * 100 if decided else 0.0,
+            'total_pips': round(row['total_pips'], 1),
+            'avg_pips': round(row['total_pips'] / resolved, 1) if resolved else 0.0,
+        }
+
+    def stats(self) -> dict:
+        """Return writer counters"""
+        return {'written': self.written, 'batches': self.batches, 'failed': self.failed,
+                'queued': self._queue.qsize()}
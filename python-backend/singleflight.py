@@ -0,0 +1,115 @@
+"""
+HAMCODZ Single-Flight Request Cache
+===================================
+Coalesces concurrent identical requests and keeps their results briefly.
+
+Concurrent callers asking for the same key share one in-flight fetch and
+its result. Successful results are kept in a small TTL cache so bursts of
+calls (e.g. a --pair run overlapping a scheduled cycle) are served locally
+instead of spending API quota.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightCache:
+    """
+    Single-flight coalescing with a short TTL micro-cache.
+
+    Cached values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        # Counters for monitoring API savings
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    async def get(self,
+                  key: Hashable,
+                  fetch: Callable[[], Awaitable[Any]],
+                  expires_at: Optional[float] = None) -> Any:
+        """
+        Return the value for `key`, calling `fetch` at most once at a time.
+
+        Args:
+            key: Cache key, e.g. (pair, timeframe, count)
+            fetch: Coroutine factory producing the value
+            expires_at: Optional unix timestamp after which a cached value
+                is stale even if the TTL has not elapsed (e.g. the next
+                candle close). None results are never cached.
+        """
+        now = time.time()
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return cached[1]
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._run(key, fetch, expires_at))
+            self._inflight[key] = task
+
+        # Shield so one cancelled caller doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    async def _run(self,
+                   key: Hashable,
+                   fetch: Callable[[], Awaitable[Any]],
+                   expires_at: Optional[float]) -> Any:
+        try:
+            value = await fetch()
+            if value is not None and self.ttl > 0:
+                expiry = time.time() + self.ttl
+                if expires_at is not None:
+                    expiry = min(expiry, expires_at)
+                self._store(key, expiry, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, expiry: float, value: Any):
+        self._cache[key] = (expiry, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one cached key, or everything if no key is given"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        """Drop every cached key for which `predicate(key)` is true"""
+        for key in [k for k in self._cache if predicate(k)]:
+            del self._cache[key]
+
+    def stats(self) -> dict:
+        """Return cache counters"""
+        return {
+            'hits': self.hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'cached': len(self._cache),
+            'inflight': len(self._inflight),
+        }
@@ -8,19 +8,27 @@ Setup:
 2. Get your bot token
 3. Create a channel and add the bot as admin
 4. Get the channel ID (can use @userinfobot)
+
+The bot keeps one pooled HTTP session (keep-alive connections, so no TLS
+handshake per message); close it with close() or `async with`.
+TELEGRAM_API_URL points it at a local stand-in server for testing.
 """
 
 import os
+import time
 import asyncio
 import aiohttp
-from typing import Optional, List
-from dataclasses import dataclass
+from collections import deque
+from typing import Deque, Dict, Optional
+from dataclasses import dataclass, field
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from delivery_queue import DeliveryQueue, PRIORITY_SIGNAL, PRIORITY_REPORT
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_TELEGRAM_API_URL = "https://api.telegram.org"
+
 
 @dataclass
 class TelegramConfig:
@@ -28,6 +36,52 @@ class TelegramConfig:
     bot_token: str
     channel_id: str
     parse_mode: str = "HTML"
+    api_url: str = DEFAULT_TELEGRAM_API_URL
+    timeout: float = 15.0
+    connect_timeout: float = 5.0
+    max_connections: int = 16
+    keepalive_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls, bot_token: str, channel_id: str) -> "TelegramConfig":
+        """Build a config with TELEGRAM_* environment overrides"""
+        return cls(
+            bot_token=bot_token,
+            channel_id=channel_id,
+            api_url=os.getenv("TELEGRAM_API_URL", DEFAULT_TELEGRAM_API_URL),
+            timeout=float(os.getenv("TELEGRAM_TIMEOUT", "15")),
+            max_connections=int(os.getenv("TELEGRAM_MAX_CONNECTIONS", "16")),
+        )
+
+
+@dataclass
+class RequestMetrics:
+    """Latency figures for one Bot API method"""
+    calls: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=256))
+
+    def record(self, latency: float, ok: bool):
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.recent.append(latency)
+
+    def as_dict(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_latency_ms': round(self.total_latency / self.calls * 1000, 1) if self.calls else 0.0,
+            'p95_latency_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1)
+            if recent else 0.0,
+            'max_latency_ms': round(self.max_latency * 1000, 1),
+        }
 
 
 class TelegramBot:
@@ -35,7 +89,68 @@ class TelegramBot:
     
     def __init__(self, config: TelegramConfig):
         self.config = config
-        self.base_url = f"https://api.telegram.org/bot{config.bot_token}"
+        self.base_url = f"{config.api_url.rstrip('/')}/bot{config.bot_token}"
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.metrics: Dict[str, RequestMetrics] = {}
+    
+    async def __aenter__(self) -> "TelegramBot":
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.max_connections,
+                keepalive_timeout=self.config.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            timeout = aiohttp.ClientTimeout(total=self.config.timeout, connect=self.config.connect_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _request(self, method: str, json: Optional[dict] = None, params: Optional[dict] = None) -> dict:
+        """
+        Call a Bot API method and return the decoded response.
+        
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: on transport failures
+        """
+        url = f"{self.base_url}/{method}"
+        metrics = self.metrics.setdefault(method, RequestMetrics())
+        started = time.perf_counter()
+        ok = False
+        try:
+            http_method = "POST" if json is not None else "GET"
+            async with self._get_session().request(http_method, url, json=json, params=params) as response:
+                result = await response.json(content_type=None)
+                ok = bool(result.get("ok"))
+                return result
+        finally:
+            metrics.record(time.perf_counter() - started, ok)
+    
+    async def send_raw(self, text: str, chat_id: Optional[str] = None, parse_mode: str = "HTML") -> dict:
+        """
+        sendMessage returning the Bot API response as is (including
+        error_code and parameters.retry_after on failure).
+        
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: on transport failures
+        """
+        data = {
+            "chat_id": chat_id or self.config.channel_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "disable_web_page_preview": True
+        }
+        return await self._request("sendMessage", json=data)
     
     async def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
         """
@@ -48,26 +163,15 @@ class TelegramBot:
         Returns:
             True if successful, False otherwise
         """
-        url = f"{self.base_url}/sendMessage"
-        data = {
-            "chat_id": self.config.channel_id,
-            "text": text,
-            "parse_mode": parse_mode,
-            "disable_web_page_preview": True
-        }
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data) as response:
-                    result = await response.json()
-                    
-                    if result.get("ok"):
-                        logger.info(f"Message sent successfully to {self.config.channel_id}")
-                        return True
-                    else:
-                        logger.error(f"Failed to send message: {result}")
-                        return False
-                        
+            result = await self.send_raw(text, parse_mode=parse_mode)
+            if result.get("ok"):
+                logger.info(f"Message sent successfully to {self.config.channel_id}")
+                return True
+            else:
+                logger.error(f"Failed to send message: {result}")
+                return False
+        
         except Exception as e:
             logger.error(f"Error sending message: {e}")
             return False
@@ -78,6 +182,11 @@ class TelegramBot:
     
     async def send_daily_summary(self, stats: dict) -> bool:
         """Send daily performance summary"""
+        return await self.send_message(self.format_daily_summary(stats))
+    
+    @staticmethod
+    def format_daily_summary(stats: dict) -> str:
+        """Daily performance summary message"""
         message = f"""
 📊 <b>DAILY PERFORMANCE SUMMARY</b>
 
@@ -91,10 +200,15 @@ class TelegramBot:
 
 <i>Keep following for more signals!</i>
 """
-        return await self.send_message(message.strip())
+        return message.strip()
     
     async def send_weekly_report(self, stats: dict) -> bool:
         """Send weekly performance report"""
+        return await self.send_message(self.format_weekly_report(stats))
+    
+    @staticmethod
+    def format_weekly_report(stats: dict) -> str:
+        """Weekly performance report message"""
         message = f"""
 📅 <b>WEEKLY PERFORMANCE REPORT</b>
 
@@ -116,7 +230,7 @@ class TelegramBot:
 
 <i>Thank you for following HAMCODZ Trading!</i>
 """
-        return await self.send_message(message.strip())
+        return message.strip()
     
     async def send_market_alert(self, alert_type: str, message: str) -> bool:
         """Send market alert (news, volatility, etc.)"""
@@ -138,42 +252,64 @@ class TelegramBot:
     
     async def get_me(self) -> Optional[dict]:
         """Get bot information"""
-        url = f"{self.base_url}/getMe"
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    result = await response.json()
-                    return result if result.get("ok") else None
+            result = await self._request("getMe")
+            return result if result.get("ok") else None
         except Exception as e:
             logger.error(f"Error getting bot info: {e}")
             return None
     
     async def get_chat(self) -> Optional[dict]:
         """Get channel/group information"""
-        url = f"{self.base_url}/getChat"
         params = {"chat_id": self.config.channel_id}
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    result = await response.json()
-                    return result if result.get("ok") else None
+            result = await self._request("getChat", params=params)
+            return result if result.get("ok") else None
         except Exception as e:
             logger.error(f"Error getting chat info: {e}")
             return None
+    
+    def stats(self) -> dict:
+        """Per-method request counts and latencies"""
+        return {method: m.as_dict() for method, m in self.metrics.items()}
 
 
 class SignalSender:
-    """High-level signal sending utility"""
+    """High-level signal sending utility (sends through a rate-limited DeliveryQueue)"""
     
     def __init__(self, bot_token: str, channel_id: str):
-        config = TelegramConfig(bot_token=bot_token, channel_id=channel_id)
+        config = TelegramConfig.from_env(bot_token, channel_id)
         self.bot = TelegramBot(config)
+        self.queue = DeliveryQueue(
+            self.bot,
+            global_rate=float(os.getenv("TELEGRAM_GLOBAL_RATE", "30")),
+            group_rate_per_minute=float(os.getenv("TELEGRAM_GROUP_RATE_PER_MINUTE", "20")),
+            max_retries=int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+        )
+    
+    async def __aenter__(self) -> "SignalSender":
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    async def close(self):
+        """Flush queued messages and release the bot's HTTP connections"""
+        await self.queue.close()
+        await self.bot.close()
     
     async def send_signal(self, signal_text: str) -> bool:
         """Send a signal message"""
-        return await self.bot.send_signal(signal_text)
+        return await self.queue.send(signal_text, priority=PRIORITY_SIGNAL)
+    
+    async def send_daily_summary(self, stats: dict) -> bool:
+        """Send the daily summary (queued behind pending signals)"""
+        return await self.queue.send(self.bot.format_daily_summary(stats), priority=PRIORITY_REPORT)
+    
+    async def send_weekly_report(self, stats: dict) -> bool:
+        """Send the weekly report (queued behind pending signals)"""
+        return await self.queue.send(self.bot.format_weekly_report(stats), priority=PRIORITY_REPORT)
     
     async def test_connection(self) -> bool:
         """Test if bot is properly configured"""
@@ -217,22 +353,22 @@ async def main():
         print("3. Get channel ID (use @userinfobot or forward a message to @getmyid_bot)")
         return
     
-    sender = SignalSender(bot_token, channel_id)
-    
-    # Test connection
-    print("Testing bot connection...")
-    if await sender.test_connection():
-        print("✅ Bot connected successfully!")
-        
-        # Send test message
-        print("\nSending test message...")
-        if await sender.send_welcome_message():
-            print("✅ Test message sent!")
+    async with SignalSender(bot_token, channel_id) as sender:
+        # Test connection
+        print("Testing bot connection...")
+        if await sender.test_connection():
+            print("✅ Bot connected successfully!")
+            
+            # Send test message
+            print("\nSending test message...")
+            if await sender.send_welcome_message():
+                print("✅ Test message sent!")
+            else:
+                print("❌ Failed to send test message")
         else:
-            print("❌ Failed to send test message")
-    else:
-        print("❌ Failed to connect to bot")
+            print("❌ Failed to connect to bot")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
@@ -0,0 +1,213 @@
+"""
+HAMCODZ Message Templates
+=========================
+Precompiled signal message templates with a render cache.
+
+Each base template is compiled once per instrument and format: the pair
+name and the price precision are baked in, so rendering a signal is a
+single str.format() call. Pip multipliers and decimals are looked up
+once per instrument and cached until the instrument's settings change.
+Rendered messages are memoized per (signal, format, variant), so
+fanning one signal out to many destinations formats it only once per
+variant.
+
+Formats: 'html' (the Telegram default), 'markdown' (Telegram legacy
+Markdown) and 'plain'. Variants: 'full' and 'free' (full plus an
+upgrade footer).
+"""
+
+import html
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compile-time fields use single braces ({pair}, {decimals}); render-time
+# fields are escaped with double braces and survive compilation.
+BASE_TEMPLATES = {
+    'html': """{{emoji}} <b>{pair} SIGNAL - {{direction}}</b> {{emoji}}
+
+📊 <b>Entry:</b> {{entry:.{decimals}f}}
+🎯 <b>TP1:</b> {{tp1:.{decimals}f}} (+{{tp1_pips:.0f}} pips)
+🎯 <b>TP2:</b> {{tp2:.{decimals}f}} (+{{tp2_pips:.0f}} pips)
+🛑 <b>SL:</b> {{sl:.{decimals}f}} (-{{sl_pips:.0f}} pips)
+
+📝 <b>Analysis:</b>
+{{analysis}}
+
+⏰ <b>Time:</b> {{time}}
+📊 <b>Strength:</b> {{strength}}
+📉 <b>Risk:</b> 1-2% recommended
+
+<i>Signal by HAMCODZ Trading</i>""",
+
+    'markdown': """{{emoji}} *{pair} SIGNAL - {{direction}}* {{emoji}}
+
+📊 *Entry:* {{entry:.{decimals}f}}
+🎯 *TP1:* {{tp1:.{decimals}f}} (+{{tp1_pips:.0f}} pips)
+🎯 *TP2:* {{tp2:.{decimals}f}} (+{{tp2_pips:.0f}} pips)
+🛑 *SL:* {{sl:.{decimals}f}} (-{{sl_pips:.0f}} pips)
+
+📝 *Analysis:*
+{{analysis}}
+
+⏰ *Time:* {{time}}
+📊 *Strength:* {{strength}}
+📉 *Risk:* 1-2% recommended
+
+_Signal by HAMCODZ Trading_""",
+
+    'plain': """{{emoji}} {pair} SIGNAL - {{direction}} {{emoji}}
+
+Entry: {{entry:.{decimals}f}}
+TP1: {{tp1:.{decimals}f}} (+{{tp1_pips:.0f}} pips)
+TP2: {{tp2:.{decimals}f}} (+{{tp2_pips:.0f}} pips)
+SL: {{sl:.{decimals}f}} (-{{sl_pips:.0f}} pips)
+
+Analysis:
+{{analysis}}
+
+Time: {{time}}
+Strength: {{strength}}
+Risk: 1-2% recommended
+
+Signal by HAMCODZ Trading""",
+}
+
+VARIANT_FOOTERS = {
+    'free': {
+        'html': "\n\n⏱ <i>Delayed signal. Upgrade to PREMIUM for real-time alerts.</i>",
+        'markdown': "\n\n⏱ _Delayed signal. Upgrade to PREMIUM for real-time alerts._",
+        'plain': "\n\nDelayed signal. Upgrade to PREMIUM for real-time alerts.",
+    },
+}
+
+# Telegram parse_mode for each format
+PARSE_MODES = {'html': "HTML", 'markdown': "Markdown", 'plain': None}
+
+DIRECTION_EMOJI = {"BUY": "🟢", "SELL": "🔴"}
+STRENGTH_EMOJI = {"STRONG": "💪💪💪", "MODERATE": "💪💪", "WEAK": "💪"}
+
+
+def _escape_markdown(text: str) -> str:
+    for char in ('_', '*', '`', '['):
+        text = text.replace(char, f"\\{char}")
+    return text
+
+
+ESCAPE = {
+    'html': lambda text: html.escape(text, quote=False),
+    'markdown': _escape_markdown,
+    'plain': lambda text: text,
+}
+
+
+@dataclass
+class InstrumentTemplates:
+    """Compiled templates and cached metadata for one instrument"""
+    pip_multiplier: float
+    decimals: int
+    compiled: Dict[str, str]
+
+
+class TemplateSet:
+    """
+    Per-instrument compiled templates with a memoized renderer.
+
+    Args:
+        pip_multiplier: pair -> pips per price unit
+        decimals: pair -> price decimals, or None for the legacy rule
+        cache_size: Rendered messages kept
+    """
+
+    def __init__(self,
+                 pip_multiplier: Callable[[str], float],
+                 decimals: Optional[Callable[[str], Optional[int]]] = None,
+                 cache_size: int = 1024):
+        self.pip_multiplier = pip_multiplier
+        self.decimals = decimals or (lambda pair: None)
+        self.cache_size = cache_size
+
+        self._instruments: Dict[str, InstrumentTemplates] = {}
+        # (signal key, format, variant) -> (signal, text); the signal is kept
+        # so an id() key cannot be reused while its entry is cached
+        self._rendered: "OrderedDict[Tuple, Tuple[object, str]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _for(self, pair: str) -> InstrumentTemplates:
+        templates = self._instruments.get(pair)
+        if templates is None:
+            decimals = self.decimals(pair)
+            if decimals is None:
+                decimals = 2 if 'JPY' in pair or 'XAU' in pair else 5
+            compiled = {fmt: base.format(pair=ESCAPE[fmt](pair), decimals=decimals)
+                        for fmt, base in BASE_TEMPLATES.items()}
+            templates = self._instruments[pair] = InstrumentTemplates(
+                self.pip_multiplier(pair), decimals, compiled)
+        return templates
+
+    def invalidate(self, pairs: Optional[Iterable[str]] = None):
+        """Recompile for `pairs` (all when None) after their settings change"""
+        if pairs is None:
+            self._instruments.clear()
+            self._rendered.clear()
+            return
+        pairs = set(pairs)
+        for pair in pairs:
+            self._instruments.pop(pair, None)
+        for key in [k for k, (signal, _) in self._rendered.items() if signal.pair in pairs]:
+            del self._rendered[key]
+
+    def render(self, signal, fmt: str = "html", variant: str = "full") -> str:
+        """Message text for `signal` in format `fmt` and fan-out variant `variant`"""
+        key = (signal.signal_id or id(signal), fmt, variant)
+        cached = self._rendered.get(key)
+        if cached is not None and cached[0] is signal:
+            self._rendered.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+
+        templates = self._for(signal.pair)
+        direction = signal.signal_type.value
+        pip_mult = templates.pip_multiplier
+        if direction == "BUY":
+            tp1_pips = (signal.take_profit_1 - signal.entry_price) * pip_mult
+            tp2_pips = (signal.take_profit_2 - signal.entry_price) * pip_mult
+            sl_pips = (signal.entry_price - signal.stop_loss) * pip_mult
+        else:
+            tp1_pips = (signal.entry_price - signal.take_profit_1) * pip_mult
+            tp2_pips = (signal.entry_price - signal.take_profit_2) * pip_mult
+            sl_pips = (signal.stop_loss - signal.entry_price) * pip_mult
+
+        text = templates.compiled[fmt].format(
+            emoji=DIRECTION_EMOJI[direction],
+            direction=direction,
+            entry=signal.entry_price,
+            tp1=signal.take_profit_1,
+            tp1_pips=tp1_pips,
+            tp2=signal.take_profit_2,
+            tp2_pips=tp2_pips,
+            sl=signal.stop_loss,
+            sl_pips=sl_pips,
+            analysis=ESCAPE[fmt](signal.analysis),
+            time=signal.timestamp.strftime('%H:%M UTC'),
+            strength=STRENGTH_EMOJI[signal.strength.value],
+        )
+        footer = VARIANT_FOOTERS.get(variant)
+        if footer:
+            text += footer[fmt]
+
+        self._rendered[key] = (signal, text)
+        if len(self._rendered) > self.cache_size:
+            self._rendered.popitem(last=False)
+        return text
+
+    def stats(self) -> dict:
+        """Return cache counters"""
+        return {'instruments': len(self._instruments), 'cached': len(self._rendered),
+                'hits': self.hits, 'misses': self.misses}
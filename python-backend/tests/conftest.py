@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The backend is a flat set of modules, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing main sets up logging; keep test runs out of the repo's signals.log
+os.environ.setdefault("LOG_FILE", "")
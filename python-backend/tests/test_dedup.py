@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+
+from dedup import DedupIndex
+from signal_engine import Signal, SignalStrength, SignalType
+
+
+def make_signal(entry=1.1000, bar_time=1_700_000_000):
+    return Signal(pair="EUR/USD", signal_type=SignalType.BUY, entry_price=entry,
+                  take_profit_1=entry + 0.0030, take_profit_2=entry + 0.0060,
+                  stop_loss=entry - 0.0020, strength=SignalStrength.STRONG,
+                  analysis="test", timestamp=datetime.utcnow(), bar_time=bar_time)
+
+
+def test_release_lets_signal_and_pair_fire_again():
+    index = DedupIndex(cooldown=3600)
+    signal = make_signal()
+    assert index.admit(signal)
+    # A newer bar is held back by the pair/direction cool-down meanwhile
+    assert not index.admit(make_signal(bar_time=1_700_003_600))
+
+    index.release(signal)
+    assert index.admit(signal)
+    index.commit(signal)
+    assert not index.admit(signal)
+    assert index.stats()['accepted'] == 1
+
+
+def test_commit_writes_mirror_only_after_delivery(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = DedupIndex(path=path)
+    signal = make_signal()
+    assert index.admit(signal)
+    # Not delivered yet: a restart must not treat it as sent
+    assert DedupIndex(path=path).admit(signal)
+
+    index.commit(signal)
+    assert not DedupIndex(path=path).admit(signal)
+
+
+def test_failed_send_is_resent_next_cycle(tmp_path, monkeypatch):
+    for var in ("SIGNAL_DB", "SIGNAL_SYNC_URL", "FCS_API_KEY"):
+        monkeypatch.setenv(var, "")
+    monkeypatch.setenv("DIGEST_MODE", "off")
+    from main import SignalManager
+
+    manager = SignalManager(checkpoint_path="", dedup_path="", journal_dir=str(tmp_path / "journal"),
+                            history_path="", sync_outbox="", fanout_pending="")
+    manager.telegram = object()
+    outcomes = [False, True]
+    sent = []
+
+    async def send_signal(signal):
+        ok = outcomes.pop(0)
+        if ok:
+            sent.append(signal)
+        return ok
+
+    manager.send_signal = send_signal
+
+    async def cycle(signal):
+        if not manager.dedup.admit(signal):
+            return None
+        return await manager._deliver(signal)
+
+    async def run():
+        assert await cycle(make_signal()) is False
+        assert len(manager.signals) == 0
+        # Next cycle: the same bar still qualifies and goes out this time
+        assert await cycle(make_signal()) is True
+        assert await cycle(make_signal()) is None
+
+    asyncio.run(run())
+    assert len(sent) == 1
+    assert len(manager.signals) == 1
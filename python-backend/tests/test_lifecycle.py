@@ -0,0 +1,51 @@
+import time
+from datetime import datetime
+
+import numpy as np
+
+from candles import CandleArrays
+from lifecycle import LifecycleTracker, RESULT_BREAKEVEN, RESULT_LOSS, STATUS_CLOSED
+from performance import PerformanceStats
+from signal_engine import Signal, SignalStrength, SignalType
+
+
+def make_signal(entry=1.1000):
+    return Signal(pair="EUR/USD", signal_type=SignalType.BUY, entry_price=entry,
+                  take_profit_1=entry + 0.0030, take_profit_2=entry + 0.0060,
+                  stop_loss=entry - 0.0020, strength=SignalStrength.STRONG,
+                  analysis="test", timestamp=datetime.utcnow(), bar_time=1_700_000_000)
+
+
+def tracked_with_stats():
+    tracker = LifecycleTracker(max_age=3600)
+    stats = PerformanceStats()
+    tracker.subscribe(stats.on_event)
+    signal = make_signal()
+    tracker.track(signal)
+    stats.on_open(signal)
+    return tracker, stats
+
+
+def test_expired_at_entry_is_break_even():
+    tracker, stats = tracked_with_stats()
+    # No bars seen: the signal expires at its entry price
+    [event] = tracker.expire(now=time.time() + 7200)
+    assert event.status == STATUS_CLOSED
+    assert event.pips == 0
+    assert event.result == RESULT_BREAKEVEN
+
+    report = stats.report("daily")
+    assert report['losses'] == 0
+    assert report['breakeven'] == 1
+    assert report['pending'] == 0
+    assert report['win_rate'] == 0.0
+
+
+def test_expired_below_entry_is_a_loss():
+    tracker, stats = tracked_with_stats()
+    # A bar after the signal's that closes below entry without reaching the stop
+    tracker.on_bars("EUR/USD", CandleArrays(np.array([1_700_003_600]), np.array([1.0995]), np.array([1.1000]),
+                                            np.array([1.0985]), np.array([1.0990]), np.array([0.0])))
+    [event] = tracker.expire(now=time.time() + 7200)
+    assert event.result == RESULT_LOSS
+    assert stats.report("daily")['losses'] == 1
@@ -0,0 +1,411 @@
+"""
+HAMCODZ Tick Stream
+===================
+Consumes a live tick/quote stream and builds OHLC bars incrementally.
+
+Features:
+- Per pair/timeframe bar builders that keep only scalar state per tick
+- Fixed-size NumPy ring buffers for closed bars (bounded memory)
+- Line-oriented TCP and websocket stream readers with reconnect
+- StreamingSignalRunner: pushes each closed bar into SignalEngine
+
+Wire format (one tick per line / websocket message), either CSV:
+    EUR/USD,1700000000.25,1.08501,1.08503
+or JSON:
+    {"pair": "EUR/USD", "ts": 1700000000.25, "bid": 1.08501, "ask": 1.08503}
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from candles import CandleArrays
+from timeframes import normalize_timeframe, timeframe_seconds
+
+logger = logging.getLogger(__name__)
+
+# (pair, timeframe, candles including the just-closed bar)
+BarCallback = Callable[[str, str, CandleArrays], None]
+
+
+class BarRing:
+    """Fixed-capacity ring buffer of closed OHLCV bars"""
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self._data = np.zeros((6, capacity))
+        self._next = 0
+        self.size = 0
+
+    def append(self, ts: float, o: float, h: float, l: float, c: float, v: float):
+        column = self._data[:, self._next]
+        column[0] = ts
+        column[1] = o
+        column[2] = h
+        column[3] = l
+        column[4] = c
+        column[5] = v
+        self._next = (self._next + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def extend(self, bars: CandleArrays):
+        """Append many bars (used for seeding, not on the tick path)"""
+        for row in zip(bars.timestamp, bars.open, bars.high, bars.low, bars.close, bars.volume):
+            self.append(*row)
+
+    def last_timestamp(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return self._data[0, (self._next - 1) % self.capacity]
+
+    def to_arrays(self) -> CandleArrays:
+        """Copy the buffered bars out in chronological order"""
+        if self.size < self.capacity:
+            data = self._data[:, :self.size]
+        else:
+            data = np.roll(self._data, -self._next, axis=1)
+        return CandleArrays(data[0].astype(np.int64), *(data[i].copy() for i in range(1, 6)))
+
+
+class CandleBuilder:
+    """
+    Builds bars for one pair and timeframe from ticks.
+
+    Ticks only touch a handful of floats; a bar is written to the ring once,
+    when it closes.
+    """
+
+    __slots__ = ('period', 'ring', 'bar_start', 'last_closed', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, timeframe: str, capacity: int = 500):
+        self.period = timeframe_seconds(timeframe)
+        self.ring = BarRing(capacity)
+        self.bar_start: Optional[float] = None
+        self.last_closed: Optional[float] = None
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+
+    def on_tick(self, ts: float, price: float, size: float = 1.0) -> bool:
+        """Feed one tick. Returns True if it closed the previous bar."""
+        start = ts - ts % self.period
+        if self.bar_start == start:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += size
+            return False
+
+        if self.last_closed is not None and start <= self.last_closed:
+            return False  # late tick for an already closed bar
+        closed = False
+        if self.bar_start is not None:
+            self._close_bar()
+            closed = True
+        self.bar_start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = size
+        return closed
+
+    def close_if_due(self, now: float) -> bool:
+        """Close the current bar if its period has elapsed without new ticks"""
+        if self.bar_start is not None and now >= self.bar_start + self.period:
+            self._close_bar()
+            self.bar_start = None
+            return True
+        return False
+
+    def _close_bar(self):
+        self.last_closed = self.bar_start
+        self.ring.append(self.bar_start, self.open, self.high, self.low, self.close, self.volume)
+
+
+class CandleAggregator:
+    """Routes ticks to builders for every configured pair/timeframe"""
+
+    def __init__(self,
+                 pairs: Iterable[str],
+                 timeframes: Iterable[str] = ("1H",),
+                 capacity: int = 500,
+                 on_bar: Optional[BarCallback] = None):
+        self.timeframes = [normalize_timeframe(tf) for tf in timeframes]
+        self.on_bar = on_bar
+        self.builders: Dict[str, List[Tuple[str, CandleBuilder]]] = {
+            pair: [(tf, CandleBuilder(tf, capacity)) for tf in self.timeframes]
+            for pair in pairs
+        }
+        self.ticks = 0
+        self.dropped = 0
+
+    def seed(self, pair: str, timeframe: str, bars: CandleArrays):
+        """Preload history (e.g. from a polled fetch) so analysis can start at once"""
+        timeframe = normalize_timeframe(timeframe)
+        for tf, builder in self.builders.get(pair, ()):
+            if tf == timeframe:
+                builder.ring.extend(bars)
+
+    def history_end(self, pair: str, timeframe: str) -> Optional[float]:
+        """Open time of the newest closed bar held for a pair/timeframe"""
+        timeframe = normalize_timeframe(timeframe)
+        for tf, builder in self.builders.get(pair, ()):
+            if tf == timeframe:
+                return builder.ring.last_timestamp()
+        return None
+
+    def state(self) -> dict:
+        """Closed bars and the forming bar per pair/timeframe (for checkpoints)"""
+        return {
+            pair: {tf: (b.ring.to_arrays(), b.bar_start, b.last_closed,
+                        (b.open, b.high, b.low, b.close, b.volume))
+                   for tf, b in builders}
+            for pair, builders in self.builders.items()
+        }
+
+    def load_state(self, state: dict):
+        """Restore builders saved by state(); pairs not configured here are ignored"""
+        for pair, builders in self.builders.items():
+            saved = state.get(pair, {})
+            for tf, builder in builders:
+                if tf not in saved:
+                    continue
+                bars, bar_start, last_closed, ohlcv = saved[tf]
+                builder.ring = BarRing(builder.ring.capacity)
+                builder.ring.extend(bars[-builder.ring.capacity:])
+                builder.bar_start = bar_start
+                builder.last_closed = last_closed
+                builder.open, builder.high, builder.low, builder.close, builder.volume = ohlcv
+
+    def on_tick(self, pair: str, ts: float, price: float, size: float = 1.0):
+        builders = self.builders.get(pair)
+        if builders is None:
+            self.dropped += 1
+            return
+        self.ticks += 1
+        for tf, builder in builders:
+            if builder.on_tick(ts, price, size) and self.on_bar:
+                self.on_bar(pair, tf, builder.ring.to_arrays())
+
+    def close_due(self, now: float):
+        """Close bars whose period has ended (call periodically)"""
+        for pair, builders in self.builders.items():
+            for tf, builder in builders:
+                if builder.close_if_due(now) and self.on_bar:
+                    self.on_bar(pair, tf, builder.ring.to_arrays())
+
+
+def parse_tick(line: str) -> Optional[Tuple[str, float, float]]:
+    """Parse a CSV or JSON tick into (pair, ts, mid price)"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line[0] == '{':
+            data = json.loads(line)
+            pair, ts = data['pair'], float(data['ts'])
+            bid, ask = data.get('bid'), data.get('ask')
+            if bid is None or ask is None:
+                return pair, ts, float(data['price'])
+            return pair, ts, (float(bid) + float(ask)) / 2
+        pair, ts, bid, ask = line.split(',')
+        return pair, float(ts), (float(bid) + float(ask)) / 2
+    except (ValueError, KeyError):
+        return None
+
+
+class TickStreamClient:
+    """
+    Reads ticks from a TCP (tcp://host:port) or websocket (ws://...) stream
+    and feeds them to a CandleAggregator, reconnecting on failure.
+    """
+
+    def __init__(self, url: str, aggregator: CandleAggregator, reconnect_delay: float = 1.0):
+        self.url = url
+        self.aggregator = aggregator
+        self.reconnect_delay = reconnect_delay
+        self.bad_lines = 0
+        self._running = False
+
+    async def run(self):
+        """Consume the stream until stop() is called"""
+        self._running = True
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                if self.url.startswith(('ws://', 'wss://')):
+                    await self._run_websocket()
+                else:
+                    await self._run_tcp()
+                delay = self.reconnect_delay
+            except (OSError, asyncio.IncompleteReadError) as e:
+                logger.warning(f"Tick stream error ({e}), reconnecting in {delay:.1f}s")
+            except Exception as e:
+                logger.error(f"Tick stream failed: {e}")
+            if self._running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def stop(self):
+        self._running = False
+
+    def _feed(self, line: str):
+        tick = parse_tick(line)
+        if tick is None:
+            self.bad_lines += 1
+            return
+        self.aggregator.on_tick(*tick)
+
+    async def _run_tcp(self):
+        host, port = self.url.replace('tcp://', '').rsplit(':', 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+        logger.info(f"Connected to tick stream {self.url}")
+        try:
+            while self._running:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._feed(line.decode())
+        finally:
+            writer.close()
+
+    async def _run_websocket(self):
+        import aiohttp
+
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.url) as ws:
+                logger.info(f"Connected to tick stream {self.url}")
+                async for msg in ws:
+                    if not self._running:
+                        break
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        for line in msg.data.splitlines():
+                            self._feed(line)
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        break
+
+
+class StreamingSignalRunner:
+    """
+    Runs SignalEngine on every closed bar from a tick stream.
+
+    Closed bars are queued and analysed by a worker task, so tick ingestion
+    never waits on analysis. If analysis falls behind, the oldest queued bar
+    of a burst is dropped rather than growing memory. Pass `engine_for`
+    (pair -> engine) to use per-instrument engine settings.
+    """
+
+    def __init__(self,
+                 engine,
+                 pairs: Iterable[str],
+                 timeframe: str = "1H",
+                 capacity: int = 500,
+                 on_signal: Optional[Callable] = None,
+                 queue_size: int = 1000,
+                 on_bars: Optional[BarCallback] = None,
+                 engine_for: Optional[Callable] = None):
+        self.engine = engine
+        self.engine_for = engine_for
+        self.timeframe = normalize_timeframe(timeframe)
+        self.on_signal = on_signal
+        self.on_bars = on_bars
+        self.aggregator = CandleAggregator(pairs, [self.timeframe], capacity, on_bar=self._on_bar)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.bars_dropped = 0
+
+    def _on_bar(self, pair: str, timeframe: str, bars: CandleArrays):
+        if self.on_bars:
+            self.on_bars(pair, timeframe, bars)
+        try:
+            self.queue.put_nowait((pair, bars))
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait((pair, bars))
+            self.bars_dropped += 1
+
+    async def run(self, url: str, clock_interval: float = 1.0):
+        """Connect to `url` and analyse bars as they close"""
+        client = TickStreamClient(url, self.aggregator)
+        tasks = [
+            asyncio.create_task(client.run()),
+            asyncio.create_task(self._clock(clock_interval)),
+            asyncio.create_task(self._worker()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            client.stop()
+            for task in tasks:
+                task.cancel()
+
+    async def _clock(self, interval: float):
+        loop = asyncio.get_running_loop()
+        offset = time.time() - loop.time()
+        while True:
+            await asyncio.sleep(interval)
+            self.aggregator.close_due(loop.time() + offset)
+
+    async def _worker(self):
+        while True:
+            pair, bars = await self.queue.get()
+            try:
+                engine = self.engine_for(pair) if self.engine_for else self.engine
+                signal = engine.analyze(pair, bars.to_frame())
+                if signal:
+                    signal.bar_time = int(bars.timestamp[-1])
+                    signal.timeframe = self.timeframe
+                if signal and self.on_signal:
+                    result = self.on_signal(signal)
+                    if asyncio.iscoroutine(result):
+                        await result
+            except Exception as e:
+                logger.error(f"Streaming analysis failed for {pair}: {e}")
+
+
+async def serve_fake_ticks(host: str = "127.0.0.1",
+                           port: int = 9100,
+                           pairs: Iterable[str] = ("EUR/USD", "GBP/USD"),
+                           rate: float = 1000.0):
+    """Local TCP stand-in that streams random-walk ticks (for testing)"""
+    prices = {pair: 1.0 + random.random() for pair in pairs}
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                lines = []
+                for pair in prices:
+                    prices[pair] += random.gauss(0, 0.0001)
+                    mid = prices[pair]
+                    lines.append(f"{pair},{time.time():.3f},{mid - 0.00001:.5f},{mid + 0.00001:.5f}\n")
+                writer.write(''.join(lines).encode())
+                await writer.drain()
+                await asyncio.sleep(len(prices) / rate)
+        except (ConnectionError, asyncio.CancelledError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+# Example usage: stream fake ticks into 1-minute bars
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    def print_bar(pair: str, timeframe: str, bars: CandleArrays):
+        print(f"{pair} {timeframe} closed: O={bars.open[-1]:.5f} H={bars.high[-1]:.5f} "
+              f"L={bars.low[-1]:.5f} C={bars.close[-1]:.5f} ticks={bars.volume[-1]:.0f}")
+
+    async def demo():
+        server = asyncio.create_task(serve_fake_ticks())
+        await asyncio.sleep(0.2)
+        aggregator = CandleAggregator(["EUR/USD", "GBP/USD"], ["1m"], on_bar=print_bar)
+        await TickStreamClient("tcp://127.0.0.1:9100", aggregator).run()
+        server.cancel()
+
+    asyncio.run(demo())
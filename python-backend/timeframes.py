@@ -0,0 +1,66 @@
+"""
+HAMCODZ Timeframe Helpers
+=========================
+Normalises timeframe labels and does candle-period arithmetic.
+
+The runner, the FCS API and the Prisma schema spell timeframes differently
+("1H", "1h", "H1"). Everything in the backend goes through
+normalize_timeframe() so cache keys and schedules agree.
+"""
+
+import math
+from typing import Dict
+
+# Canonical labels (as used by ForexDataProvider) -> period length in seconds
+TIMEFRAME_SECONDS: Dict[str, int] = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1H": 3600,
+    "4H": 14400,
+    "1D": 86400,
+    "1W": 604800,
+}
+
+_ALIASES: Dict[str, str] = {
+    "M1": "1m", "M5": "5m", "M15": "15m", "M30": "30m",
+    "H1": "1H", "1h": "1H", "60m": "1H",
+    "H4": "4H", "4h": "4H",
+    "D1": "1D", "1d": "1D", "D": "1D",
+    "W1": "1W", "1w": "1W", "W": "1W",
+}
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """Return the canonical label for a timeframe (e.g. "H1" -> "1H")"""
+    if timeframe in TIMEFRAME_SECONDS:
+        return timeframe
+    canonical = _ALIASES.get(timeframe)
+    if canonical is None:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return canonical
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """Length of one candle of the given timeframe in seconds"""
+    return TIMEFRAME_SECONDS[normalize_timeframe(timeframe)]
+
+
+def bar_open_time(ts: float, timeframe: str, offset: int = 0) -> float:
+    """
+    Open time of the candle containing unix timestamp `ts`.
+
+    Args:
+        ts: Unix timestamp (seconds)
+        timeframe: Timeframe label
+        offset: Session anchor in seconds, e.g. 22 * 3600 for a D1 bar
+            that opens at the 22:00 UTC forex rollover
+    """
+    period = timeframe_seconds(timeframe)
+    return math.floor((ts - offset) / period) * period + offset
+
+
+def next_bar_close(ts: float, timeframe: str, offset: int = 0) -> float:
+    """Close time of the candle containing unix timestamp `ts`"""
+    return bar_open_time(ts, timeframe, offset) + timeframe_seconds(timeframe)